@@ -1,17 +1,21 @@
 from collections import defaultdict
 import calendar
+import base64
 import calendar
 import datetime
 import json
+import re
+import statistics
 import unicodedata
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from dateutil.relativedelta import relativedelta
-from peewee import JOIN, fn, prefetch
+from peewee import JOIN, SQL, fn, prefetch
 
 # --- Importaciones de Modelos de Datos ---
 from app.model.account import Account
+from app.model.balance_snapshot import BalanceSnapshot
 from app.model.budget_entry import BudgetEntry
 from app.model.portfolio_asset import PortfolioAsset
 from app.model.budget_rule import BudgetRule
@@ -22,9 +26,67 @@ from app.model.tag import Tag
 from app.model.parameter import Parameter
 from app.model.trade import Trade
 from app.model.transaction import Transaction
+from app.model.transaction_search import TransactionSearch
 from app.model.transaction_split import TransactionSplit
 from app.model.transaction_tag import TransactionTag
 from app.model.base_model import db
+from app.database.aggregations import (
+    CategoryMonthSeries,
+    CategoryTotals,
+    MonthlyIncomeExpense,
+    MonthlyNet,
+    TypeTotal,
+    TypeTotals,
+    fold_breakdown,
+    totals_by_type,
+)
+from app.database.balance_snapshots import (
+    ACCOUNT,
+    DEBT,
+    cumulative_amounts_at,
+    invalidate_balance_snapshots,
+    rebuild_balance_snapshots,
+    refresh_balance_snapshots,
+)
+from app.database.daily_balances import (
+    apply_daily_balances,
+    cumulative_amounts_on,
+    delete_entity_daily_balances,
+    rebuild_daily_balances,
+)
+from app.database.budget_actuals import reassign_series_actuals, reconcile_budget_actuals
+from app.database.bulk_transactions import BalanceLedger, TransactionBulkWriter, ledger_fields
+from app.database.budget_occurrences import (
+    budget_totals_by_type,
+    occurrence_starts,
+    recurrence_calendar,
+    series_anchors,
+)
+from app.database.budget_periods import (
+    DEFAULT_FREQUENCY,
+    coerce_date,
+    compute_period_bounds,
+    entry_period_bounds,
+    frequency_delta,
+    normalize_frequency,
+    undated_entries_overlapping,
+)
+from app.database.data_version import data_version
+from app.database.rollup import apply_transaction_rollup, rebuild_monthly_rollup
+from app.database.search import fts_expression, search_index, search_tokens
+from app.database.sections import section_runner
+from app.database.tags import replace_tag_links, resolve_tag_ids, tag_dictionary
+from app.controller.projection import (
+    MAX_HORIZON_MONTHS,
+    MAX_SIMULATIONS,
+    NUMPY_AVAILABLE,
+    ProjectionInputs,
+    Scenario,
+    ScenarioResult,
+    as_columns,
+    schedule_vector,
+    simulate,
+)
 
 
 MONTH_LABELS = [
@@ -44,6 +106,47 @@ MONTH_LABELS = [
 ]
 
 
+# Secciones del Dashboard y las lecturas de ``dashboard_sections`` que necesita
+# cada una; permite calcular sólo lo pedido y emitir cada sección en cuanto
+# sus lecturas terminan.
+DASHBOARD_SECTIONS = {
+    "kpis": ("breakdown", "previous_totals"),
+    "net_worth_chart": ("net_worth_chart",),
+    "cash_flow_chart": ("breakdown",),
+    "goals": ("goals",),
+    "accounts": ("accounts",),
+    "budget_vs_actual": ("budget_vs_actual",),
+    "budget_rule_control": ("breakdown", "budget_rules"),
+    "expense_distribution": ("breakdown",),
+    "expense_type_comparison": ("breakdown",),
+}
+
+# Máximo de puntos del historial de patrimonio (unos diez años diarios).
+MAX_NET_WORTH_POINTS = 4000
+
+# Máximo de años del análisis comparativo.
+MAX_ANALYSIS_YEARS = 20
+
+# Filas rechazadas que se detallan en la respuesta de una importación.
+MAX_IMPORT_ERRORS = 100
+
+# Máximo de operaciones de un lote de transacciones.
+MAX_TRANSACTION_BATCH = 1000
+
+# Por encima de estas transacciones, una escritura masiva reconstruye las
+# tablas derivadas de una vez en lugar de actualizarlas por transacción.
+BULK_REBUILD_THRESHOLD = 1000
+
+# Reductores del desglose mensual que usa cada sección.
+_DASHBOARD_REDUCERS = {
+    "kpis": ("type_totals",),
+    "cash_flow_chart": ("cash_flow",),
+    "budget_rule_control": ("type_totals",),
+    "expense_distribution": ("categories",),
+    "expense_type_comparison": ("type_totals",),
+}
+
+
 DEFAULT_APP_SETTINGS = {
     "currency_symbol": "$",
     "decimal_places": 2,
@@ -64,61 +167,23 @@ class AppController:
     # -----------------------------------------------------------------
     # --- Helpers for recurring budget calculations ---
     # -----------------------------------------------------------------
-    _DEFAULT_FREQUENCY = "Mensual"
+    _DEFAULT_FREQUENCY = DEFAULT_FREQUENCY
 
     def _normalize_frequency(self, raw_value: Optional[str]) -> str:
         """Return a normalized frequency label with title casing."""
 
-        if not raw_value:
-            return self._DEFAULT_FREQUENCY
-
-        normalized = (
-            unicodedata.normalize("NFD", str(raw_value))
-            .encode("ascii", "ignore")
-            .decode("ascii")
-            .strip()
-            .lower()
-        )
-
-        mapping = {
-            "unica vez": "Única vez",
-            "una vez": "Única vez",
-            "semanal": "Semanal",
-            "quincenal": "Quincenal",
-            "mensual": "Mensual",
-            "anual": "Anual",
-        }
-
-        return mapping.get(normalized, self._DEFAULT_FREQUENCY)
+        return normalize_frequency(raw_value)
 
     def _frequency_delta(self, frequency: str):
         """Return a timedelta/relativedelta representing the frequency."""
 
-        normalized = self._normalize_frequency(frequency)
-        if normalized == "Única vez":
-            return None
-        if normalized == "Semanal":
-            return datetime.timedelta(weeks=1)
-        if normalized == "Quincenal":
-            return datetime.timedelta(weeks=2)
-        if normalized == "Anual":
-            return relativedelta(years=1)
-        return relativedelta(months=1)
+        return frequency_delta(frequency)
 
     @staticmethod
     def _coerce_date(value: Optional[Any]) -> Optional[datetime.date]:
         """Try to convert a value into a date, returning None on failure."""
 
-        if value in (None, "", 0):
-            return None
-        if isinstance(value, datetime.datetime):
-            return value.date()
-        if isinstance(value, datetime.date):
-            return value
-        try:
-            return datetime.date.fromisoformat(str(value))
-        except (TypeError, ValueError):
-            return None
+        return coerce_date(value)
 
     @staticmethod
     def _parse_date(value: Optional[Any]) -> Optional[datetime.date]:
@@ -141,23 +206,7 @@ class AppController:
     ) -> Tuple[datetime.date, datetime.date]:
         """Given partial information, determine the active period for a budget."""
 
-        normalized = self._normalize_frequency(frequency)
-        start = start_date or due_date or end_date or datetime.date.today()
-
-        if normalized == "Única vez":
-            final_end = end_date or due_date or start
-            return start, final_end
-
-        delta = self._frequency_delta(normalized)
-        if isinstance(delta, datetime.timedelta):
-            tentative_end = start + delta - datetime.timedelta(days=1)
-        else:
-            tentative_end = (start + delta) - datetime.timedelta(days=1)
-
-        final_end = end_date or due_date or tentative_end
-        if final_end < start:
-            final_end = start
-        return start, final_end
+        return compute_period_bounds(start_date, frequency, due_date, end_date)
 
     @staticmethod
     def _normalize_label(value: Optional[Any]) -> str:
@@ -235,7 +284,7 @@ class AppController:
 
             with db.atomic():
                 if interest_amount > 0:
-                    Transaction.create(
+                    interest = Transaction.create(
                         account=account,
                         date=next_accrual,
                         description=(
@@ -250,6 +299,7 @@ class AppController:
                         is_transfer=False,
                         transfer_account=None,
                     )
+                    self._sync_transaction_aggregates([interest.id])
                     account.current_balance = (
                         float(getattr(account, "current_balance", 0) or 0)
                         + interest_amount
@@ -266,23 +316,35 @@ class AppController:
         """Resolve the cached period for a budget entry or dict representation."""
 
         if isinstance(entry, dict):
-            frequency = entry.get("frequency")
-            start_raw = entry.get("start_date")
-            due_raw = entry.get("due_date")
-            end_raw = entry.get("end_date")
-        else:
-            frequency = getattr(entry, "frequency", None)
-            start_raw = getattr(entry, "start_date", None)
-            due_raw = getattr(entry, "due_date", None)
-            end_raw = getattr(entry, "end_date", None)
+            return entry_period_bounds(
+                entry.get("frequency"),
+                entry.get("start_date"),
+                entry.get("due_date"),
+                entry.get("end_date"),
+            )
 
-        normalized = self._normalize_frequency(frequency)
-        start_date = self._coerce_date(start_raw)
-        due_date = self._coerce_date(due_raw)
-        end_date = self._coerce_date(end_raw)
+        period_start = getattr(entry, "period_start", None)
+        period_end = getattr(entry, "period_end", None)
+        if period_start and period_end:
+            return coerce_date(period_start), coerce_date(period_end)
+        return entry_period_bounds(
+            getattr(entry, "frequency", None),
+            getattr(entry, "start_date", None),
+            getattr(entry, "due_date", None),
+            getattr(entry, "end_date", None),
+        )
 
-        start, final_end = self._compute_period_bounds(start_date, normalized, due_date, end_date)
-        return start, final_end
+    @staticmethod
+    def _budget_entries_overlapping(start_date: datetime.date, end_date: datetime.date):
+        """Condición indexada: entradas cuyo periodo activo se cruza con el rango.
+
+        Las entradas sin fechas no guardan periodo (``period_start`` nulo); se
+        incluyen si el ciclo que empieza hoy se cruza con el rango.
+        """
+
+        dated = (BudgetEntry.period_end >= start_date) & (BudgetEntry.period_start <= end_date)
+        undated = undated_entries_overlapping(start_date, end_date)
+        return dated | BudgetEntry.id.in_(undated) if undated else dated
 
     # =================================================================
     # --- SECCIÓN: LÓGICA GENERAL Y DE UTILIDAD ---
@@ -363,6 +425,21 @@ class AppController:
                 amount = float(getattr(transaction, "amount", 0) or 0)
                 yield transaction, amount, getattr(transaction, "category", "")
 
+    def _sync_transaction_aggregates(self, transaction_ids: List[int], sign: int = 1) -> None:
+        """Actualiza el rollup mensual y los snapshots de saldo de las transacciones.
+
+        Con ``sign=-1`` se llama antes de modificar o borrar (retira su aporte);
+        con ``sign=1`` después de guardar el nuevo estado.
+        """
+
+        if sign < 0:
+            data_version.mark_rewrite()
+        apply_transaction_rollup(transaction_ids, sign=sign)
+        apply_daily_balances(transaction_ids, sign=sign)
+        invalidate_balance_snapshots(transaction_ids)
+        if sign > 0:
+            refresh_balance_snapshots()
+
     def _sync_transaction_splits(
         self, transaction: Transaction, splits: List[Dict[str, Any]]
     ) -> None:
@@ -389,18 +466,14 @@ class AppController:
     def _sync_transaction_tags(
         self, transaction: Transaction, tags: List[str]
     ) -> None:
-        """Actualiza las etiquetas vinculadas a una transacción."""
+        """Actualiza las etiquetas vinculadas a una transacción.
 
-        TransactionTag.delete().where(
-            TransactionTag.transaction == transaction
-        ).execute()
-
-        if not tags:
-            return
+        Sólo se escriben los vínculos que cambian; los ids de las etiquetas
+        conocidas salen del diccionario en memoria.
+        """
 
-        for tag_name in tags:
-            tag, _ = Tag.get_or_create(name=tag_name)
-            TransactionTag.get_or_create(transaction=transaction, tag=tag)
+        tag_ids = resolve_tag_ids(tags)
+        replace_tag_links({transaction.id: [tag_ids[name] for name in tags]})
 
     def format_currency(self, value):
         """
@@ -440,17 +513,107 @@ class AppController:
     # --- SECCIÓN: DASHBOARD ---
     # =================================================================
     
-    def get_dashboard_data(self, year: int, months: Optional[List[int]]):
-        """Agrega y devuelve todos los datos necesarios para el Dashboard."""
+    def get_dashboard_data(
+        self,
+        year: int,
+        months: Optional[List[int]],
+        net_worth_months: int = 12,
+        sections: Optional[List[str]] = None,
+    ):
+        """Agrega y devuelve los datos del Dashboard.
+
+        ``sections`` limita la respuesta (y las consultas) a esas claves de
+        ``DASHBOARD_SECTIONS``. Las lecturas independientes se calculan en
+        paralelo con ``section_runner``; ``assemble_dashboard`` combina sus
+        resultados.
+        """
 
         month_list = list(months) if months else []
-        transactions = self._get_transactions_for_period(year, month_list)
+        results, _ = section_runner.run(
+            self.dashboard_sections(year, month_list, net_worth_months, sections)
+        )
+        return self.assemble_dashboard(year, month_list, results, sections)
 
-        kpis = self._get_dashboard_kpis(year, month_list, transactions)
-        net_worth_data = self._get_net_worth_data_for_chart()
-        cash_flow_data = self._get_cash_flow_data_for_chart(year, month_list)
+    def dashboard_sections(
+        self,
+        year: int,
+        months: List[int],
+        net_worth_months: int = 12,
+        sections: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Devuelve las lecturas que necesitan ``sections`` como tareas con nombre."""
+
+        wanted = list(sections or DASHBOARD_SECTIONS)
+        needed = {task for name in wanted for task in DASHBOARD_SECTIONS[name]}
+        start_date, end_date = self._get_date_range(year, months)
+        previous_start, previous_end = self._get_previous_period(year, months)
+
+        reducer_factories = {
+            "type_totals": TypeTotals,
+            "cash_flow": lambda: MonthlyIncomeExpense("Ingreso"),
+            "categories": lambda: CategoryTotals("Ingreso", "Sin categoría"),
+        }
+        reducer_names = {
+            reducer for name in wanted for reducer in _DASHBOARD_REDUCERS.get(name, ())
+        }
+
+        tasks = {
+            "breakdown": lambda: fold_breakdown(
+                start_date,
+                end_date,
+                {name: reducer_factories[name]() for name in reducer_names},
+            ),
+            "previous_totals": lambda: totals_by_type(previous_start, previous_end),
+            "net_worth_chart": lambda: self._get_net_worth_data_for_chart(net_worth_months),
+            "goals": self.get_goals_summary,
+            "accounts": self._get_accounts_summary,
+            "budget_vs_actual": lambda: self._get_budget_vs_actual_summary(year, months),
+            "budget_rules": self._load_budget_rules,
+        }
+        return {name: task for name, task in tasks.items() if name in needed}
+
+    def build_dashboard_section(
+        self, name: str, year: int, months: List[int], results: Dict[str, Any]
+    ) -> Any:
+        """Construye una sección a partir de las lecturas de ``dashboard_sections``.
+
+        No consulta la base de datos, así que puede ejecutarse fuera de los
+        hilos con conexión (por ejemplo en el event loop).
+        """
+
+        breakdown = results.get("breakdown", {})
+        if name == "kpis":
+            return self._get_dashboard_kpis(
+                year, months, breakdown["type_totals"], results["previous_totals"]
+            )
+        if name == "cash_flow_chart":
+            return self._get_cash_flow_data_for_chart(year, months, breakdown["cash_flow"])
+        if name == "budget_rule_control":
+            type_totals = breakdown["type_totals"]
+            income = sum(total for kind, total in type_totals if kind == "Ingreso")
+            return self._get_budget_rule_control(type_totals, income, results["budget_rules"])
+        if name == "expense_distribution":
+            return self._get_expense_distribution(breakdown["categories"]["expense"])
+        if name == "expense_type_comparison":
+            return self._get_expense_type_comparison(breakdown["type_totals"])
+        return results[name]
+
+    def assemble_dashboard(
+        self,
+        year: int,
+        months: List[int],
+        results: Dict[str, Any],
+        sections: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Construye la respuesta del Dashboard con las secciones pedidas."""
 
-        goals_summary = self.get_goals_summary()
+        return {
+            name: self.build_dashboard_section(name, year, months, results)
+            for name in (sections or DASHBOARD_SECTIONS)
+        }
+
+    def _get_accounts_summary(self) -> List[Dict[str, Any]]:
+        """Cuentas reales más la cuenta virtual de presupuesto para el Dashboard."""
 
         accounts_summary = [
             {
@@ -464,68 +627,41 @@ class AppController:
             for account in Account.select().order_by(Account.name)
         ]
         accounts_summary.append(self._build_virtual_budget_account())
+        return accounts_summary
 
-        budget_vs_actual = self._get_budget_vs_actual_summary(year, month_list, transactions)
-        budget_rule_control = self._get_budget_rule_control(transactions, kpis["income"]["amount"])
-        expense_distribution = self._get_expense_distribution(transactions)
-        expense_type_comparison = self._get_expense_type_comparison(transactions)
-
-        dashboard_data = {
-            "kpis": kpis,
-            "net_worth_chart": net_worth_data,
-            "cash_flow_chart": cash_flow_data,
-            "goals": goals_summary,
-            "accounts": accounts_summary,
-            "budget_vs_actual": budget_vs_actual,
-            "budget_rule_control": budget_rule_control,
-            "expense_distribution": expense_distribution,
-            "expense_type_comparison": expense_type_comparison,
-        }
-        return dashboard_data
+    def _get_previous_period(
+        self, year: int, months: List[int]
+    ) -> Tuple[datetime.date, datetime.date]:
+        """Periodo de igual duración inmediatamente anterior al seleccionado."""
+
+        start_date, _ = self._get_date_range(year, months)
+        num_months = len(months) if months else 12
+        return (
+            start_date - relativedelta(months=num_months),
+            start_date - relativedelta(days=1),
+        )
 
     def _get_dashboard_kpis(
         self,
         year: int,
         months: List[int],
-        transactions: Optional[List[Transaction]] = None,
+        type_totals: Optional[List[TypeTotal]] = None,
+        previous_totals: Optional[List[TypeTotal]] = None,
     ):
         """Calcula los KPIs de ingresos, gastos y ahorro para el período seleccionado."""
 
-        start_date, end_date = self._get_date_range(year, months)
+        if type_totals is None:
+            type_totals = totals_by_type(*self._get_date_range(year, months))
 
-        if transactions is None:
-            query = (
-                Transaction.select()
-                .where((Transaction.date >= start_date) & (Transaction.date <= end_date))
-                .order_by(Transaction.date)
-            )
-            transactions = self._prefetch_transactions(query)
-
-        relevant = [t for t in transactions if not getattr(t, "is_transfer", False)]
-        income = sum(float(t.amount or 0) for t in relevant if t.type == "Ingreso")
-        expense = sum(
-            abs(float(t.amount or 0)) for t in relevant if t.type != "Ingreso"
-        )
+        income = sum(total for kind, total in type_totals if kind == "Ingreso")
+        expense = sum(abs(total) for kind, total in type_totals if kind != "Ingreso")
         net = income - expense
 
-        num_months = len(months) if months else 12
-        previous_start = start_date - relativedelta(months=num_months)
-        previous_end = start_date - relativedelta(days=1)
-
-        previous_query = (
-            Transaction.select()
-            .where(Transaction.date.between(previous_start, previous_end))
-            .order_by(Transaction.date)
-        )
-        previous_trans = self._prefetch_transactions(previous_query)
-        prev_relevant = [
-            t for t in previous_trans if not getattr(t, "is_transfer", False)
-        ]
-        prev_income = sum(
-            float(t.amount or 0) for t in prev_relevant if t.type == "Ingreso"
-        )
+        if previous_totals is None:
+            previous_totals = totals_by_type(*self._get_previous_period(year, months))
+        prev_income = sum(total for kind, total in previous_totals if kind == "Ingreso")
         prev_expense = sum(
-            abs(float(t.amount or 0)) for t in prev_relevant if t.type != "Ingreso"
+            abs(total) for kind, total in previous_totals if kind != "Ingreso"
         )
         prev_net = prev_income - prev_expense
 
@@ -540,116 +676,145 @@ class AppController:
             "net": {"amount": net, "comparison": _comparison(net, prev_net)},
         }
 
-    def _get_net_worth_data_for_chart(self):
-        """Prepara datos históricos del patrimonio neto usando el movimiento real."""
-        today = datetime.date.today()
-
-        accounts = list(Account.select())
-        debts = list(Debt.select())
-        transactions = self._prefetch_transactions(
-            Transaction.select().order_by(Transaction.date.asc(), Transaction.id.asc())
-        )
+    def _net_worth_bases(self) -> Tuple[Dict[int, float], Dict[int, float]]:
+        """Saldos de partida por cuenta y por deuda para valorar el patrimonio.
 
-        account_running: Dict[int, float] = {
+        El saldo inicial de cada deuda es el actual más los pagos registrados.
+        """
+        accounts = {
             account.id: float(account.initial_balance or 0.0)
-            for account in accounts
+            for account in Account.select(Account.id, Account.initial_balance)
+        }
+        total_debt_payments = dict(
+            Transaction.select(Transaction.debt, fn.SUM(Transaction.amount))
+            .where(Transaction.debt.is_null(False))
+            .group_by(Transaction.debt)
+            .tuples()
+        )
+        debt_base = {
+            debt.id: max(
+                0.0,
+                float(debt.current_balance or 0.0)
+                + float(total_debt_payments.get(debt.id) or 0.0),
+            )
+            for debt in Debt.select(Debt.id, Debt.current_balance)
         }
+        return accounts, debt_base
 
-        # Calcula el saldo inicial de cada deuda sumando los pagos registrados
-        total_debt_payments: Dict[int, float] = defaultdict(float)
-        for transaction in transactions:
-            if transaction.debt_id:
-                total_debt_payments[transaction.debt_id] += float(
-                    transaction.amount or 0.0
-                )
+    def _value_net_worth(
+        self,
+        points: List[datetime.date],
+        movements: List[Dict[Tuple[str, int], float]],
+    ) -> Dict[str, List[Any]]:
+        """Valora activos, pasivos y patrimonio neto en cada fecha de ``points``."""
+        accounts, debt_base = self._net_worth_bases()
+
+        dates: List[str] = []
+        values: List[float] = []
+        assets: List[float] = []
+        liabilities: List[float] = []
+        for point, movement in zip(points, movements):
+            total_assets = sum(
+                initial + movement.get((ACCOUNT, account_id), 0.0)
+                for account_id, initial in accounts.items()
+            )
+            total_liabilities = sum(
+                max(0.0, base - movement.get((DEBT, debt_id), 0.0))
+                for debt_id, base in debt_base.items()
+            )
+
+            dates.append(point.strftime("%Y-%m-%d"))
+            values.append(total_assets - total_liabilities)
+            assets.append(total_assets)
+            liabilities.append(total_liabilities)
+
+        return {"dates": dates, "values": values, "assets": assets, "liabilities": liabilities}
 
-        debt_running: Dict[int, float] = {}
-        for debt in debts:
-            base_balance = float(debt.current_balance or 0.0)
-            paid_total = total_debt_payments.get(debt.id, 0.0)
-            debt_running[debt.id] = max(0.0, base_balance + paid_total)
+    def _get_net_worth_data_for_chart(self, months: int = 12):
+        """Prepara datos históricos del patrimonio neto a partir de los snapshots mensuales.
+
+        ``months`` indica cuántos cierres de mes se muestran antes del punto de hoy.
+        """
+        today = datetime.date.today()
 
         month_points: List[datetime.date] = []
         current_month_start = today.replace(day=1)
-        for offset in range(12, -1, -1):
+        for offset in range(max(0, int(months)), -1, -1):
             month_start = current_month_start - relativedelta(months=offset)
             month_end = (month_start + relativedelta(months=1)) - datetime.timedelta(days=1)
             if month_end > today:
                 month_end = today
             month_points.append(month_end)
 
-        cursor = 0
-        dates: List[str] = []
-        values: List[float] = []
-        for month_end in month_points:
-            while cursor < len(transactions) and transactions[cursor].date <= month_end:
-                tx = transactions[cursor]
-                amount = float(tx.amount or 0.0)
-                amount_abs = abs(amount)
-                tx_type = (tx.type or "").strip().lower()
-
-                if getattr(tx, "is_transfer", False):
-                    source_id = getattr(tx, "account_id", None)
-                    target = getattr(tx, "transfer_account", None)
-                    if source_id:
-                        account_running[source_id] = account_running.get(source_id, 0.0) - amount_abs
-                    if target is not None:
-                        dest_id = getattr(target, "id", None)
-                        if dest_id is not None:
-                            account_running[dest_id] = account_running.get(dest_id, 0.0) + amount_abs
-                    cursor += 1
-                    continue
-
-                if tx.account_id:
-                    if tx_type == "ingreso":
-                        account_running[tx.account_id] = account_running.get(tx.account_id, 0.0) + amount_abs
-                    else:
-                        account_running[tx.account_id] = account_running.get(tx.account_id, 0.0) - amount_abs
-
-                if tx.debt_id and tx_type != "ingreso":
-                    debt_running[tx.debt_id] = max(0.0, debt_running.get(tx.debt_id, 0.0) - amount_abs)
+        valued = self._value_net_worth(month_points, cumulative_amounts_at(month_points))
+        return {"dates": valued["dates"], "values": valued["values"]}
 
-                cursor += 1
-
-            total_assets = sum(account_running.values())
-            total_liabilities = sum(debt_running.values())
-
-            dates.append(month_end.strftime("%Y-%m-%d"))
-            values.append(total_assets - total_liabilities)
+    def get_net_worth_history(
+        self,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+        granularity: str = "month",
+    ):
+        """Historial del patrimonio neto con resolución diaria, semanal o mensual.
 
-        return {"dates": dates, "values": values}
+        Cada punto es el cierre de su día, semana (domingo) o mes, recortado a
+        ``end``; se valora con el índice diario de saldos acumulados, de modo
+        que el coste depende del número de puntos y no de las transacciones.
+        Por defecto cubre el último año hasta hoy.
+        """
+        try:
+            end = end or datetime.date.today()
+            start = start or end - relativedelta(years=1)
+            if start > end:
+                return {"error": "La fecha inicial debe ser anterior o igual a la final."}
+
+            if granularity == "day":
+                step = relativedelta(days=1)
+                first = start
+            elif granularity == "week":
+                step = relativedelta(weeks=1)
+                first = start + datetime.timedelta(days=6 - start.weekday())
+            elif granularity == "month":
+                step = relativedelta(months=1)
+                first = start + relativedelta(day=31)
+            else:
+                return {"error": f"Granularidad no soportada: {granularity}"}
+
+            points: List[datetime.date] = []
+            point = first
+            while point < end:
+                points.append(point)
+                if len(points) >= MAX_NET_WORTH_POINTS:
+                    return {
+                        "error": f"El rango supera el máximo de {MAX_NET_WORTH_POINTS} puntos."
+                    }
+                point = first + step * len(points)
+                if granularity == "month":
+                    point += relativedelta(day=31)
+            points.append(end)
+
+            history = self._value_net_worth(points, cumulative_amounts_on(points))
+            history["granularity"] = granularity
+            return history
+        except Exception as exc:
+            return {"error": str(exc)}
 
-    def _get_cash_flow_data_for_chart(self, year: int, months: List[int]):
+    def _get_cash_flow_data_for_chart(
+        self,
+        year: int,
+        months: List[int],
+        monthly_flows: Optional[List[Tuple[str, float, float]]] = None,
+    ):
         """Prepara los datos para el gráfico de flujo de efectivo mensual."""
-        start_date, end_date = self._get_date_range(year, months)
-
-        query = (
-            Transaction
-            .select(fn.strftime('%Y-%m', Transaction.date).alias('month'),
-                    fn.SUM(Transaction.amount).alias('total'),
-                    Transaction.type)
-            .where(
-                (Transaction.date >= start_date)
-                & (Transaction.date <= end_date)
-                & (Transaction.is_transfer == False)
-            )
-            .group_by(fn.strftime('%Y-%m', Transaction.date), Transaction.type)
-            .order_by(fn.strftime('%Y-%m', Transaction.date))
-        )
+        if monthly_flows is None:
+            monthly_flows = fold_breakdown(
+                *self._get_date_range(year, months),
+                {"cash_flow": MonthlyIncomeExpense('Ingreso')},
+            )["cash_flow"]
 
-        monthly_data: Dict[str, Dict[str, float]] = defaultdict(lambda: {'income': 0.0, 'expense': 0.0})
-        for row in query.dicts():
-            month_key = row['month']
-            amount = float(row['total'] or 0)
-            if row['type'] == 'Ingreso':
-                monthly_data[month_key]['income'] = amount
-            else:
-                monthly_data[month_key]['expense'] += abs(amount)
-
-        sorted_items = sorted(monthly_data.items())
-        labels = [month for month, _ in sorted_items]
-        income_data = [values['income'] for _, values in sorted_items]
-        expense_data = [values['expense'] for _, values in sorted_items]
+        labels = [month for month, _, _ in monthly_flows]
+        income_data = [income for _, income, _ in monthly_flows]
+        expense_data = [expense for _, _, expense in monthly_flows]
 
         return {
             "months": labels,
@@ -657,22 +822,10 @@ class AppController:
             "expense": expense_data,
         }
 
-    def _get_transactions_for_period(self, year: int, months: List[int]) -> List[Transaction]:
-        """Obtiene las transacciones dentro del periodo seleccionado."""
-
-        start_date, end_date = self._get_date_range(year, months)
-        query = (
-            Transaction.select()
-            .where(Transaction.date.between(start_date, end_date))
-            .order_by(Transaction.date)
-        )
-        return self._prefetch_transactions(query)
-
     def _get_budget_vs_actual_summary(
         self,
         year: int,
         months: List[int],
-        transactions: List[Transaction],
     ):
         """Construye el resumen de presupuesto vs. gasto real para ingresos y gastos."""
 
@@ -682,15 +835,8 @@ class AppController:
         actual_income = 0.0
         actual_expense = 0.0
 
-        for entry in BudgetEntry.select():
-            period_start, period_end = self._resolve_entry_bounds(entry)
-            if period_start > end_date or period_end < start_date:
-                continue
-
-            planned = float(getattr(entry, "budgeted_amount", 0) or 0)
-            actual = float(getattr(entry, "actual_amount", 0) or 0)
-
-            if (entry.type or "").strip().lower() == "ingreso":
+        for entry_type, (planned, actual) in budget_totals_by_type(start_date, end_date).items():
+            if (entry_type or "").strip().lower() == "ingreso":
                 budgeted_income += planned
                 actual_income += actual
             else:
@@ -712,44 +858,55 @@ class AppController:
             "expense": _build_summary(budgeted_expense, actual_expense),
         }
 
-    def _get_budget_rule_control(self, transactions: List[Transaction], total_income: float):
+    def _load_budget_rules(self) -> Tuple[Dict[str, str], List[Tuple[str, float]]]:
+        """Devuelve el mapa tipo → regla y las reglas ``(nombre, porcentaje)`` en orden."""
+
+        type_to_rule = dict(
+            Parameter.select(Parameter.value, BudgetRule.name)
+            .join(BudgetRule, on=(Parameter.budget_rule == BudgetRule.id))
+            .where(Parameter.group == 'Tipo de Transacción')
+            .tuples()
+        )
+        rules = list(
+            BudgetRule.select(BudgetRule.name, BudgetRule.percentage)
+            .order_by(BudgetRule.id)
+            .tuples()
+        )
+        return type_to_rule, rules
+
+    def _get_budget_rule_control(
+        self,
+        type_totals: List[TypeTotal],
+        total_income: float,
+        budget_rules: Optional[Tuple[Dict[str, str], List[Tuple[str, float]]]] = None,
+    ):
         """Calcula el cumplimiento de las reglas de presupuesto basadas en el ingreso."""
 
-        parameters = Parameter.select().where(Parameter.group == 'Tipo de Transacción')
-        type_to_rule = {}
-        for param in parameters:
-            if param.budget_rule_id:
-                type_to_rule[param.value] = param.budget_rule
+        type_to_rule, rules = budget_rules or self._load_budget_rules()
 
         totals: Dict[str, float] = defaultdict(float)
-        for transaction in transactions:
-            if getattr(transaction, 'is_transfer', False):
-                continue
-            if transaction.type == 'Ingreso':
+        for kind, total in type_totals:
+            if kind == 'Ingreso':
                 continue
-            amount = abs(float(transaction.amount or 0))
-            rule = type_to_rule.get(transaction.type)
-            if rule:
-                totals[rule.name] += amount
-            else:
-                totals['Sin Regla'] += amount
+            rule_name = type_to_rule.get(kind)
+            totals[rule_name or 'Sin Regla'] += abs(total)
 
         results = []
-        for rule in BudgetRule.select().order_by(BudgetRule.id):
-            actual_amount = totals.pop(rule.name, 0.0)
+        for rule_name, percentage in rules:
+            actual_amount = totals.pop(rule_name, 0.0)
             actual_percent = (actual_amount / total_income * 100) if total_income else 0.0
             if total_income == 0:
                 state = 'neutral'
-            elif actual_percent <= rule.percentage * 0.95:
+            elif actual_percent <= percentage * 0.95:
                 state = 'ok'
-            elif actual_percent <= rule.percentage * 1.1:
+            elif actual_percent <= percentage * 1.1:
                 state = 'warning'
             else:
                 state = 'critical'
 
             results.append({
-                "name": rule.name,
-                "ideal_percent": rule.percentage,
+                "name": rule_name,
+                "ideal_percent": percentage,
                 "actual_amount": actual_amount,
                 "actual_percent": actual_percent,
                 "state": state,
@@ -768,33 +925,24 @@ class AppController:
 
         return results
 
-    def _get_expense_distribution(self, transactions: List[Transaction]):
+    def _get_expense_distribution(self, expense_totals: Dict[str, float]):
         """Distribución de gastos por categoría para gráficas de barras."""
 
-        totals: Dict[str, float] = defaultdict(float)
-        for transaction, amount, category in self._iter_transaction_allocations(transactions):
-            if transaction.type == 'Ingreso':
-                continue
-            label = category or 'Sin categoría'
-            totals[label] += abs(amount)
-
-        sorted_items = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        sorted_items = sorted(expense_totals.items(), key=lambda item: item[1], reverse=True)
         categories = [item[0] for item in sorted_items]
         amounts = [item[1] for item in sorted_items]
 
         return {"categories": categories, "amounts": amounts}
 
-    def _get_expense_type_comparison(self, transactions: List[Transaction]):
+    def _get_expense_type_comparison(self, type_totals: List[TypeTotal]):
         """Distribución de gastos por tipo (ej. fijo, variable)."""
 
         totals: Dict[str, float] = defaultdict(float)
-        for transaction in transactions:
-            if getattr(transaction, 'is_transfer', False):
+        for kind, total in type_totals:
+            if kind == 'Ingreso':
                 continue
-            if transaction.type == 'Ingreso':
-                continue
-            label = transaction.type or 'Sin tipo'
-            totals[label] += abs(float(transaction.amount or 0))
+            label = kind or 'Sin tipo'
+            totals[label] += abs(total)
 
         sorted_items = sorted(totals.items(), key=lambda item: item[1], reverse=True)
         labels = [item[0] for item in sorted_items]
@@ -809,17 +957,12 @@ class AppController:
             year = today.year
 
         month_list = [month] if month else list(range(1, 13))
-        transactions = self._get_transactions_for_period(year, month_list)
-
-        income_totals: Dict[str, float] = defaultdict(float)
-        expense_totals: Dict[str, float] = defaultdict(float)
-
-        for transaction, amount, category in self._iter_transaction_allocations(transactions):
-            label = category or 'Sin categoría'
-            if transaction.type == 'Ingreso':
-                income_totals[label] += amount
-            else:
-                expense_totals[label] += abs(amount)
+        totals = fold_breakdown(
+            *self._get_date_range(year, month_list),
+            {"categories": CategoryTotals('Ingreso', 'Sin categoría')},
+        )["categories"]
+        income_totals = totals["income"]
+        expense_totals = totals["expense"]
 
         income = [
             {"category": category, "amount": total}
@@ -853,12 +996,22 @@ class AppController:
             year = today.year
 
         month_list = sorted(set(months)) if months else list(range(1, 13))
-        transactions = self._get_transactions_for_period(year, month_list)
+        sections = fold_breakdown(
+            *self._get_date_range(year, month_list),
+            {
+                "expense_by_month": CategoryTotals(
+                    "Ingreso", "Sin categoría", months=month_list, per_month=True
+                ),
+                "monthly_net": MonthlyNet("Ingreso"),
+            },
+        )
 
-        annual_expense_report = self._build_annual_expense_report(year, month_list)
-        budget_analysis = self._build_budget_analysis(year, month_list, transactions)
+        annual_expense_report = self._build_annual_expense_report(
+            year, month_list, sections["expense_by_month"]["expense"]
+        )
+        budget_analysis = self._build_budget_analysis(year, month_list)
         cash_flow_projection = self._build_cash_flow_projection(
-            year, month_list, projection_months, transactions
+            year, month_list, projection_months, sections["monthly_net"]
         )
 
         return {
@@ -869,25 +1022,30 @@ class AppController:
             "cash_flow_projection": cash_flow_projection,
         }
 
-    def _build_annual_expense_report(self, year: int, months: List[int]) -> Dict[str, Any]:
+    def _build_annual_expense_report(
+        self,
+        year: int,
+        months: List[int],
+        expense_by_month: Optional[Dict[str, Dict[int, float]]] = None,
+    ) -> Dict[str, Any]:
         """Genera una tabla de gastos anuales agrupados por categoría y mes."""
 
         month_list = sorted(set(months)) if months else list(range(1, 13))
-        transactions = self._get_transactions_for_period(year, month_list)
+        if expense_by_month is None:
+            expense_by_month = fold_breakdown(
+                *self._get_date_range(year, month_list),
+                {
+                    "categories": CategoryTotals(
+                        'Ingreso', 'Sin categoría', months=month_list, per_month=True
+                    )
+                },
+            )["categories"]["expense"]
 
-        rows: Dict[str, Dict[int, float]] = defaultdict(lambda: defaultdict(float))
+        rows = expense_by_month
         monthly_totals: Dict[int, float] = defaultdict(float)
-
-        for transaction, amount, category in self._iter_transaction_allocations(transactions):
-            if transaction.type == 'Ingreso':
-                continue
-            month_number = int(transaction.date.month)
-            if month_number not in month_list:
-                continue
-            label = category or 'Sin categoría'
-            value = abs(amount)
-            rows[label][month_number] += value
-            monthly_totals[month_number] += value
+        for values in rows.values():
+            for month_number, value in values.items():
+                monthly_totals[month_number] += value
 
         ordered_months = month_list
         month_headers = [
@@ -919,11 +1077,106 @@ class AppController:
             "grand_total": grand_total,
         }
 
+    def get_multi_year_analysis(
+        self,
+        start_year: Optional[int] = None,
+        end_year: Optional[int] = None,
+        flow: str = "expense",
+        top: int = 12,
+    ) -> Dict[str, Any]:
+        """Compara varios años: matrices categoría × mes × año, variación
+        interanual y suma móvil de 12 meses.
+
+        Se calcula con un único recorrido del rollup mensual desde el año
+        anterior a ``start_year`` (base de la primera variación y de la suma
+        móvil). Sólo se detallan las ``top`` categorías de mayor total; el
+        resto se agrupa en "Otros", así el tamaño de la respuesta depende del
+        rango pedido y no del historial.
+        """
+
+        end_year = end_year or datetime.date.today().year
+        start_year = start_year or end_year - 4
+        if start_year > end_year:
+            return {"error": "El año inicial debe ser anterior o igual al final."}
+        if end_year - start_year + 1 > MAX_ANALYSIS_YEARS:
+            return {"error": f"El rango supera el máximo de {MAX_ANALYSIS_YEARS} años."}
+        if flow not in ("income", "expense"):
+            return {"error": f"Flujo no soportado: {flow}"}
+        top = max(1, int(top))
+
+        series = fold_breakdown(
+            datetime.date(start_year - 1, 1, 1),
+            datetime.date(end_year, 12, 31),
+            {"series": CategoryMonthSeries("Ingreso", "Sin categoría")},
+        )["series"][flow]
+
+        # Meses del rango, con el año base delante.
+        month_keys = [
+            f"{year:04d}-{month:02d}"
+            for year in range(start_year - 1, end_year + 1)
+            for month in range(1, 13)
+        ]
+        years = list(range(start_year, end_year + 1))
+
+        def _range_total(values: Dict[str, float]) -> float:
+            return sum(values.get(key, 0.0) for key in month_keys[12:])
+
+        ranked = sorted(series.items(), key=lambda item: _range_total(item[1]), reverse=True)
+        rows = [(category, values) for category, values in ranked[:top]]
+        if len(ranked) > top:
+            others: Dict[str, float] = defaultdict(float)
+            for _, values in ranked[top:]:
+                for key, value in values.items():
+                    others[key] += value
+            rows.append(("Otros", others))
+
+        totals: Dict[str, float] = defaultdict(float)
+        for _, values in ranked:
+            for key, value in values.items():
+                totals[key] += value
+
+        def _pivot(values: Dict[str, float]) -> Dict[str, Any]:
+            flat = [values.get(key, 0.0) for key in month_keys]
+            rolling: List[float] = []
+            window = sum(flat[:12])
+            for index in range(12, len(flat)):
+                window += flat[index] - flat[index - 12]
+                rolling.append(window)
+
+            year_totals = [sum(flat[index:index + 12]) for index in range(0, len(flat), 12)]
+            yoy = []
+            for previous, current in zip(year_totals, year_totals[1:]):
+                delta = current - previous
+                yoy.append(
+                    {"delta": delta, "pct": (delta / abs(previous) * 100) if previous else None}
+                )
+
+            def _by_year(items: List[float]) -> List[List[float]]:
+                return [items[index:index + 12] for index in range(0, len(items), 12)]
+
+            return {
+                "values": _by_year(flat[12:]),
+                "year_totals": year_totals[1:],
+                "yoy": yoy,
+                "yoy_monthly": _by_year(
+                    [current - previous for previous, current in zip(flat, flat[12:])]
+                ),
+                "rolling_12m": _by_year(rolling),
+            }
+
+        return {
+            "years": years,
+            "months": [{"number": month, "label": MONTH_LABELS[month]} for month in range(1, 13)],
+            "flow": flow,
+            "categories": [{"category": category, **_pivot(values)} for category, values in rows],
+            "totals": _pivot(totals),
+            "grouped_categories": max(0, len(ranked) - top),
+        }
+
     def _build_budget_analysis(
         self,
         year: int,
         months: List[int],
-        transactions: List[Transaction],
     ) -> Dict[str, Any]:
         """Compara presupuesto anual vs gasto real agrupado por regla."""
 
@@ -937,16 +1190,9 @@ class AppController:
         budget_totals: Dict[str, float] = defaultdict(float)
         actual_totals: Dict[str, float] = defaultdict(float)
 
-        for entry in BudgetEntry.select():
-            period_start, period_end = self._resolve_entry_bounds(entry)
-            if period_start > end_date or period_end < start_date:
-                continue
-
-            rule = type_to_rule.get(entry.type)
-            rule_name = rule.name if rule else (entry.type or 'Sin Regla')
-
-            planned = float(getattr(entry, 'budgeted_amount', 0) or 0)
-            actual = float(getattr(entry, 'actual_amount', 0) or 0)
+        for entry_type, (planned, actual) in budget_totals_by_type(start_date, end_date).items():
+            rule = type_to_rule.get(entry_type)
+            rule_name = rule.name if rule else (entry_type or 'Sin Regla')
 
             budget_totals[rule_name] += planned
             actual_totals[rule_name] += actual
@@ -1024,22 +1270,16 @@ class AppController:
         year: int,
         months: List[int],
         projection_months: int,
-        transactions: List[Transaction],
+        monthly_net: Dict[int, float],
     ) -> Dict[str, Any]:
-        """Calcula una proyección lineal del saldo total de cuentas."""
+        """Calcula una proyección lineal del saldo total de cuentas.
 
-        month_list = sorted(set(months)) if months else list(range(1, 13))
+        Es determinista y no depende de NumPy, para que Análisis muestre los
+        mismos números en cualquier instalación; las simulaciones Monte-Carlo
+        con reglas, deudas y bandas quedan en ``get_cash_flow_projection``.
+        """
 
-        monthly_net: Dict[int, float] = defaultdict(float)
-        for transaction in transactions:
-            if getattr(transaction, 'is_transfer', False):
-                continue
-            month = int(transaction.date.month)
-            amount = float(transaction.amount or 0)
-            if transaction.type == 'Ingreso':
-                monthly_net[month] += amount
-            else:
-                monthly_net[month] -= abs(amount)
+        month_list = sorted(set(months)) if months else list(range(1, 13))
 
         if month_list:
             total_net = sum(monthly_net.get(month, 0.0) for month in month_list)
@@ -1047,11 +1287,10 @@ class AppController:
         else:
             average_flow = 0.0
 
-        starting_balance = sum(float(acc.current_balance or 0) for acc in Account.select())
-
         start_date, end_date = self._get_date_range(year, months)
         next_month = end_date + relativedelta(months=1)
 
+        starting_balance = sum(float(acc.current_balance or 0) for acc in Account.select())
         projection_points = []
         balance = starting_balance
         for _ in range(max(projection_months, 0)):
@@ -1067,6 +1306,234 @@ class AppController:
             "points": projection_points,
         }
 
+    def get_cash_flow_projection(
+        self,
+        horizon_months: int = 120,
+        simulations: int = 1000,
+        scenarios: Optional[List[Dict[str, Any]]] = None,
+        percentiles: Optional[List[int]] = None,
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Proyección Monte-Carlo del saldo total desde el próximo mes.
+
+        ``scenarios`` es una lista de supuestos (``name``, ``income_change``,
+        ``expense_change``, ``extra_debt_payment``, ``rate_shift``); siempre se
+        incluye el escenario ``base`` sin cambios. La volatilidad sale de los
+        últimos 12 meses cerrados.
+        """
+
+        if not NUMPY_AVAILABLE:
+            return {"error": "La proyección requiere NumPy instalado."}
+        if not 1 <= horizon_months <= MAX_HORIZON_MONTHS:
+            return {"error": f"El horizonte debe estar entre 1 y {MAX_HORIZON_MONTHS} meses."}
+        if not 0 <= simulations <= MAX_SIMULATIONS:
+            return {"error": f"Las simulaciones deben estar entre 0 y {MAX_SIMULATIONS}."}
+        percentiles = sorted(set(percentiles or [10, 50, 90]))
+        if any(not 0 <= value <= 100 for value in percentiles):
+            return {"error": "Los percentiles deben estar entre 0 y 100."}
+
+        try:
+            scenario_list = [Scenario("base")] + [
+                Scenario(
+                    name=str(item.get("name") or f"escenario_{index}"),
+                    income_change=float(item.get("income_change") or 0),
+                    expense_change=float(item.get("expense_change") or 0),
+                    extra_debt_payment=float(item.get("extra_debt_payment") or 0),
+                    rate_shift=float(item.get("rate_shift") or 0),
+                )
+                for index, item in enumerate(scenarios or [], start=1)
+            ]
+        except (TypeError, ValueError) as e:
+            return {"error": f"Escenario inválido: {e}"}
+        if len({scenario.name for scenario in scenario_list}) != len(scenario_list):
+            return {"error": "Los nombres de los escenarios deben ser únicos."}
+
+        today = datetime.date.today()
+        first_month = today.replace(day=1) + relativedelta(months=1)
+        history = (
+            today.replace(day=1) - relativedelta(months=12),
+            today.replace(day=1) - datetime.timedelta(days=1),
+        )
+        flows = fold_breakdown(*history, {"flows": MonthlyIncomeExpense("Ingreso")})["flows"]
+        nets = [income - expense for _, income, expense in flows]
+        inputs = self._compile_projection_inputs(
+            first_month,
+            horizon_months,
+            history,
+            sum(nets) / 12,
+            statistics.pstdev(nets) if len(nets) > 1 else 0.0,
+        )
+
+        results = simulate(inputs, scenario_list, simulations, percentiles, seed)
+        return {
+            "start_month": first_month.strftime("%Y-%m"),
+            "horizon_months": horizon_months,
+            "simulations": simulations,
+            "starting_balance": inputs.cash_balance + float(inputs.savings_balances.sum()),
+            "net_volatility": inputs.net_volatility,
+            "scenarios": [
+                {
+                    **scenario._asdict(),
+                    "debt_free_month": self._projection_label(
+                        first_month, results[scenario.name].debt_free_month
+                    ),
+                    "points": self._projection_points(first_month, results[scenario.name]),
+                }
+                for scenario in scenario_list
+            ],
+        }
+
+    def _average_modeled_debt_payments(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> float:
+        """Pago mensual promedio del período a deudas con pago mínimo activo."""
+
+        months = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+        total = (
+            Transaction.select(fn.SUM(fn.ABS(Transaction.amount)))
+            .join(Debt, on=(Transaction.debt == Debt.id))
+            .where(
+                Transaction.date.between(start_date, end_date)
+                & (Transaction.is_transfer == False)
+                & (Debt.current_balance > 0)
+                & (Debt.minimum_payment > 0)
+            )
+            .scalar()
+        )
+        return float(total or 0) / max(months, 1)
+
+    @staticmethod
+    def _projection_label(first_month: datetime.date, offset: Optional[int]) -> Optional[str]:
+        if offset is None:
+            return None
+        month = first_month + relativedelta(months=offset)
+        return f"{MONTH_LABELS[month.month]} {month.year}"
+
+    def _projection_points(
+        self, first_month: datetime.date, result: ScenarioResult
+    ) -> List[Dict[str, Any]]:
+        """Convierte un resultado de ``simulate`` en puntos mensuales para el gráfico."""
+
+        points = []
+        for offset, balance in enumerate(result.expected.tolist()):
+            point = {
+                "label": self._projection_label(first_month, offset),
+                "balance": balance,
+                "debt": float(result.expected_debt[offset]),
+            }
+            for percentile, values in result.bands.items():
+                point[f"p{percentile}"] = float(values[offset])
+            points.append(point)
+        return points
+
+    def _compile_projection_inputs(
+        self,
+        first_month: datetime.date,
+        horizon_months: int,
+        history: Tuple[datetime.date, datetime.date],
+        history_net: float,
+        net_volatility: float,
+    ) -> ProjectionInputs:
+        """Compila reglas, presupuestos, deudas y cuentas en vectores mensuales.
+
+        Los presupuestos vinculados a una deuda se omiten (los cubre la
+        amortización) y también los que repiten el tipo y categoría de una
+        regla recurrente. Si no hay reglas ni presupuestos recurrentes, la base
+        es el flujo neto histórico de ``history`` (inicio, fin), sin los pagos
+        a deudas que ya amortiza el modelo; los presupuestos de única vez se
+        suman encima.
+        """
+
+        horizon_end = first_month + relativedelta(months=horizon_months)
+        flows: Dict[bool, Tuple[List[int], List[float]]] = {True: ([], []), False: ([], [])}
+        has_recurring_plan = False
+
+        def offset(day: datetime.date) -> int:
+            return (day.year - first_month.year) * 12 + day.month - first_month.month
+
+        def add(day: datetime.date, amount: float, kind: str) -> None:
+            offsets, amounts = flows[self._normalize_label(kind) == "ingreso"]
+            offsets.append(offset(day))
+            amounts.append(abs(float(amount or 0)))
+
+        recurring_keys = set()
+        for rule in RecurringTransaction.select():
+            recurring_keys.add((rule.type, rule.category))
+            anchor = rule.last_processed_date or rule.start_date
+            if rule.frequency == "Anual":
+                step, per_step = relativedelta(years=1), 1
+            else:
+                step, per_step = relativedelta(months=1), 2 if rule.frequency == "Quincenal" else 1
+            occurrence = anchor + step
+            while occurrence < horizon_end:
+                if occurrence >= first_month:
+                    has_recurring_plan = True
+                    for _ in range(per_step):
+                        add(occurrence, rule.amount, rule.type)
+                occurrence += step
+
+        last_day = horizon_end - datetime.timedelta(days=1)
+        budget_entries = list(BudgetEntry.select().where(BudgetEntry.debt.is_null()))
+        anchors = series_anchors(budget_entries)
+        for entry in budget_entries:
+            if (entry.type, entry.category) in recurring_keys:
+                continue
+            if not entry.is_recurring or self._frequency_delta(entry.frequency) is None:
+                day = self._coerce_date(entry.due_date) or self._coerce_date(entry.start_date)
+                if day and first_month <= day < horizon_end:
+                    add(day, entry.budgeted_amount, entry.type)
+                continue
+            for occurrence in occurrence_starts(entry, first_month, last_day, anchors):
+                has_recurring_plan = True
+                add(occurrence, entry.budgeted_amount, entry.type)
+
+        cash_balance = 0.0
+        savings = []
+        for account in Account.select():
+            balance = float(account.current_balance or 0)
+            rate = float(getattr(account, "annual_interest_rate", 0) or 0)
+            if rate > 0 and self._is_savings_account_type(account.account_type):
+                savings.append(
+                    (
+                        balance,
+                        rate,
+                        self._months_per_compounding_period(account.compounding_frequency),
+                    )
+                )
+            else:
+                cash_balance += balance
+
+        debts = [
+            (
+                float(debt.current_balance),
+                float(debt.interest_rate or 0),
+                float(debt.minimum_payment or 0),
+            )
+            for debt in Debt.select().where(Debt.current_balance > 0)
+        ]
+
+        income = schedule_vector(*flows[True], horizon_months)
+        expense = schedule_vector(*flows[False], horizon_months)
+        if not has_recurring_plan:
+            baseline = history_net + self._average_modeled_debt_payments(*history)
+            income += max(baseline, 0.0)
+            expense += max(-baseline, 0.0)
+
+        savings_balances, savings_rates, savings_periods = as_columns(savings, 3)
+        debt_balances, debt_rates, debt_payments = as_columns(debts, 3)
+        return ProjectionInputs(
+            income=income,
+            expense=expense,
+            cash_balance=cash_balance,
+            savings_balances=savings_balances,
+            savings_rates=savings_rates,
+            savings_periods=savings_periods,
+            debt_balances=debt_balances,
+            debt_rates=debt_rates,
+            debt_payments=debt_payments,
+            net_volatility=net_volatility,
+        )
+
 
     # =================================================================
     # --- SECCIÓN: CUENTAS (Accounts) ---
@@ -1296,10 +1763,11 @@ class AppController:
                 next_due_date = start_from + relativedelta(years=1)
 
             if next_due_date and next_due_date <= today:
-                Transaction.create(
+                recurring = Transaction.create(
                     date=next_due_date, description=rule.description, amount=rule.amount,
                     type=rule.type, category=rule.category, account=first_account,
                 )
+                self._sync_transaction_aggregates([recurring.id])
                 
                 if rule.type == "Ingreso":
                     first_account.current_balance += rule.amount
@@ -1316,105 +1784,339 @@ class AppController:
     # --- SECCIÓN: TRANSACCIONES (Transactions) ---
     # =================================================================
 
+    # Ordenamientos soportados: campo de ordenamiento y si es descendente.
+    _TRANSACTION_SORTS = {
+        "date_desc": ("date", True),
+        "date_asc": ("date", False),
+        "amount_desc": ("amount", True),
+        "amount_asc": ("amount", False),
+        "relevance": ("score", False),
+    }
+
+    def _search_text(self) -> List[Any]:
+        """Descripción, categorías (con divisiones) y etiquetas de la transacción.
+
+        Es el mismo texto que indexa ``transaction_search``.
+        """
+
+        split_categories = (
+            TransactionSplit.select(fn.group_concat(TransactionSplit.category, ' '))
+            .where(TransactionSplit.transaction == Transaction.id)
+        )
+        tag_names = (
+            TransactionTag.select(fn.group_concat(Tag.name, ' '))
+            .join(Tag)
+            .where(TransactionTag.transaction == Transaction.id)
+        )
+        return [Transaction.description, Transaction.category, split_categories, tag_names]
+
+    def _apply_transaction_filters(self, query, filters: Optional[Dict[str, Any]]):
+        """Aplica los filtros de la vista de transacciones a una consulta.
+
+        Devuelve la consulta y, si hay búsqueda de texto, la columna con la
+        relevancia (bm25, menor es mejor) para poder ordenar por ella. La
+        búsqueda exige que cada palabra sea el prefijo de una palabra del
+        texto, sin distinguir acentos, con o sin índice FTS5 (ver
+        ``app.database.search``).
+        """
+
+        search_score = None
+        if not filters:
+            return query, search_score
+
+        tokens = search_tokens(filters.get('search'))
+        if tokens and not search_index.available:
+            # Sin el módulo FTS5 no hay índice; se aplica la misma regla en Python.
+            query = query.where(
+                fn.search_prefix_match(' '.join(tokens), *self._search_text())
+            )
+        elif tokens:
+            matches = (
+                TransactionSearch.select(
+                    TransactionSearch.rowid,
+                    TransactionSearch.rank().alias('score'),
+                )
+                .where(TransactionSearch.match(fts_expression(tokens)))
+                .alias('search_match')
+            )
+            query = query.join(matches, on=(Transaction.id == matches.c.rowid))
+            search_score = matches.c.score
+        if filters.get('start_date'):
+            query = query.where(Transaction.date >= filters['start_date'])
+        if filters.get('end_date'):
+            query = query.where(Transaction.date <= filters['end_date'])
+        if filters.get('type'):
+            query = query.where(Transaction.type == filters['type'])
+        if filters.get('category'):
+            category_value = filters['category']
+            split_match = (
+                TransactionSplit.select(TransactionSplit.transaction_id)
+                .where(TransactionSplit.category == category_value)
+            )
+            query = query.where(
+                (Transaction.category == category_value)
+                | (Transaction.id.in_(split_match))
+            )
+        if filters.get('tags'):
+            tags = [tag for tag in filters['tags'] if tag]
+            if tags:
+                tag_match = (
+                    TransactionTag.select(TransactionTag.transaction_id)
+                    .join(Tag)
+                    .where(Tag.name.in_(tags))
+                )
+                query = query.where(Transaction.id.in_(tag_match))
+        return query, search_score
+
+    def _resolve_transaction_sort(self, sort_by: Optional[str]) -> Tuple[str, str, bool]:
+        """Devuelve (clave, campo, descendente) para un ordenamiento solicitado."""
+
+        key = sort_by if sort_by in self._TRANSACTION_SORTS else "date_desc"
+        field_name, descending = self._TRANSACTION_SORTS[key]
+        return key, field_name, descending
+
+    @staticmethod
+    def _encode_transaction_cursor(sort_key: str, value: Any, transaction_id: int) -> str:
+        """Codifica la posición de la última fila de una página como cursor opaco."""
+
+        if isinstance(value, datetime.date):
+            value = value.isoformat()
+        raw = json.dumps({"s": sort_key, "v": value, "i": transaction_id}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _decode_transaction_cursor(cursor: str, sort_key: str, field_name: str) -> Tuple[Any, int]:
+        """Decodifica un cursor y valida que corresponda al ordenamiento actual."""
+
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            if payload["s"] != sort_key:
+                raise ValueError("el cursor pertenece a otro ordenamiento")
+            transaction_id = int(payload["i"])
+            if field_name == "date":
+                value = datetime.date.fromisoformat(payload["v"])
+            else:
+                value = float(payload["v"])
+        except (TypeError, ValueError, KeyError, json.JSONDecodeError, UnicodeError) as exc:
+            raise ValueError(f"Cursor inválido: {exc}")
+        return value, transaction_id
+
     def get_transactions_data(self, filters=None):
-        query = Transaction.select()
+        """Lista transacciones filtradas.
 
-        if filters:
-            if filters.get('search'):
-                query = query.where(Transaction.description.contains(filters['search']))
-            if filters.get('start_date'):
-                query = query.where(Transaction.date >= filters['start_date'])
-            if filters.get('end_date'):
-                query = query.where(Transaction.date <= filters['end_date'])
-            if filters.get('type'):
-                query = query.where(Transaction.type == filters['type'])
-            if filters.get('category'):
-                category_value = filters['category']
-                split_match = (
-                    TransactionSplit.select(TransactionSplit.transaction_id)
-                    .where(TransactionSplit.category == category_value)
+        Sin ``limit`` devuelve la lista completa (comportamiento histórico).
+        Con ``limit`` pagina por conjunto de claves sobre ``(fecha, id)``,
+        ``(monto, id)`` o ``(relevancia, id)`` y devuelve ``items``, ``next_cursor`` y, si se pide
+        ``include_total``, el total de coincidencias calculado aparte.
+        """
+
+        filters = filters or {}
+        base_query, search_score = self._apply_transaction_filters(
+            Transaction.select(), filters
+        )
+
+        sort_by = filters.get('sort_by')
+        if sort_by == 'relevance' and search_score is None:
+            sort_by = 'date_desc'
+        sort_key, field_name, descending = self._resolve_transaction_sort(sort_by)
+        if field_name == 'score':
+            sort_field = search_score
+        else:
+            sort_field = getattr(Transaction, field_name)
+
+        if descending:
+            query = base_query.order_by(sort_field.desc(), Transaction.id.desc())
+        else:
+            query = base_query.order_by(sort_field.asc(), Transaction.id.asc())
+
+        limit = filters.get('limit')
+        if not limit:
+            return self._load_transaction_rows(query)
+
+        cursor = filters.get('cursor')
+        if cursor:
+            try:
+                last_value, last_id = self._decode_transaction_cursor(
+                    cursor, sort_key, field_name
                 )
+            except ValueError as exc:
+                return {"error": str(exc)}
+
+            if descending:
                 query = query.where(
-                    (Transaction.category == category_value)
-                    | (Transaction.id.in_(split_match))
+                    (sort_field < last_value)
+                    | ((sort_field == last_value) & (Transaction.id < last_id))
                 )
-            if filters.get('tags'):
-                tags = [tag for tag in filters['tags'] if tag]
-                if tags:
-                    tag_match = (
-                        TransactionTag.select(TransactionTag.transaction_id)
-                        .join(Tag)
-                        .where(Tag.name.in_(tags))
-                    )
-                    query = query.where(Transaction.id.in_(tag_match))
-
-            sort_by = filters.get('sort_by', 'date_desc')
-            if sort_by == 'date_asc':
-                query = query.order_by(Transaction.date.asc(), Transaction.id.asc())
-            elif sort_by == 'amount_desc':
-                query = query.order_by(Transaction.amount.desc(), Transaction.id.desc())
-            elif sort_by == 'amount_asc':
-                query = query.order_by(Transaction.amount.asc(), Transaction.id.asc())
             else:
-                query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
-        else:
-            query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
+                query = query.where(
+                    (sort_field > last_value)
+                    | ((sort_field == last_value) & (Transaction.id > last_id))
+                )
+
+        limit = int(limit)
+        rows = self._load_transaction_rows(query.limit(limit + 1))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more and rows:
+            last_row = rows[-1]
+            if field_name == 'score':
+                last_value = (
+                    base_query.select(search_score)
+                    .where(Transaction.id == last_row["id"])
+                    .scalar()
+                )
+            else:
+                last_value = last_row[field_name]
+            next_cursor = self._encode_transaction_cursor(
+                sort_key, last_value, last_row["id"]
+            )
+
+        total = base_query.count() if filters.get('include_total') else None
+
+        return {
+            "items": rows,
+            "next_cursor": next_cursor,
+            "total": total,
+        }
+
+    def _load_transaction_rows(self, query) -> List[Dict[str, Any]]:
+        """Serializa transacciones con un número fijo de consultas.
+
+        Sin importar cuántas filas devuelva ``query`` se ejecutan a lo sumo
+        siete sentencias: la principal sobre ``transaction`` y lecturas por
+        lote (``IN``) de cuentas, metas, deudas, presupuestos, splits y
+        etiquetas. Las relaciones no se unen con JOIN en la consulta principal
+        para que SQLite siga usando el índice del ordenamiento al paginar. Los
+        diccionarios se construyen directamente desde tuplas.
+        """
+
+        rows = list(
+            query.select(
+                Transaction.id,
+                Transaction.date,
+                Transaction.description,
+                Transaction.amount,
+                Transaction.type,
+                Transaction.category,
+                Transaction.account,
+                Transaction.goal,
+                Transaction.debt,
+                Transaction.budget_entry,
+                Transaction.is_transfer,
+                Transaction.transfer_account,
+            ).tuples()
+        )
+        if not rows:
+            return []
+
+        account_ids = {row[6] for row in rows} | {row[11] for row in rows if row[11]}
+        account_fields = list(Account._meta.sorted_fields)
+        account_names = [field.name for field in account_fields]
+        accounts = {
+            values[0]: dict(zip(account_names, values))
+            for values in Account.select(*account_fields)
+            .where(Account.id.in_(list(account_ids)))
+            .tuples()
+        }
+
+        def _names_by_id(model, name_field, index):
+            ids = {row[index] for row in rows if row[index]}
+            if not ids:
+                return {}
+            return dict(
+                model.select(model.id, name_field)
+                .where(model.id.in_(list(ids)))
+                .tuples()
+            )
+
+        goal_names = _names_by_id(Goal, Goal.name, 7)
+        debt_names = _names_by_id(Debt, Debt.name, 8)
+        budget_names = _names_by_id(BudgetEntry, BudgetEntry.description, 9)
+
+        # Los ids ya leídos viajan como un solo parámetro JSON: la consulta
+        # filtrada no se repite y no se topa con el límite de parámetros.
+        ids_query = SQL("(SELECT value FROM json_each(?))", [json.dumps([row[0] for row in rows])])
+
+        splits_by_transaction: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        split_rows = (
+            TransactionSplit.select(
+                TransactionSplit.transaction,
+                TransactionSplit.category,
+                TransactionSplit.amount,
+            )
+            .where(TransactionSplit.transaction.in_(ids_query))
+            .order_by(TransactionSplit.id)
+            .tuples()
+        )
+        for transaction_id, category, amount in split_rows:
+            splits_by_transaction[transaction_id].append(
+                {"category": category, "amount": float(amount or 0)}
+            )
 
-        transactions = self._prefetch_transactions(query)
+        tags_by_transaction: Dict[int, List[str]] = defaultdict(list)
+        tag_rows = (
+            TransactionTag.select(TransactionTag.transaction, Tag.name)
+            .join(Tag)
+            .where(TransactionTag.transaction.in_(ids_query))
+            .order_by(TransactionTag.id)
+            .tuples()
+        )
+        for transaction_id, tag_name in tag_rows:
+            tags_by_transaction[transaction_id].append(tag_name)
 
         results = []
-        for transaction in transactions:
-            account = transaction.account
-            splits = [
+        for (
+            transaction_id,
+            date_value,
+            description,
+            amount,
+            transaction_type,
+            category,
+            account_id,
+            goal_id,
+            debt_id,
+            budget_entry_id,
+            is_transfer,
+            transfer_account_id,
+        ) in rows:
+            goal_id = goal_id if goal_id in goal_names else None
+            debt_id = debt_id if debt_id in debt_names else None
+            budget_entry_id = budget_entry_id if budget_entry_id in budget_names else None
+            transfer_account = accounts.get(transfer_account_id)
+
+            results.append(
                 {
-                    "category": split.category,
-                    "amount": float(split.amount or 0),
+                    "id": transaction_id,
+                    "date": date_value.isoformat(),
+                    "description": description,
+                    "amount": float(amount or 0),
+                    "type": transaction_type,
+                    "category": category,
+                    "account_id": account_id,
+                    "account": accounts.get(account_id),
+                    "goal_id": goal_id,
+                    "goal_name": goal_names.get(goal_id),
+                    "debt_id": debt_id,
+                    "debt_name": debt_names.get(debt_id),
+                    "budget_entry_id": budget_entry_id,
+                    "budget_entry_name": budget_names.get(budget_entry_id),
+                    "is_transfer": bool(is_transfer),
+                    "transfer_account_id": transfer_account["id"] if transfer_account else None,
+                    "transfer_account_name": transfer_account["name"] if transfer_account else None,
+                    "splits": splits_by_transaction.get(transaction_id, []),
+                    "tags": tags_by_transaction.get(transaction_id, []),
                 }
-                for split in getattr(transaction, 'splits', [])
-            ]
-            tags = [
-                link.tag.name
-                for link in getattr(transaction, 'tag_links', [])
-                if link.tag is not None
-            ]
-            transfer_account = getattr(transaction, 'transfer_account', None)
-
-            transaction_data = {
-                "id": transaction.id,
-                "date": transaction.date.isoformat(),
-                "description": transaction.description,
-                "amount": float(transaction.amount or 0),
-                "type": transaction.type,
-                "category": transaction.category,
-                "account_id": transaction.account_id,
-                "account": account.__data__ if account else None,
-                "goal_id": transaction.goal.id if transaction.goal else None,
-                "goal_name": transaction.goal.name if transaction.goal else None,
-                "debt_id": transaction.debt.id if transaction.debt else None,
-                "debt_name": transaction.debt.name if transaction.debt else None,
-                "budget_entry_id": transaction.budget_entry.id
-                if getattr(transaction, "budget_entry", None)
-                else None,
-                "budget_entry_name": transaction.budget_entry.description
-                if getattr(transaction, "budget_entry", None)
-                else None,
-                "is_transfer": bool(transaction.is_transfer),
-                "transfer_account_id": getattr(transfer_account, 'id', None),
-                "transfer_account_name": getattr(transfer_account, 'name', None),
-                "splits": splits,
-                "tags": tags,
-            }
-            results.append(transaction_data)
+            )
         return results
 
 
     def get_all_tags(self) -> List[Dict[str, Any]]:
         """Devuelve todas las etiquetas disponibles ordenadas alfabéticamente."""
 
-        return [
-            {"id": tag.id, "name": tag.name}
-            for tag in Tag.select().order_by(Tag.name.asc())
-        ]
+        return [{"id": tag_id, "name": name} for name, tag_id in tag_dictionary.items()]
 
 
     def get_recurring_transactions(self):
@@ -1544,6 +2246,51 @@ class AppController:
         entry.actual_amount = new_value
         entry.save()
 
+    def _normalize_transaction_payload(
+        self, data: Dict[str, Any], splits_payload: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Valida y normaliza en sitio el payload de una transacción.
+
+        Deja el monto como float, los ids de meta, deuda y presupuesto como
+        enteros o None y aplica las reglas de las transferencias. Devuelve el
+        mensaje de error, o None si el payload es válido.
+        """
+
+        amount = float(data['amount'])
+        if amount <= 0:
+            return "El monto debe ser mayor a cero."
+        data['amount'] = amount
+
+        if splits_payload:
+            total_splits = sum(split['amount'] for split in splits_payload)
+            if abs(total_splits - amount) > 0.01:
+                return "La suma de las divisiones debe coincidir con el monto total."
+            data['category'] = data.get('category') or 'Múltiples categorías'
+
+        is_transfer = bool(data.get('is_transfer'))
+        transfer_account_value = data.get('transfer_account_id')
+
+        if is_transfer:
+            if not transfer_account_value:
+                return "Selecciona la cuenta de destino de la transferencia."
+            if int(transfer_account_value) == int(data['account_id']):
+                return "La cuenta de origen y destino deben ser diferentes."
+            data['type'] = 'Transferencia'
+            data['category'] = data.get('category') or 'Transferencia interna'
+            data['is_transfer'] = True
+            data['transfer_account_id'] = int(transfer_account_value)
+            data['goal_id'] = None
+            data['debt_id'] = None
+            data['budget_entry_id'] = None
+            return None
+
+        data['is_transfer'] = False
+        data['transfer_account_id'] = None
+        for field in ('goal_id', 'debt_id', 'budget_entry_id'):
+            value = data.get(field)
+            data[field] = int(value) if value not in (None, "", 0) else None
+        return None
+
     def add_transaction(self, data):
         try:
             is_recurring = data.pop('is_recurring', False)
@@ -1553,43 +2300,16 @@ class AppController:
             splits_payload = self._prepare_splits(data.pop('splits', None))
             tags_payload = self._sanitize_tags(data.pop('tags', None))
 
-            amount = float(data['amount'])
-            if amount <= 0:
-                return {"error": "El monto debe ser mayor a cero."}
-
-            if splits_payload:
-                total_splits = sum(split['amount'] for split in splits_payload)
-                if abs(total_splits - amount) > 0.01:
-                    return {"error": "La suma de las divisiones debe coincidir con el monto total."}
-                data['category'] = data.get('category') or 'Múltiples categorías'
-
-            is_transfer = bool(data.get('is_transfer'))
-            transfer_account_value = data.get('transfer_account_id')
-
-            if is_transfer:
-                if not transfer_account_value:
-                    return {"error": "Selecciona la cuenta de destino de la transferencia."}
-                if int(transfer_account_value) == int(data['account_id']):
-                    return {"error": "La cuenta de origen y destino deben ser diferentes."}
-                data['type'] = 'Transferencia'
-                data['category'] = data.get('category') or 'Transferencia interna'
-                data['goal_id'] = None
-                data['debt_id'] = None
-                data['budget_entry_id'] = None
-            else:
-                data['is_transfer'] = False
-                data['transfer_account_id'] = None
-
-            goal_value = data.get('goal_id')
-            debt_value = data.get('debt_id')
-            goal_id = int(goal_value) if goal_value not in (None, "", 0) else None
-            debt_id = int(debt_value) if debt_value not in (None, "", 0) else None
-            data['goal_id'] = goal_id
-            data['debt_id'] = debt_id
+            error = self._normalize_transaction_payload(data, splits_payload)
+            if error:
+                return {"error": error}
 
-            budget_value = data.get('budget_entry_id')
-            budget_entry_id = int(budget_value) if budget_value not in (None, "", 0) else None
-            data['budget_entry_id'] = None if is_transfer else budget_entry_id
+            amount = data['amount']
+            is_transfer = data['is_transfer']
+            transfer_account_value = data['transfer_account_id']
+            goal_id = data['goal_id']
+            debt_id = data['debt_id']
+            budget_entry_id = data['budget_entry_id']
 
             with db.atomic():
                 account = Account.get_by_id(data['account_id'])
@@ -1626,6 +2346,7 @@ class AppController:
 
                 self._sync_transaction_splits(transaction, splits_payload)
                 self._sync_transaction_tags(transaction, tags_payload)
+                self._sync_transaction_aggregates([transaction.id])
 
                 if is_recurring:
                     RecurringTransaction.create(
@@ -1643,47 +2364,96 @@ class AppController:
         except Exception as e:  # pylint: disable=broad-except
             return {"error": f"Datos inválidos: {e}"}
 
+    def import_transactions(
+        self,
+        records: Iterable[Tuple[int, Dict[str, Any]]],
+        validate: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """Importa en bloque las transacciones de un extracto bancario.
+
+        ``records`` produce pares (línea, registro) y ``validate`` aplica a
+        cada registro las reglas del API. Después cada fila pasa por las
+        mismas normalizaciones que ``add_transaction``. Las filas inválidas
+        se omiten y se reportan con su línea. Las válidas se insertan por
+        lotes, y los saldos de cuentas, metas, deudas y presupuestos se
+        ajustan una sola vez al final. A diferencia del alta individual, una
+        transferencia no exige fondos suficientes, porque el extracto
+        registra movimientos que ya ocurrieron.
+        """
+
+        account_ids = {row[0] for row in Account.select(Account.id).tuples()}
+        references = {
+            'account_id': (account_ids, "La cuenta no existe."),
+            'transfer_account_id': (account_ids, "La cuenta de destino no existe."),
+            'goal_id': ({row[0] for row in Goal.select(Goal.id).tuples()}, "La meta no existe."),
+            'debt_id': ({row[0] for row in Debt.select(Debt.id).tuples()}, "La deuda no existe."),
+            'budget_entry_id': (
+                {row[0] for row in BudgetEntry.select(BudgetEntry.id).tuples()},
+                "La entrada de presupuesto no existe.",
+            ),
+        }
+
+        writer = TransactionBulkWriter()
+        imported = 0
+        rejected = 0
+        errors: List[Dict[str, Any]] = []
+        try:
+            with db.atomic():
+                for line, record in records:
+                    try:
+                        data = validate(record) if validate else dict(record)
+                        splits_payload = self._prepare_splits(data.pop('splits', None))
+                        tags_payload = self._sanitize_tags(data.pop('tags', None))
+                        error = self._normalize_transaction_payload(data, splits_payload)
+                        for field, (existing, message) in references.items():
+                            if error is None and data.get(field) is not None and int(data[field]) not in existing:
+                                error = message
+                    except (KeyError, TypeError, ValueError) as exc:
+                        error = str(exc)
+
+                    if error:
+                        rejected += 1
+                        if len(errors) < MAX_IMPORT_ERRORS:
+                            errors.append({"line": line, "error": error})
+                        continue
+
+                    imported += 1
+                    if not dry_run:
+                        writer.add(data, splits_payload, tags_payload)
+
+                ids = writer.finish()
+                if len(ids) > BULK_REBUILD_THRESHOLD:
+                    rebuild_monthly_rollup()
+                    rebuild_balance_snapshots()
+                    rebuild_daily_balances()
+                elif ids:
+                    self._sync_transaction_aggregates(ids)
+        except ValueError as exc:
+            return {"error": f"No se pudo leer el archivo: {exc}"}
+
+        return {
+            "imported": imported,
+            "rejected": rejected,
+            "errors": errors,
+            "dry_run": dry_run,
+        }
+
     def update_transaction(self, transaction_id, data):
         try:
             splits_payload = self._prepare_splits(data.pop('splits', None))
             tags_payload = self._sanitize_tags(data.pop('tags', None))
 
-            amount = float(data['amount'])
-            if amount <= 0:
-                return {"error": "El monto debe ser mayor a cero."}
-
-            if splits_payload:
-                total_splits = sum(split['amount'] for split in splits_payload)
-                if abs(total_splits - amount) > 0.01:
-                    return {"error": "La suma de las divisiones debe coincidir con el monto total."}
-                data['category'] = data.get('category') or 'Múltiples categorías'
-
-            is_transfer = bool(data.get('is_transfer'))
-            transfer_account_value = data.get('transfer_account_id')
-            if is_transfer:
-                if not transfer_account_value:
-                    return {"error": "Selecciona la cuenta de destino de la transferencia."}
-                if int(transfer_account_value) == int(data['account_id']):
-                    return {"error": "La cuenta de origen y destino deben ser diferentes."}
-                data['type'] = 'Transferencia'
-                data['category'] = data.get('category') or 'Transferencia interna'
-                data['goal_id'] = None
-                data['debt_id'] = None
-                data['budget_entry_id'] = None
-            else:
-                data['is_transfer'] = False
-                data['transfer_account_id'] = None
-
-            goal_value = data.get('goal_id')
-            debt_value = data.get('debt_id')
-            goal_id = int(goal_value) if goal_value not in (None, "", 0) else None
-            debt_id = int(debt_value) if debt_value not in (None, "", 0) else None
-            data['goal_id'] = goal_id
-            data['debt_id'] = debt_id
+            error = self._normalize_transaction_payload(data, splits_payload)
+            if error:
+                return {"error": error}
 
-            budget_value = data.get('budget_entry_id')
-            budget_entry_id = int(budget_value) if budget_value not in (None, "", 0) else None
-            data['budget_entry_id'] = None if is_transfer else budget_entry_id
+            amount = data['amount']
+            is_transfer = data['is_transfer']
+            transfer_account_value = data['transfer_account_id']
+            goal_id = data['goal_id']
+            debt_id = data['debt_id']
+            budget_entry_id = data['budget_entry_id']
 
             with db.atomic():
                 original_transaction = Transaction.get_by_id(transaction_id)
@@ -1738,11 +2508,13 @@ class AppController:
                         new_account.current_balance -= amount
                     new_account.save()
 
+                self._sync_transaction_aggregates([transaction_id], sign=-1)
                 Transaction.update(**data).where(Transaction.id == transaction_id).execute()
                 updated = Transaction.get_by_id(transaction_id)
 
                 self._sync_transaction_splits(updated, splits_payload)
                 self._sync_transaction_tags(updated, tags_payload)
+                self._sync_transaction_aggregates([transaction_id])
 
                 if not is_transfer:
                     if goal_id:
@@ -1788,11 +2560,176 @@ class AppController:
                     getattr(transaction, 'budget_entry_id', None),
                     -float(transaction.amount or 0),
                 )
-            transaction.delete_instance()
+            with db.atomic():
+                self._sync_transaction_aggregates([transaction.id], sign=-1)
+                transaction.delete_instance()
+                refresh_balance_snapshots()
             return {"success": True}
         except Transaction.DoesNotExist:
             return {"error": "La transacción no existe."}
         
+    def apply_transaction_batch(self, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Aplica en bloque altas, ediciones y borrados de transacciones.
+
+        Todas las operaciones corren en un mismo ``db.atomic()``, cada una en
+        su propio savepoint. Si una falla, sólo ella se revierte y su
+        resultado lleva el error. Cada operación sigue las reglas de
+        ``add_transaction``, ``update_transaction`` o ``delete_transaction``.
+        Los ajustes de cuentas, metas, deudas y presupuestos se acumulan por
+        id y cada fila afectada se escribe una sola vez al final, igual que
+        el rollup, los saldos diarios y los snapshots. Los fondos de una
+        transferencia se comprueban contra el saldo que dejan las operaciones
+        anteriores del lote.
+        """
+
+        if len(operations) > MAX_TRANSACTION_BATCH:
+            return {"error": f"El lote supera el máximo de {MAX_TRANSACTION_BATCH} operaciones."}
+
+        ledger = BalanceLedger()
+        stored_balances: Dict[int, Optional[float]] = {}
+
+        def balance_of(account_id: int, pending: BalanceLedger) -> Optional[float]:
+            if account_id not in stored_balances:
+                stored_balances[account_id] = (
+                    Account.select(Account.current_balance)
+                    .where(Account.id == account_id)
+                    .scalar()
+                    if Account.select().where(Account.id == account_id).exists()
+                    else None
+                )
+            stored = stored_balances[account_id]
+            if stored is None:
+                return None
+            return (
+                float(stored or 0)
+                + ledger.accounts.get(account_id, 0.0)
+                + pending.accounts.get(account_id, 0.0)
+            )
+
+        targeted = list(
+            dict.fromkeys(
+                int(operation["id"])
+                for operation in operations
+                if operation.get("op") in ("update", "delete") and operation.get("id") is not None
+            )
+        )
+        results: List[Dict[str, Any]] = []
+        created_ids: List[int] = []
+        with db.atomic():
+            existing = [
+                row[0]
+                for row in Transaction.select(Transaction.id)
+                .where(Transaction.id.in_(targeted))
+                .tuples()
+            ] if targeted else []
+            # Se retira una sola vez el aporte previo de las transacciones
+            # afectadas y al final se suma el estado resultante.
+            if existing:
+                self._sync_transaction_aggregates(existing, sign=-1)
+
+            for index, operation in enumerate(operations):
+                op = operation.get("op")
+                pending = BalanceLedger()
+                try:
+                    with db.atomic() as savepoint:
+                        outcome = self._apply_batch_operation(operation, pending, balance_of)
+                        if "error" in outcome:
+                            savepoint.rollback()
+                except Exception as e:  # pylint: disable=broad-except
+                    outcome = {"error": f"Datos inválidos: {e}"}
+
+                if "error" in outcome:
+                    results.append(
+                        {"index": index, "op": op, "id": operation.get("id"),
+                         "success": False, "error": outcome["error"]}
+                    )
+                    continue
+
+                ledger.merge(pending)
+                item = {"index": index, "op": op, "id": operation.get("id"), "success": True}
+                if op != "delete":
+                    item["id"] = outcome["id"]
+                    item["transaction"] = outcome
+                    if op == "create":
+                        created_ids.append(outcome["id"])
+                results.append(item)
+
+            ledger.apply()
+            survivors = [
+                row[0]
+                for row in Transaction.select(Transaction.id)
+                .where(Transaction.id.in_(existing))
+                .tuples()
+            ] if existing else []
+            if survivors or created_ids:
+                self._sync_transaction_aggregates(survivors + created_ids)
+            elif existing:
+                refresh_balance_snapshots()
+
+        succeeded = sum(1 for item in results if item["success"])
+        return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+    def _apply_batch_operation(
+        self,
+        operation: Dict[str, Any],
+        pending: BalanceLedger,
+        balance_of: Callable[[int, BalanceLedger], Optional[float]],
+    ) -> Dict[str, Any]:
+        """Ejecuta una operación del lote y anota sus ajustes en ``pending``."""
+
+        op = operation.get("op")
+        if op not in ("create", "update", "delete"):
+            return {"error": "Operación no soportada."}
+
+        transaction = None
+        if op != "create":
+            if operation.get("id") is None:
+                return {"error": "Falta el id de la transacción."}
+            transaction = Transaction.get_or_none(Transaction.id == int(operation["id"]))
+            if transaction is None:
+                return {"error": "La transacción no existe."}
+
+        if op == "delete":
+            pending.add(
+                ledger_fields(transaction), sign=-1, accounts=bool(operation.get("adjust_balance"))
+            )
+            transaction.delete_instance()
+            return {"success": True}
+
+        data = dict(operation.get("data") or {})
+        if not data:
+            return {"error": "Faltan los datos de la transacción."}
+        splits_payload = self._prepare_splits(data.pop('splits', None))
+        tags_payload = self._sanitize_tags(data.pop('tags', None))
+        error = self._normalize_transaction_payload(data, splits_payload)
+        if error:
+            return {"error": error}
+
+        if transaction is not None:
+            pending.add(ledger_fields(transaction), sign=-1)
+
+        balance = balance_of(int(data['account_id']), pending)
+        if balance is None:
+            return {"error": "La cuenta no existe."}
+        if data['is_transfer']:
+            if balance_of(data['transfer_account_id'], pending) is None:
+                return {"error": "La cuenta de destino no existe."}
+            if balance + 1e-9 < data['amount']:
+                return {
+                    "error": "La cuenta de origen no tiene fondos suficientes para transferir ese monto."
+                }
+
+        if transaction is None:
+            transaction = Transaction.create(**data)
+        else:
+            Transaction.update(**data).where(Transaction.id == transaction.id).execute()
+            transaction = Transaction.get_by_id(transaction.id)
+        pending.add(data)
+
+        self._sync_transaction_splits(transaction, splits_payload)
+        self._sync_transaction_tags(transaction, tags_payload)
+        return transaction.__data__
+
     def get_transaction_by_id(self, transaction_id):
         """Obtiene una única transacción por su ID con datos de la cuenta."""
         try:
@@ -2060,6 +2997,10 @@ class AppController:
                 new_name = updates["value"]
                 Transaction.update(type=new_name).where(Transaction.type == original_name).execute()
                 BudgetEntry.update(type=new_name).where(BudgetEntry.type == original_name).execute()
+                rebuild_monthly_rollup()
+                rebuild_balance_snapshots()
+                rebuild_daily_balances()
+                data_version.mark_rewrite()
 
         parameter = Parameter.get_by_id(parameter.id)
         return self._serialize_transaction_type(parameter)
@@ -2436,6 +3377,8 @@ class AppController:
                 new_value = updates["value"]
                 Transaction.update(category=new_value).where(Transaction.category == original_name).execute()
                 BudgetEntry.update(category=new_value).where(BudgetEntry.category == original_name).execute()
+                rebuild_monthly_rollup()
+                data_version.mark_rewrite()
 
         category = Parameter.get_by_id(category.id)
         parent = category.parent
@@ -2747,6 +3690,10 @@ class AppController:
     def delete_debt(self, debt_id):
         try:
             Transaction.update(debt=None).where(Transaction.debt == debt_id).execute()
+            BalanceSnapshot.delete().where(
+                (BalanceSnapshot.entity_type == DEBT) & (BalanceSnapshot.entity_id == debt_id)
+            ).execute()
+            delete_entity_daily_balances(DEBT, debt_id)
             Debt.get_by_id(debt_id).delete_instance()
             return {"success": True}
         except Debt.DoesNotExist:
@@ -2929,6 +3876,10 @@ class AppController:
             if frequency == "Única vez":
                 is_recurring = False
 
+            period_start, period_end = compute_period_bounds(
+                start_date, frequency, due_date, end_date
+            )
+
             goal_marker = data.get("goal_id", MISSING)
             debt_marker = data.get("debt_id", MISSING)
 
@@ -2967,6 +3918,8 @@ class AppController:
                 "is_recurring": is_recurring,
                 "goal": goal,
                 "debt": debt,
+                "period_start": period_start,
+                "period_end": period_end,
             }
         except (ValueError, KeyError) as e:
             raise ValueError(f"Datos de presupuesto inválidos: {e}")
@@ -2977,22 +3930,18 @@ class AppController:
         """Calculate the remaining planned funds as a virtual account."""
 
         reference = reference_date or datetime.date.today()
-        remaining_total = 0.0
-
-        for entry in BudgetEntry.select():
-            start, end = self._resolve_entry_bounds(entry)
-            if start > reference or end < reference:
-                continue
-
-            entry_type = (getattr(entry, "type", "") or "").strip().lower()
-            if entry_type == "ingreso":
-                continue
-
-            planned = float(getattr(entry, "budgeted_amount", 0) or 0)
-            actual = float(getattr(entry, "actual_amount", 0) or 0)
-            remaining = planned - actual
-            if remaining > 0:
-                remaining_total += remaining
+        remaining = fn.COALESCE(BudgetEntry.budgeted_amount, 0) - fn.COALESCE(
+            BudgetEntry.actual_amount, 0
+        )
+        remaining_total = (
+            BudgetEntry.select(fn.SUM(remaining))
+            .where(
+                self._budget_entries_overlapping(reference, reference)
+                & (fn.LOWER(fn.TRIM(fn.COALESCE(BudgetEntry.type, ""))) != "ingreso")
+                & (remaining > 0)
+            )
+            .scalar()
+        ) or 0.0
 
         return {
             "id": -1,
@@ -3096,14 +4045,148 @@ class AppController:
 
     def delete_budget_entry(self, entry_id):
         try:
+            entry = BudgetEntry.get_by_id(entry_id)
+            # El primer ciclo fija el calendario de toda la serie (ver
+            # ``series_anchors``); sin él los demás ciclos quedarían huérfanos.
+            later_cycles = BudgetEntry.select().where(
+                (BudgetEntry.series_id == entry.id) & (BudgetEntry.id != entry.id)
+            )
+            if later_cycles.exists():
+                return {
+                    "error": "No se puede eliminar el primer ciclo de un presupuesto "
+                    "recurrente mientras existan ciclos posteriores; elimínalos primero."
+                }
             Transaction.update(budget_entry=None).where(
                 Transaction.budget_entry == entry_id
             ).execute()
-            BudgetEntry.get_by_id(entry_id).delete_instance()
+            entry.delete_instance()
             return {"success": True}
         except BudgetEntry.DoesNotExist:
             return {"error": "La entrada de presupuesto no existe."}
 
+    def rollover_recurring_budgets(
+        self, today: Optional[datetime.date] = None
+    ) -> Dict[str, Any]:
+        """Genera las entradas de los ciclos vencidos de los presupuestos recurrentes.
+
+        Cada entrada recurrente cuyo periodo ya terminó se clona para todos los
+        ciclos transcurridos hasta el que contiene ``today``, en un solo lote.
+        Sólo el último ciclo queda marcado como recurrente, así la expansión
+        de ocurrencias no cuenta dos veces un mismo ciclo; los ciclos vencidos
+        quedan en la serie y se cuentan por su fecha de inicio. Las
+        transacciones ligadas pasan al ciclo que contiene su fecha, de modo que
+        los totales de cualquier periodo no cambian. La clave única (serie,
+        inicio de periodo) hace que repetir el proceso no duplique nada.
+        """
+
+        today = today or datetime.date.today()
+        expired = list(
+            BudgetEntry.select().where(
+                (BudgetEntry.is_recurring == True) & (BudgetEntry.period_end < today)
+            )
+        )
+        if not expired:
+            return {"created": 0, "series": 0}
+
+        # Los ciclos se calculan desde el inicio de la entrada original para
+        # que los fines de mes no se desplacen (31 ene -> 28 feb -> 31 mar).
+        series_ids = {entry.series_id for entry in expired if entry.series_id}
+        anchors = dict(
+            BudgetEntry.select(BudgetEntry.id, BudgetEntry.period_start)
+            .where(BudgetEntry.id.in_(list(series_ids)))
+            .tuples()
+        ) if series_ids else {}
+
+        columns = (
+            "description", "category", "type", "frequency", "budgeted_amount",
+            "start_date", "end_date", "due_date", "use_custom_schedule", "is_recurring",
+            "actual_amount", "goal_id", "debt_id", "period_start", "period_end", "series_id",
+        )
+        rows = []
+        rolled = []
+        for entry in expired:
+            frequency = self._normalize_frequency(entry.frequency)
+            if self._frequency_delta(frequency) is None:
+                continue
+            rolled.append(entry.id)
+            series_id = entry.series_id or entry.id
+            cycles_calendar = recurrence_calendar(
+                anchors.get(series_id) or entry.period_start, frequency
+            )
+            cycles = cycles_calendar.starts_between(
+                entry.period_start + datetime.timedelta(days=1), today
+            )
+            # Un vencimiento propio se conserva a la misma distancia del inicio
+            # de cada ciclo; si vencía al cierre, vence al cierre de cada ciclo.
+            due_date = self._coerce_date(entry.due_date)
+            due_offset = (
+                due_date - entry.period_start
+                if due_date and due_date < cycles_calendar.cycle_end(entry.period_start)
+                else None
+            )
+            for index, cycle_start in enumerate(cycles):
+                start, end = self._compute_period_bounds(
+                    cycle_start, frequency, None, cycles_calendar.cycle_end(cycle_start)
+                )
+                due = end if due_offset is None else min(cycle_start + due_offset, end)
+                rows.append(
+                    (
+                        entry.description, entry.category, entry.type, frequency,
+                        entry.budgeted_amount, start.isoformat(), end.isoformat(),
+                        due.isoformat(), int(bool(entry.use_custom_schedule)),
+                        int(index == len(cycles) - 1), 0.0, entry.goal_id, entry.debt_id,
+                        start.isoformat(), end.isoformat(), series_id,
+                    )
+                )
+
+        # Una sola sentencia preparada para todo el lote; la clave única
+        # descarta los ciclos que ya existen.
+        table = BudgetEntry._meta.table_name
+        with db.atomic():
+            changes_before = db.connection().total_changes
+            if rows:
+                db.cursor().executemany(
+                    f'INSERT OR IGNORE INTO "{table}" ({", ".join(columns)}) '
+                    f"VALUES ({', '.join('?' for _ in columns)})",
+                    rows,
+                )
+            created = db.connection().total_changes - changes_before
+            BudgetEntry.update(is_recurring=False).where(
+                BudgetEntry.id.in_([entry.id for entry in expired])
+            ).execute()
+            if rolled:
+                # La entrada original pasa a ser el primer ciclo de su serie.
+                BudgetEntry.update(
+                    series_id=fn.COALESCE(BudgetEntry.series_id, BudgetEntry.id)
+                ).where(BudgetEntry.id.in_(rolled)).execute()
+                reassign_series_actuals(rolled)
+
+        return {"created": created, "series": len(expired)}
+
+    def reconcile_budget_actuals(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Recalcula el monto ejecutado de todas las entradas desde sus transacciones.
+
+        Devuelve las entradas desviadas (valor guardado y esperado); con
+        ``dry_run`` sólo las informa sin corregirlas.
+        """
+
+        drift = reconcile_budget_actuals(dry_run=dry_run)
+        return {
+            "checked": BudgetEntry.select().count(),
+            "updated": 0 if dry_run else len(drift),
+            "dry_run": dry_run,
+            "drifted": [
+                {
+                    "id": item.entry_id,
+                    "description": item.description,
+                    "stored": item.stored,
+                    "expected": item.expected,
+                    "difference": item.stored - item.expected,
+                }
+                for item in drift
+            ],
+        }
+
     # =================================================================
     # --- SECCIÓN: PORTAFOLIO (Portfolio) ---
     # =================================================================
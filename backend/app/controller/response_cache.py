@@ -0,0 +1,126 @@
+"""LRU cache of rendered JSON responses, invalidated by the data version."""
+
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.database.data_version import data_version
+
+
+class CachedResponse(NamedTuple):
+    version: Tuple[int, str]
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    """Thread-safe LRU keyed by endpoint parameters, bounded by count and bytes.
+
+    Entries remember the data version (and calendar day, since several
+    sections are relative to today) they were rendered for; a stale entry is
+    simply recomputed on the next request.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def current_version() -> Tuple[int, str]:
+        return data_version.value, datetime.date.today().isoformat()
+
+    def get(self, key: Hashable, version: Tuple[int, str]) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: Tuple[int, str], body: bytes) -> CachedResponse:
+        etag = '"{}"'.format(hashlib.blake2b(body, digest_size=12).hexdigest())
+        entry = CachedResponse(version, etag, body)
+        if len(body) > self.max_bytes:
+            return entry
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.body)
+            self._entries[key] = entry
+            self._size += len(body)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def _render(key: Hashable, version: Tuple[int, str], content: Any) -> CachedResponse:
+    body = JSONResponse(content=jsonable_encoder(content)).body
+    return response_cache.put(key, version, body)
+
+
+def _respond(request: Request, entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if entry.etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def cached_json_response(
+    request: Request, key: Hashable, producer: Callable[[], Any]
+) -> Response:
+    """Serve ``producer()`` as JSON through the cache, answering 304 on a matching ETag."""
+
+    version = ResponseCache.current_version()
+    entry = response_cache.get(key, version)
+    if entry is None:
+        entry = _render(key, version, producer())
+    return _respond(request, entry)
+
+
+async def cached_json_response_async(
+    request: Request, key: Hashable, producer: Callable[[], Awaitable[Any]]
+) -> Response:
+    """Async variant of ``cached_json_response`` for coroutine producers."""
+
+    version = ResponseCache.current_version()
+    entry = response_cache.get(key, version)
+    if entry is None:
+        entry = _render(key, version, await producer())
+    return _respond(request, entry)
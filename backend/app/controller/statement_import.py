@@ -0,0 +1,295 @@
+"""Streaming parsers for bank statement files (CSV, OFX and QIF).
+
+Each parser reads its text stream incrementally and yields ``(line, record)``
+pairs, so a statement of any size is never held in memory. ``line`` is where
+the record ends (CSV) or starts (OFX, QIF) in the file, for error reports.
+``record`` is keyed like the transaction API payload (``date``,
+``description``, ``amount``, ``type``, ``category``...). Only the
+format-specific conversions happen here: date layouts, decimal separators and
+signed amounts. Validation is left to the caller, so imported rows obey the
+same rules as ``POST /api/transactions``.
+
+Statement amounts are signed. A row without an explicit type becomes an
+``Ingreso`` when positive and a ``Gasto Variable`` when negative; the stored
+amount is always positive.
+"""
+
+import csv
+import datetime
+import itertools
+import os
+import re
+import unicodedata
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple
+
+STATEMENT_FORMATS = ("csv", "ofx", "qif")
+
+INCOME_TYPE = "Ingreso"
+EXPENSE_TYPE = "Gasto Variable"
+INCOME_CATEGORY = "Otros Ingresos"
+EXPENSE_CATEGORY = "Otros Gastos"
+
+# Same limit as TransactionModel.description; bank memos are clipped to fit.
+MAX_DESCRIPTION_LENGTH = 100
+
+StatementRecord = Tuple[int, Dict[str, Any]]
+
+_CSV_COLUMNS = {
+    "date": ("date", "fecha"),
+    "description": ("description", "descripcion", "concepto", "detalle", "memo", "payee"),
+    "amount": ("amount", "monto", "importe", "valor"),
+    "type": ("type", "tipo"),
+    "category": ("category", "categoria"),
+    "account_id": ("account_id", "cuenta_id"),
+    "goal_id": ("goal_id", "meta_id"),
+    "debt_id": ("debt_id", "deuda_id"),
+    "budget_entry_id": ("budget_entry_id", "presupuesto_id"),
+    "is_transfer": ("is_transfer", "transferencia"),
+    "transfer_account_id": ("transfer_account_id", "cuenta_destino_id"),
+    "tags": ("tags", "etiquetas"),
+}
+_CSV_REQUIRED = ("date", "amount")
+_TAG_SEPARATORS = re.compile(r"[;|]")
+
+_OFX_ELEMENT = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+_OFX_READ_SIZE = 64 * 1024
+
+# QIF sections that hold bank-style transactions; the rest (!Account,
+# !Type:Cat, !Type:Invst...) use other record layouts and are skipped.
+_QIF_TRANSACTION_SECTIONS = {"bank", "cash", "ccard", "oth a", "oth l"}
+
+_SLASHED_DATE = re.compile(r"^(\d{1,2})[/.\-](\d{1,2})[/.\-'](\d{2,4})$")
+
+
+class StatementFormatError(ValueError):
+    """The file cannot be read as the requested statement format."""
+
+
+def detect_statement_format(filename: Optional[str]) -> Optional[str]:
+    """Statement format implied by a file name's extension, if any."""
+
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension == "qfx":
+        return "ofx"
+    return extension if extension in STATEMENT_FORMATS else None
+
+
+def iter_statement_records(
+    stream: TextIO, statement_format: str, account_id: Optional[int] = None
+) -> Iterator[StatementRecord]:
+    """Yield the records of a statement in the given format.
+
+    Records without an account of their own (OFX and QIF never have one)
+    are assigned ``account_id``.
+    """
+
+    parsers = {"csv": _iter_csv, "ofx": _iter_ofx, "qif": _iter_qif}
+    parser = parsers.get((statement_format or "").lower())
+    if parser is None:
+        raise StatementFormatError(
+            f"Formato no soportado: {statement_format}. Usa {', '.join(STATEMENT_FORMATS)}."
+        )
+    for line, record in parser(stream):
+        if account_id is not None:
+            record.setdefault("account_id", account_id)
+        yield line, record
+
+
+def _normalize_header(name: str) -> str:
+    ascii_name = (
+        unicodedata.normalize("NFD", name or "").encode("ascii", "ignore").decode("ascii")
+    )
+    return re.sub(r"[\s\-]+", "_", ascii_name.strip().lower())
+
+
+def _parse_amount(raw: str) -> Any:
+    """Signed float from a statement amount, or ``raw`` when it is not one.
+
+    Accepts currency symbols, ``(1.234,56)`` style negatives and either
+    decimal separator: with both present the last one is the decimal mark,
+    and a lone comma is decimal when followed by one or two digits.
+    """
+
+    text = (raw or "").strip()
+    negative = text.startswith("(") and text.endswith(")")
+    cleaned = re.sub(r"[^\d,.\-+]", "", text)
+    if "," in cleaned and "." in cleaned:
+        if cleaned.rfind(",") > cleaned.rfind("."):
+            cleaned = cleaned.replace(".", "").replace(",", ".")
+        else:
+            cleaned = cleaned.replace(",", "")
+    elif "," in cleaned:
+        decimals = cleaned.rpartition(",")[2]
+        if cleaned.count(",") == 1 and len(decimals) in (1, 2):
+            cleaned = cleaned.replace(",", ".")
+        else:
+            cleaned = cleaned.replace(",", "")
+    try:
+        value = float(cleaned)
+    except ValueError:
+        return raw
+    return -abs(value) if negative else value
+
+
+def _parse_date(raw: str, day_first: bool) -> str:
+    """ISO date from ``YYYY-MM-DD``, ``YYYYMMDD`` or slashed layouts.
+
+    Unrecognised text is returned unchanged for the validator to reject.
+    """
+
+    text = (raw or "").strip()
+    try:
+        if len(text) >= 8 and text[:8].isdigit():
+            return datetime.datetime.strptime(text[:8], "%Y%m%d").date().isoformat()
+        return datetime.date.fromisoformat(text[:10]).isoformat()
+    except ValueError:
+        pass
+
+    match = _SLASHED_DATE.match(text.replace(" ", ""))
+    if not match:
+        return text
+    first, second, year = (int(part) for part in match.groups())
+    day, month = (first, second) if day_first else (second, first)
+    if year < 100:
+        year += 2000
+    try:
+        return datetime.date(year, month, day).isoformat()
+    except ValueError:
+        return text
+
+
+def _finish_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the signed-amount and default type/category conventions."""
+
+    amount = record.get("amount")
+    if isinstance(amount, float):
+        if not record.get("type"):
+            record["type"] = INCOME_TYPE if amount >= 0 else EXPENSE_TYPE
+        record["amount"] = abs(amount)
+    if not record.get("category") and record.get("type") and not record.get("is_transfer"):
+        record["category"] = INCOME_CATEGORY if record["type"] == INCOME_TYPE else EXPENSE_CATEGORY
+    record["description"] = (record.get("description") or "").strip()[:MAX_DESCRIPTION_LENGTH]
+    return record
+
+
+def _iter_csv(stream: TextIO) -> Iterator[StatementRecord]:
+    header_line = stream.readline()
+    if not header_line.strip():
+        raise StatementFormatError("El archivo CSV está vacío.")
+    try:
+        dialect = csv.Sniffer().sniff(header_line, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(itertools.chain([header_line], stream), dialect)
+    aliases = {
+        alias: field for field, names in _CSV_COLUMNS.items() for alias in names
+    }
+    columns = [aliases.get(_normalize_header(name)) for name in next(reader)]
+    missing = [field for field in _CSV_REQUIRED if field not in columns]
+    if missing:
+        raise StatementFormatError(
+            f"Faltan columnas en el CSV: {', '.join(missing)}."
+        )
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        record: Dict[str, Any] = {}
+        for field, cell in zip(columns, row):
+            value = cell.strip()
+            if field is None or not value:
+                continue
+            if field == "amount":
+                record[field] = _parse_amount(value)
+            elif field == "date":
+                record[field] = _parse_date(value, day_first=True)
+            elif field == "tags":
+                record[field] = [tag for tag in _TAG_SEPARATORS.split(value) if tag.strip()]
+            else:
+                record[field] = value
+        yield reader.line_num, _finish_record(record)
+
+
+def _ofx_record(fields: Dict[str, str]) -> Dict[str, Any]:
+    record: Dict[str, Any] = {
+        "description": fields.get("NAME") or fields.get("MEMO") or "",
+    }
+    if "TRNAMT" in fields:
+        record["amount"] = _parse_amount(fields["TRNAMT"])
+    if "DTPOSTED" in fields:
+        record["date"] = _parse_date(fields["DTPOSTED"], day_first=False)
+    return _finish_record(record)
+
+
+def _iter_ofx(stream: TextIO) -> Iterator[StatementRecord]:
+    """OFX 1.x (SGML, unclosed leaf elements) and OFX 2.x (XML) alike."""
+
+    line = 1
+    current: Optional[Dict[str, str]] = None
+    start_line = 0
+    pending = ""
+    while True:
+        chunk = stream.read(_OFX_READ_SIZE)
+        text = pending + chunk
+        # The last element may continue in the next chunk.
+        cut = text.rfind("<") if chunk else len(text)
+        text, pending = text[:cut], text[cut:]
+
+        position = 0
+        for match in _OFX_ELEMENT.finditer(text):
+            line += text.count("\n", position, match.start())
+            position = match.start()
+            closing, name, value = match.group(1), match.group(2).upper(), match.group(3).strip()
+            if name == "STMTTRN":
+                if not closing:
+                    current, start_line = {}, line
+                elif current is not None:
+                    yield start_line, _ofx_record(current)
+                    current = None
+            elif current is not None and not closing and value:
+                current[name] = value
+        line += text.count("\n", position)
+
+        if not chunk:
+            break
+
+
+def _iter_qif(stream: TextIO) -> Iterator[StatementRecord]:
+    in_transactions = True
+    record: Dict[str, Any] = {}
+    start_line = 0
+    for number, raw_line in enumerate(stream, 1):
+        line = raw_line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == "!":
+            header = value.lower()
+            in_transactions = (
+                header.startswith("type:")
+                and header[len("type:"):].strip() in _QIF_TRANSACTION_SECTIONS
+            )
+            continue
+        if code == "^":
+            if record and in_transactions:
+                yield start_line, _finish_record(record)
+            record, start_line = {}, 0
+            continue
+        if not start_line:
+            start_line = number
+        if code == "D":
+            # Quicken writes month-first dates (12/31'23).
+            record["date"] = _parse_date(value, day_first=False)
+        elif code == "T" or (code == "U" and "amount" not in record):
+            record["amount"] = _parse_amount(value)
+        elif code == "P":
+            record["description"] = value
+        elif code == "M":
+            record.setdefault("description", value)
+        elif code == "L" and not value.startswith("["):
+            # "[Cuenta]" marks a transfer to another QIF account; the category
+            # then falls back to the default for the type.
+            record["category"] = value
+    if record and in_transactions:
+        yield start_line, _finish_record(record)
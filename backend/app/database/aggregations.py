@@ -0,0 +1,246 @@
+"""Set-based aggregates for the dashboard and analysis reports.
+
+Every function returns plain tuples computed by ``GROUP BY`` in SQLite and
+excludes transfers. Ranges made of whole months (all dashboard and analysis
+periods) are answered from ``monthly_rollup``, so their cost depends on the
+number of months and categories instead of transactions. Any other range
+falls back to the transaction table: through the NumPy columnar engine when
+it is available, otherwise with a ``UNION ALL`` of split rows and unsplit
+transactions for category totals.
+
+Report sections are written as reducers over breakdown rows; ``fold_breakdown``
+streams the cursor once and feeds every registered reducer, so adding a
+section never adds another scan or a materialised list.
+"""
+
+import datetime
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from peewee import fn
+
+from app.database.columnar import columnar_engine
+from app.model.base_model import db
+from app.model.monthly_rollup import MonthlyRollup
+from app.model.transaction import Transaction
+from app.model.transaction_split import TransactionSplit
+
+# (month "YYYY-MM", type, category, total)
+BreakdownRow = Tuple[str, str, str, float]
+# (type, total)
+TypeTotal = Tuple[str, float]
+
+
+def _covers_whole_months(start_date: datetime.date, end_date: datetime.date) -> bool:
+    return start_date.day == 1 and (end_date + datetime.timedelta(days=1)).day == 1
+
+
+def _month_bounds(start_date: datetime.date, end_date: datetime.date) -> Tuple[str, str]:
+    return start_date.strftime("%Y-%m"), end_date.strftime("%Y-%m")
+
+
+def _transaction_breakdown_sql() -> str:
+    transactions = Transaction._meta.table_name
+    splits = TransactionSplit._meta.table_name
+    month = "strftime('%Y-%m', tx.date)"
+    window = "tx.date BETWEEN ? AND ? AND NOT COALESCE(tx.is_transfer, 0)"
+    return (
+        "SELECT month, type, category, SUM(total) FROM ("
+        f"SELECT {month} AS month, tx.type AS type, tx.category AS category, "
+        f'SUM(tx.amount) AS total FROM "{transactions}" AS tx WHERE {window} '
+        f'AND NOT EXISTS (SELECT 1 FROM "{splits}" AS split '
+        "WHERE split.transaction_id = tx.id) GROUP BY 1, 2, 3 "
+        f"UNION ALL SELECT {month}, tx.type, split.category, SUM(split.amount) "
+        f'FROM "{splits}" AS split JOIN "{transactions}" AS tx '
+        f"ON tx.id = split.transaction_id WHERE {window} GROUP BY 1, 2, 3"
+        ") GROUP BY 1, 2, 3 ORDER BY 1"
+    )
+
+
+def iter_monthly_breakdown(
+    start_date: datetime.date, end_date: datetime.date
+) -> Iterator[BreakdownRow]:
+    """Stream split-aware totals per month, type and category, ordered by month."""
+
+    if _covers_whole_months(start_date, end_date):
+        first, last = _month_bounds(start_date, end_date)
+        query = (
+            MonthlyRollup.select(
+                MonthlyRollup.month,
+                MonthlyRollup.type,
+                MonthlyRollup.category,
+                fn.SUM(MonthlyRollup.total_amount),
+            )
+            .where(
+                MonthlyRollup.month.between(first, last)
+                & (MonthlyRollup.is_transfer == False)
+            )
+            .group_by(MonthlyRollup.month, MonthlyRollup.type, MonthlyRollup.category)
+            .order_by(MonthlyRollup.month)
+        )
+        rows = query.tuples().iterator()
+    elif columnar_engine.enabled:
+        rows = columnar_engine.monthly_breakdown(start_date, end_date)
+    else:
+        params = [start_date.isoformat(), end_date.isoformat()] * 2
+        rows = db.execute_sql(_transaction_breakdown_sql(), params)
+
+    for month, kind, category, total in rows:
+        yield month, kind, category, float(total or 0)
+
+
+def totals_by_type(start_date: datetime.date, end_date: datetime.date) -> List[TypeTotal]:
+    """Total amount per transaction type within the range."""
+
+    if _covers_whole_months(start_date, end_date):
+        first, last = _month_bounds(start_date, end_date)
+        query = (
+            MonthlyRollup.select(MonthlyRollup.type, fn.SUM(MonthlyRollup.total_amount))
+            .where(
+                MonthlyRollup.month.between(first, last)
+                & (MonthlyRollup.is_transfer == False)
+            )
+            .group_by(MonthlyRollup.type)
+        )
+    elif columnar_engine.enabled:
+        return columnar_engine.totals_by_type(start_date, end_date)
+    else:
+        query = (
+            Transaction.select(Transaction.type, fn.SUM(Transaction.amount))
+            .where(
+                Transaction.date.between(start_date, end_date)
+                & (Transaction.is_transfer == False)
+            )
+            .group_by(Transaction.type)
+        )
+    return [(kind, float(total or 0)) for kind, total in query.tuples()]
+
+
+class BreakdownReducer:
+    """Accumulates one report section from breakdown rows."""
+
+    def add(self, row: BreakdownRow) -> None:
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+class TypeTotals(BreakdownReducer):
+    """Total per transaction type, as ``(type, total)`` tuples."""
+
+    def __init__(self) -> None:
+        self._totals: Dict[str, float] = defaultdict(float)
+
+    def add(self, row: BreakdownRow) -> None:
+        self._totals[row[1]] += row[3]
+
+    def result(self) -> List[TypeTotal]:
+        return list(self._totals.items())
+
+
+class MonthlyIncomeExpense(BreakdownReducer):
+    """Income and absolute expense per ``YYYY-MM`` month, in month order."""
+
+    def __init__(self, income_type: str) -> None:
+        self.income_type = income_type
+        self._months: Dict[str, List[float]] = {}
+
+    def add(self, row: BreakdownRow) -> None:
+        month, kind, _, amount = row
+        totals = self._months.setdefault(month, [0.0, 0.0])
+        if kind == self.income_type:
+            totals[0] += amount
+        else:
+            totals[1] += abs(amount)
+
+    def result(self) -> List[Tuple[str, float, float]]:
+        return [(month, income, expense) for month, (income, expense) in sorted(self._months.items())]
+
+
+class CategoryTotals(BreakdownReducer):
+    """Absolute totals per category, split into income and expense types.
+
+    ``months`` restricts the rows to those month numbers; ``per_month`` keeps
+    a ``{category: {month_number: total}}`` table instead of a flat total.
+    """
+
+    def __init__(
+        self,
+        income_type: str,
+        empty_label: str,
+        months: Optional[Iterable[int]] = None,
+        per_month: bool = False,
+    ) -> None:
+        self.income_type = income_type
+        self.empty_label = empty_label
+        self.months = set(months) if months is not None else None
+        self.per_month = per_month
+        self._income: Dict[str, Any] = {}
+        self._expense: Dict[str, Any] = {}
+
+    def add(self, row: BreakdownRow) -> None:
+        month, kind, category, amount = row
+        month_number = int(month[5:7])
+        if self.months is not None and month_number not in self.months:
+            return
+        target = self._income if kind == self.income_type else self._expense
+        label = category or self.empty_label
+        value = amount if kind == self.income_type else abs(amount)
+        if self.per_month:
+            by_month = target.setdefault(label, defaultdict(float))
+            by_month[month_number] += value
+        else:
+            target[label] = target.get(label, 0.0) + value
+
+    def result(self) -> Dict[str, Dict[str, Any]]:
+        return {"income": self._income, "expense": self._expense}
+
+
+class CategoryMonthSeries(BreakdownReducer):
+    """Absolute totals per category and ``YYYY-MM`` month, split like ``CategoryTotals``."""
+
+    def __init__(self, income_type: str, empty_label: str) -> None:
+        self.income_type = income_type
+        self.empty_label = empty_label
+        self._income: Dict[str, Dict[str, float]] = {}
+        self._expense: Dict[str, Dict[str, float]] = {}
+
+    def add(self, row: BreakdownRow) -> None:
+        month, kind, category, amount = row
+        is_income = kind == self.income_type
+        target = self._income if is_income else self._expense
+        by_month = target.setdefault(category or self.empty_label, defaultdict(float))
+        by_month[month] += amount if is_income else abs(amount)
+
+    def result(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        return {"income": self._income, "expense": self._expense}
+
+
+class MonthlyNet(BreakdownReducer):
+    """Income minus absolute expense per month number."""
+
+    def __init__(self, income_type: str) -> None:
+        self.income_type = income_type
+        self._net: Dict[int, float] = defaultdict(float)
+
+    def add(self, row: BreakdownRow) -> None:
+        month, kind, _, amount = row
+        self._net[int(month[5:7])] += amount if kind == self.income_type else -abs(amount)
+
+    def result(self) -> Dict[int, float]:
+        return dict(self._net)
+
+
+def fold_breakdown(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    reducers: Dict[str, BreakdownReducer],
+) -> Dict[str, Any]:
+    """Stream the breakdown once, feeding every reducer, and collect results."""
+
+    active = list(reducers.values())
+    for row in iter_monthly_breakdown(start_date, end_date):
+        for reducer in active:
+            reducer.add(row)
+    return {name: reducer.result() for name, reducer in reducers.items()}
@@ -0,0 +1,223 @@
+"""Month-end balance snapshots for accounts and debts.
+
+Rows cover every closed month from the first month an entity moves up to a
+global watermark (the latest stored month). A write dated in month ``M``
+drops every row from ``M`` onward and the next refresh recomputes only those
+months, so backdated edits never replay the whole history. Readers combine
+the stored rows with the movement after the watermark (normally just the
+current month).
+"""
+
+import datetime
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from peewee import fn
+
+from app.model.balance_snapshot import BalanceSnapshot
+from app.model.base_model import db
+from app.model.transaction import Transaction
+
+ACCOUNT = "account"
+DEBT = "debt"
+
+EntityKey = Tuple[str, int]
+
+# Transaction ids per statement, well below SQLite's bound-parameter limit.
+_ID_CHUNK = 500
+
+
+def _month_key(value: datetime.date) -> str:
+    return value.strftime("%Y-%m")
+
+
+def _month_end(month: str) -> datetime.date:
+    year, month_number = (int(part) for part in month.split("-"))
+    first = datetime.date(year, month_number, 1)
+    following = (first.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return following - datetime.timedelta(days=1)
+
+
+def _next_month(month: str) -> str:
+    return _month_key(_month_end(month) + datetime.timedelta(days=1))
+
+
+def last_closed_month(today: Optional[datetime.date] = None) -> str:
+    today = today or datetime.date.today()
+    return _month_key(today.replace(day=1) - datetime.timedelta(days=1))
+
+
+def movement_sql(
+    bucket: str = "strftime('%Y-%m', date)", window: str = "date > ? AND date <= ?"
+) -> str:
+    """Signed movement per ``bucket`` and entity for transactions in ``window``.
+
+    Accounts gain income and transfers in and lose everything else; debts
+    accumulate the payments made to them. ``window`` appears once per branch,
+    so its parameters must be passed three times.
+    """
+
+    table = Transaction._meta.table_name
+    transfer = "COALESCE(is_transfer, 0)"
+    income = "LOWER(TRIM(type)) = 'ingreso'"
+    return (
+        f"SELECT {bucket}, '{ACCOUNT}', account_id, SUM(CASE WHEN {transfer} THEN -ABS(amount) "
+        f"WHEN {income} THEN ABS(amount) ELSE -ABS(amount) END) "
+        f'FROM "{table}" WHERE {window} AND account_id IS NOT NULL GROUP BY 1, 3 '
+        f"UNION ALL SELECT {bucket}, '{ACCOUNT}', transfer_account_id, SUM(ABS(amount)) "
+        f'FROM "{table}" WHERE {window} AND {transfer} AND transfer_account_id IS NOT NULL '
+        "GROUP BY 1, 3 "
+        f"UNION ALL SELECT {bucket}, '{DEBT}', debt_id, SUM(ABS(amount)) "
+        f'FROM "{table}" WHERE {window} AND debt_id IS NOT NULL AND NOT {transfer} '
+        f"AND NOT {income} GROUP BY 1, 3"
+    )
+
+
+def monthly_movements(
+    after: Optional[datetime.date], until: datetime.date
+) -> Dict[str, Dict[EntityKey, float]]:
+    """Net movement per month and entity for ``after < date <= until``."""
+
+    lower = (after or datetime.date.min).isoformat()
+    params = [lower, until.isoformat()] * 3
+    movements: Dict[str, Dict[EntityKey, float]] = defaultdict(lambda: defaultdict(float))
+    for month, entity_type, entity_id, amount in db.execute_sql(movement_sql(), params):
+        movements[month][(entity_type, int(entity_id))] += float(amount or 0)
+    return movements
+
+
+def snapshot_watermark() -> Optional[str]:
+    """Latest month with stored snapshots, or ``None`` when the table is empty."""
+
+    row = db.execute_sql(
+        f'SELECT MAX(month) FROM "{BalanceSnapshot._meta.table_name}"'
+    ).fetchone()
+    return row[0] if row and row[0] else None
+
+
+def load_snapshots(months: Iterable[str]) -> Dict[str, Dict[EntityKey, float]]:
+    month_list = sorted(set(months))
+    if not month_list:
+        return {}
+    rows = BalanceSnapshot.select().where(BalanceSnapshot.month.in_(month_list)).tuples()
+    snapshots: Dict[str, Dict[EntityKey, float]] = defaultdict(dict)
+    for month, entity_type, entity_id, amount in rows:
+        snapshots[month][(entity_type, entity_id)] = amount
+    return snapshots
+
+
+def refresh_balance_snapshots(today: Optional[datetime.date] = None) -> int:
+    """Store snapshots for every closed month after the watermark.
+
+    Returns the number of rows written; a table that is already current
+    costs a single ``MAX(month)`` lookup.
+    """
+
+    through = last_closed_month(today)
+    watermark = snapshot_watermark()
+    if watermark is not None and watermark >= through:
+        return 0
+
+    running: Dict[EntityKey, float] = {}
+    if watermark is not None:
+        running = dict(load_snapshots([watermark]).get(watermark, {}))
+
+    movements = monthly_movements(
+        _month_end(watermark) if watermark else None, _month_end(through)
+    )
+    if not movements and not running:
+        return 0
+
+    month = _next_month(watermark) if watermark else min(movements)
+    rows: List[Dict[str, object]] = []
+    while month <= through:
+        for key, amount in movements.get(month, {}).items():
+            running[key] = running.get(key, 0.0) + amount
+        rows.extend(
+            {
+                "month": month,
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "cumulative_amount": amount,
+            }
+            for (entity_type, entity_id), amount in running.items()
+        )
+        month = _next_month(month)
+
+    with db.atomic():
+        for start in range(0, len(rows), 500):
+            BalanceSnapshot.insert_many(rows[start:start + 500]).execute()
+    return len(rows)
+
+
+def rebuild_balance_snapshots(today: Optional[datetime.date] = None) -> int:
+    """Discard every snapshot and recompute them from the full history."""
+
+    with db.atomic():
+        BalanceSnapshot.delete().execute()
+        return refresh_balance_snapshots(today)
+
+
+def invalidate_balance_snapshots(transaction_ids: Iterable[int]) -> None:
+    """Drop snapshots from the earliest month touched by these transactions."""
+
+    ids = [int(transaction_id) for transaction_id in transaction_ids]
+    if not ids:
+        return
+
+    months = [
+        Transaction.select(fn.MIN(fn.strftime("%Y-%m", Transaction.date)))
+        .where(Transaction.id.in_(ids[start:start + _ID_CHUNK]))
+        .scalar()
+        for start in range(0, len(ids), _ID_CHUNK)
+    ]
+    months = [month for month in months if month is not None]
+    if not months:
+        return
+    BalanceSnapshot.delete().where(BalanceSnapshot.month >= min(months)).execute()
+
+
+def cumulative_amounts_at(
+    month_ends: List[datetime.date],
+) -> List[Dict[EntityKey, float]]:
+    """Cumulative movement per entity at each of the given sorted dates.
+
+    Every date but the last is expected to be a month end. Closed months up
+    to the watermark come straight from the table; later points add the
+    movement since the watermark, fetched with one grouped query.
+    """
+
+    watermark = snapshot_watermark()
+    stored = [
+        _month_key(point)
+        for point in month_ends
+        if watermark is not None and _month_key(point) <= watermark
+    ]
+    snapshots = load_snapshots(stored + ([watermark] if watermark else []))
+
+    pending = [
+        point
+        for point in month_ends
+        if watermark is None or _month_key(point) > watermark
+    ]
+    movements: Dict[str, Dict[EntityKey, float]] = {}
+    if pending:
+        movements = monthly_movements(
+            _month_end(watermark) if watermark else None, pending[-1]
+        )
+
+    running = dict(snapshots.get(watermark, {})) if watermark else {}
+    moved_months = sorted(movements)
+    cursor = 0
+    results: List[Dict[EntityKey, float]] = []
+    for point in month_ends:
+        month = _month_key(point)
+        if watermark is not None and month <= watermark:
+            results.append(snapshots.get(month, {}))
+            continue
+        while cursor < len(moved_months) and moved_months[cursor] <= month:
+            for key, amount in movements[moved_months[cursor]].items():
+                running[key] = running.get(key, 0.0) + amount
+            cursor += 1
+        results.append(dict(running))
+    return results
@@ -0,0 +1,116 @@
+"""Reconciliation of ``BudgetEntry.actual_amount`` with linked transactions.
+
+Transaction writes adjust ``actual_amount`` incrementally. This module
+recomputes the expected value for every entry in one grouped query: the sum
+of the non-transfer transactions linked to it, floored at zero as the
+incremental path does. Drifted rows are then fixed with a single
+``UPDATE ... FROM``. The statement count is fixed, whatever the number of
+entries, so the check is cheap enough to run on every startup.
+
+A rollover splits one entry into per-cycle rows; ``reassign_series_actuals``
+then moves each transaction to its cycle and recomputes those rows only.
+"""
+
+from typing import Iterable, List, NamedTuple
+
+from peewee import chunked
+
+from app.model.base_model import db
+from app.model.budget_entry import BudgetEntry
+from app.model.transaction import Transaction
+
+# Differences below this are rounding noise, not drift.
+DRIFT_TOLERANCE = 0.005
+
+# Ids per statement, well below SQLite's bound-parameter limit.
+_CHUNK = 500
+
+
+class BudgetDrift(NamedTuple):
+    entry_id: int
+    description: str
+    stored: float
+    expected: float
+
+
+def _expected_actuals_sql() -> str:
+    entries = BudgetEntry._meta.table_name
+    transactions = Transaction._meta.table_name
+    return (
+        "SELECT entry.id AS id, MAX(0, COALESCE(SUM(tx.amount), 0)) AS total "
+        f'FROM "{entries}" AS entry LEFT JOIN "{transactions}" AS tx '
+        "ON tx.budget_entry_id = entry.id AND NOT COALESCE(tx.is_transfer, 0) "
+        "GROUP BY entry.id"
+    )
+
+
+def find_budget_drift(tolerance: float = DRIFT_TOLERANCE) -> List[BudgetDrift]:
+    """Entries whose stored ``actual_amount`` differs from their transactions."""
+
+    table = BudgetEntry._meta.table_name
+    rows = db.execute_sql(
+        "SELECT entry.id, entry.description, COALESCE(entry.actual_amount, 0), expected.total "
+        f'FROM "{table}" AS entry JOIN ({_expected_actuals_sql()}) AS expected '
+        "ON expected.id = entry.id "
+        "WHERE ABS(COALESCE(entry.actual_amount, 0) - expected.total) > ? "
+        "ORDER BY entry.id",
+        (tolerance,),
+    )
+    return [
+        BudgetDrift(int(entry_id), description, float(stored), float(expected))
+        for entry_id, description, stored, expected in rows
+    ]
+
+
+def reconcile_budget_actuals(
+    tolerance: float = DRIFT_TOLERANCE, dry_run: bool = False
+) -> List[BudgetDrift]:
+    """Rewrite every drifted ``actual_amount`` and return what was drifted."""
+
+    table = BudgetEntry._meta.table_name
+    with db.atomic():
+        drift = find_budget_drift(tolerance)
+        if drift and not dry_run:
+            db.execute_sql(
+                f'UPDATE "{table}" SET actual_amount = expected.total '
+                f"FROM ({_expected_actuals_sql()}) AS expected "
+                f'WHERE "{table}".id = expected.id '
+                f'AND ABS(COALESCE("{table}".actual_amount, 0) - expected.total) > ?',
+                (tolerance,),
+            )
+    return drift
+
+
+def reassign_series_actuals(entry_ids: Iterable[int]) -> None:
+    """Move rolled-over cycles' transactions to the cycle holding their date.
+
+    ``entry_ids`` are cycles that were just rolled over. Their transactions
+    dated after the cycle ends are linked to the latest cycle of the same
+    series starting on or before that date, and every cycle of those series
+    gets its ``actual_amount`` recomputed.
+    """
+
+    entries = BudgetEntry._meta.table_name
+    transactions = Transaction._meta.table_name
+    for chunk in chunked(entry_ids, _CHUNK):
+        marks = ", ".join("?" for _ in chunk)
+        db.execute_sql(
+            f'UPDATE "{transactions}" SET budget_entry_id = ('
+            f'SELECT cycle.id FROM "{entries}" AS cycle JOIN "{entries}" AS rolled '
+            "ON rolled.series_id = cycle.series_id "
+            f'WHERE rolled.id = "{transactions}".budget_entry_id '
+            f'AND cycle.period_start <= "{transactions}".date '
+            "ORDER BY cycle.period_start DESC LIMIT 1) "
+            f"WHERE budget_entry_id IN ({marks}) AND date > ("
+            f'SELECT period_end FROM "{entries}" AS rolled '
+            f'WHERE rolled.id = "{transactions}".budget_entry_id)',
+            chunk,
+        )
+        db.execute_sql(
+            f'UPDATE "{entries}" SET actual_amount = ('
+            "SELECT MAX(0, COALESCE(SUM(tx.amount), 0)) "
+            f'FROM "{transactions}" AS tx WHERE tx.budget_entry_id = "{entries}".id '
+            "AND NOT COALESCE(tx.is_transfer, 0)) "
+            f'WHERE series_id IN (SELECT series_id FROM "{entries}" WHERE id IN ({marks}))',
+            chunk,
+        )
@@ -0,0 +1,320 @@
+"""Lazy expansion of budget entries into dated occurrences.
+
+A one-off entry has a single occurrence: its stored period. A recurring entry
+(``is_recurring`` with a repeating frequency) stores only its first cycle and
+repeats it every frequency step with no end, as the budget module specifies
+("Se repite siempre").
+
+Occurrences are never stored. A ``RecurrenceCalendar`` is shared by every
+entry with the same anchor date and frequency and memoizes the cycle start
+dates it has computed, so asking for any window is a bisect on a list that
+only grows as far as the latest window requested.
+
+A recurring occurrence belongs to the window containing its start date, so
+adjacent windows never count the same cycle twice. One-off entries keep the
+overlap rule used for the stored period.
+
+Rolling a recurring entry over stores its past cycles as rows of one series
+(``series_id``). Those cycles are no longer recurring but keep the start-date
+rule, and the live cycle repeats from the series' first start, so the totals
+for any window are the same before and after a rollover.
+"""
+
+import bisect
+import datetime
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from peewee import JOIN, fn
+
+from app.database.budget_periods import (
+    coerce_date,
+    compute_period_bounds,
+    frequency_delta,
+    normalize_frequency,
+    undated_entries_overlapping,
+)
+from app.model.budget_entry import BudgetEntry
+from app.model.transaction import Transaction
+
+
+class BudgetOccurrence(NamedTuple):
+    entry_id: int
+    start: datetime.date
+    end: datetime.date
+    budgeted_amount: float
+    type: str
+    category: str
+
+
+class RecurrenceCalendar:
+    """Cycle start dates of one (anchor, frequency) schedule, computed on demand."""
+
+    def __init__(self, anchor: datetime.date, frequency: str) -> None:
+        self.anchor = anchor
+        self.step = frequency_delta(frequency)
+        self._starts: List[datetime.date] = [anchor]
+        self._lock = threading.Lock()
+
+    def _start(self, index: int) -> datetime.date:
+        # Offsets are taken from the anchor so month ends do not drift
+        # (Jan 31 -> Feb 28 -> Mar 31, not Mar 28).
+        return self.anchor + self.step * index
+
+    def starts_between(self, start: datetime.date, end: datetime.date) -> List[datetime.date]:
+        """Cycle starts within ``[start, end]``."""
+
+        first, last = self._bounds(start, end)
+        return self._starts[first:last]
+
+    def count_between(self, start: datetime.date, end: datetime.date) -> int:
+        """Number of cycle starts within ``[start, end]``."""
+
+        first, last = self._bounds(start, end)
+        return last - first
+
+    def _bounds(self, start: datetime.date, end: datetime.date) -> Tuple[int, int]:
+        if end < self.anchor:
+            return 0, 0
+        with self._lock:
+            starts = self._starts
+            while starts[-1] <= end:
+                starts.append(self._start(len(starts)))
+        return bisect.bisect_left(starts, start), bisect.bisect_right(starts, end)
+
+    def cycle_end(self, cycle_start: datetime.date) -> datetime.date:
+        """Day before the cycle that follows ``cycle_start``."""
+
+        _, following = self._bounds(cycle_start, cycle_start)
+        return self._start(following) - datetime.timedelta(days=1)
+
+
+@lru_cache(maxsize=4096)
+def recurrence_calendar(anchor: datetime.date, frequency: str) -> RecurrenceCalendar:
+    return RecurrenceCalendar(anchor, frequency)
+
+
+def _calendar(
+    frequency: Optional[str], is_recurring: bool, anchor: Optional[datetime.date]
+) -> Optional[RecurrenceCalendar]:
+    frequency = normalize_frequency(frequency)
+    if not is_recurring or frequency_delta(frequency) is None or not anchor:
+        return None
+    return recurrence_calendar(anchor, frequency)
+
+
+def _starts_in_window(
+    calendar: Optional[RecurrenceCalendar],
+    period_start: Optional[datetime.date],
+    period_end: Optional[datetime.date],
+    start: datetime.date,
+    end: datetime.date,
+    in_series: bool = False,
+) -> List[datetime.date]:
+    if calendar is not None:
+        # A rolled-over live cycle shares its series' calendar but only owns
+        # the cycles from its own start on.
+        return calendar.starts_between(max(start, period_start), end)
+    if in_series:
+        return [period_start] if period_start and start <= period_start <= end else []
+    if period_start and period_end and period_start <= end and period_end >= start:
+        return [period_start]
+    return []
+
+
+def series_anchors(entries: Iterable[BudgetEntry]) -> Dict[int, datetime.date]:
+    """First cycle start of each rollover series the ``entries`` belong to."""
+
+    series_ids = {entry.series_id for entry in entries if entry.series_id}
+    if not series_ids:
+        return {}
+    return dict(
+        BudgetEntry.select(BudgetEntry.id, BudgetEntry.period_start)
+        .where(BudgetEntry.id.in_(list(series_ids)))
+        .tuples()
+    )
+
+
+def _entry_period(entry: BudgetEntry) -> Tuple[datetime.date, datetime.date]:
+    # An undated entry (NULL bounds) covers the cycle that starts today.
+    if entry.period_start is None:
+        return compute_period_bounds(datetime.date.today(), entry.frequency, None, None)
+    return entry.period_start, entry.period_end
+
+
+def _entry_calendar(
+    entry: BudgetEntry, anchors: Dict[int, datetime.date]
+) -> Optional[RecurrenceCalendar]:
+    anchor = anchors.get(entry.series_id) or entry.period_start
+    return _calendar(entry.frequency, entry.is_recurring, anchor)
+
+
+def entries_in_window(start: datetime.date, end: datetime.date, where=None):
+    """Entries with at least one possible occurrence in ``[start, end]``.
+
+    One-off entries are matched by indexed overlap; recurring ones only need
+    to have started by ``end``. Undated entries count as one-off entries over
+    the cycle that starts today.
+    """
+
+    dated = (BudgetEntry.period_start <= end) & (
+        (BudgetEntry.period_end >= start) | (BudgetEntry.is_recurring == True)
+    )
+    undated = undated_entries_overlapping(start, end)
+    query = BudgetEntry.select().where(
+        dated | BudgetEntry.id.in_(undated) if undated else dated
+    )
+    if where is not None:
+        query = query.where(where)
+    return query
+
+
+def occurrence_starts(
+    entry: BudgetEntry,
+    start: datetime.date,
+    end: datetime.date,
+    anchors: Optional[Dict[int, datetime.date]] = None,
+) -> List[datetime.date]:
+    """Start dates of the entry's occurrences counted in ``[start, end]``.
+
+    ``anchors`` comes from ``series_anchors``; it is looked up when omitted.
+    """
+
+    if anchors is None:
+        anchors = series_anchors([entry])
+    return _starts_in_window(
+        _entry_calendar(entry, anchors),
+        *_entry_period(entry),
+        start,
+        end,
+        bool(entry.series_id),
+    )
+
+
+def iter_occurrences(
+    start: datetime.date,
+    end: datetime.date,
+    entries: Optional[Iterable[BudgetEntry]] = None,
+) -> Iterator[BudgetOccurrence]:
+    """Yield every budget occurrence counted in ``[start, end]``, entry by entry."""
+
+    entries = list(entries_in_window(start, end) if entries is None else entries)
+    anchors = series_anchors(entries)
+    for entry in entries:
+        calendar = _entry_calendar(entry, anchors)
+        period_start, period_end = _entry_period(entry)
+        for cycle_start in _starts_in_window(
+            calendar, period_start, period_end, start, end, bool(entry.series_id)
+        ):
+            yield BudgetOccurrence(
+                entry.id,
+                cycle_start,
+                calendar.cycle_end(cycle_start) if calendar else period_end,
+                float(entry.budgeted_amount or 0),
+                entry.type,
+                entry.category,
+            )
+
+
+def _actuals_by_type(start: datetime.date, end: datetime.date) -> Dict[str, float]:
+    # Each entry is floored at zero, as the incremental ``actual_amount`` is.
+    per_entry = (
+        Transaction.select(
+            BudgetEntry.type.alias("type"),
+            fn.MAX(0, fn.SUM(Transaction.amount)).alias("total"),
+        )
+        .join(BudgetEntry)
+        .where(
+            Transaction.date.between(start, end)
+            & ~fn.COALESCE(Transaction.is_transfer, False)
+        )
+        .group_by(Transaction.budget_entry)
+    )
+    query = (
+        BudgetEntry.select(per_entry.c.type, fn.SUM(per_entry.c.total))
+        .from_(per_entry)
+        .group_by(per_entry.c.type)
+        .tuples()
+    )
+    return {entry_type: float(total or 0) for entry_type, total in query}
+
+
+def budget_totals_by_type(
+    start: datetime.date, end: datetime.date
+) -> Dict[str, Tuple[float, float]]:
+    """Budgeted and actual totals per entry type for ``[start, end]``.
+
+    One-off entries are summed by one grouped query, rolled-over cycles by
+    their start date, undated entries over the cycle that starts today. Each recurring entry adds its amount once per
+    occurrence counted in the window. Actuals are
+    the linked transactions dated inside the window, so a recurring entry's
+    spending is split across the windows it happened in.
+    """
+
+    totals: Dict[str, List[float]] = {}
+    one_off = (
+        BudgetEntry.select(BudgetEntry.type, fn.SUM(BudgetEntry.budgeted_amount))
+        .where(
+            (BudgetEntry.is_recurring == False)
+            & (BudgetEntry.period_end >= start)
+            & (BudgetEntry.period_start <= end)
+            & (BudgetEntry.series_id.is_null() | (BudgetEntry.period_start >= start))
+        )
+        .group_by(BudgetEntry.type)
+        .tuples()
+    )
+    for entry_type, budgeted in one_off:
+        totals[entry_type] = [float(budgeted or 0), 0.0]
+    undated = undated_entries_overlapping(start, end)
+    if undated:
+        for entry_type, budgeted in (
+            BudgetEntry.select(BudgetEntry.type, fn.SUM(BudgetEntry.budgeted_amount))
+            .where(BudgetEntry.id.in_(undated))
+            .group_by(BudgetEntry.type)
+            .tuples()
+        ):
+            totals.setdefault(entry_type, [0.0, 0.0])[0] += float(budgeted or 0)
+
+    # Recurring entries sharing a schedule share a calendar, so they are
+    # grouped by it and each group is counted once. A rolled-over entry's
+    # calendar is anchored at the first cycle of its series.
+    series = BudgetEntry.alias()
+    anchor = fn.COALESCE(series.period_start, BudgetEntry.period_start)
+    recurring = (
+        BudgetEntry.select(
+            BudgetEntry.type,
+            BudgetEntry.frequency,
+            anchor,
+            BudgetEntry.period_start,
+            BudgetEntry.period_end,
+            fn.SUM(BudgetEntry.budgeted_amount),
+        )
+        .join(series, JOIN.LEFT_OUTER, on=(series.id == BudgetEntry.series_id))
+        .where((BudgetEntry.is_recurring == True) & (BudgetEntry.period_start <= end))
+        .group_by(
+            BudgetEntry.type,
+            BudgetEntry.frequency,
+            anchor,
+            BudgetEntry.period_start,
+            BudgetEntry.period_end,
+        )
+        .tuples()
+    )
+    for entry_type, frequency, anchor_date, period_start, period_end, budgeted in recurring:
+        period_start = coerce_date(period_start)
+        calendar = _calendar(frequency, True, coerce_date(anchor_date))
+        if calendar is not None:
+            occurrences = calendar.count_between(max(start, period_start), end)
+        else:
+            occurrences = len(_starts_in_window(None, period_start, period_end, start, end))
+        if occurrences:
+            totals.setdefault(entry_type, [0.0, 0.0])[0] += float(budgeted or 0) * occurrences
+
+    for entry_type, actual in _actuals_by_type(start, end).items():
+        totals.setdefault(entry_type, [0.0, 0.0])[1] += actual
+    # Sorted so the order does not depend on which query saw a type first.
+    return {
+        entry_type: tuple(totals[entry_type])
+        for entry_type in sorted(totals, key=lambda entry_type: entry_type or "")
+    }
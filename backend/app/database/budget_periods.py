@@ -0,0 +1,162 @@
+"""Normalised active period of budget entries.
+
+A budget entry is active from ``period_start`` to ``period_end``, derived from
+its frequency and its start, due and end dates. The bounds are computed once
+on write and stored on the row, so reports select the entries that overlap a
+range with an indexed ``period_start <= end AND period_end >= start`` instead
+of resolving every entry in Python on every request.
+
+An entry with no start, due or end date has no fixed period: it always covers
+the cycle that starts today. Its stored bounds stay NULL rather than freezing
+the day the migration ran, and ``undated_entries_overlapping`` resolves them
+when a report asks for a range.
+"""
+
+import datetime
+import unicodedata
+from typing import Any, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+from app.model.base_model import db
+from app.model.budget_entry import BudgetEntry
+
+DEFAULT_FREQUENCY = "Mensual"
+
+_FREQUENCIES = {
+    "unica vez": "Única vez",
+    "una vez": "Única vez",
+    "semanal": "Semanal",
+    "quincenal": "Quincenal",
+    "mensual": "Mensual",
+    "anual": "Anual",
+}
+
+
+def normalize_frequency(raw_value: Optional[str]) -> str:
+    """Return a normalized frequency label with title casing."""
+
+    if not raw_value:
+        return DEFAULT_FREQUENCY
+
+    normalized = (
+        unicodedata.normalize("NFD", str(raw_value))
+        .encode("ascii", "ignore")
+        .decode("ascii")
+        .strip()
+        .lower()
+    )
+    return _FREQUENCIES.get(normalized, DEFAULT_FREQUENCY)
+
+
+def frequency_delta(frequency: Optional[str]):
+    """Return a timedelta/relativedelta representing the frequency."""
+
+    normalized = normalize_frequency(frequency)
+    if normalized == "Única vez":
+        return None
+    if normalized == "Semanal":
+        return datetime.timedelta(weeks=1)
+    if normalized == "Quincenal":
+        return datetime.timedelta(weeks=2)
+    if normalized == "Anual":
+        return relativedelta(years=1)
+    return relativedelta(months=1)
+
+
+def coerce_date(value: Optional[Any]) -> Optional[datetime.date]:
+    """Try to convert a value into a date, returning None on failure."""
+
+    if value in (None, "", 0):
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def compute_period_bounds(
+    start_date: Optional[datetime.date],
+    frequency: Optional[str],
+    due_date: Optional[datetime.date],
+    end_date: Optional[datetime.date],
+) -> Tuple[datetime.date, datetime.date]:
+    """Given partial information, determine the active period for a budget."""
+
+    normalized = normalize_frequency(frequency)
+    start = start_date or due_date or end_date or datetime.date.today()
+
+    if normalized == "Única vez":
+        final_end = end_date or due_date or start
+        return start, final_end
+
+    tentative_end = (start + frequency_delta(normalized)) - datetime.timedelta(days=1)
+    final_end = end_date or due_date or tentative_end
+    if final_end < start:
+        final_end = start
+    return start, final_end
+
+
+def entry_period_bounds(
+    frequency: Optional[str], start_raw: Any, due_raw: Any, end_raw: Any
+) -> Tuple[datetime.date, datetime.date]:
+    """Period bounds from the raw (possibly string) fields of an entry."""
+
+    return compute_period_bounds(
+        coerce_date(start_raw), frequency, coerce_date(due_raw), coerce_date(end_raw)
+    )
+
+
+def stored_period_bounds(
+    frequency: Optional[str], start_raw: Any, due_raw: Any, end_raw: Any
+) -> Tuple[Optional[datetime.date], Optional[datetime.date]]:
+    """Bounds to store on the row; ``(None, None)`` for an undated entry."""
+
+    if not any(coerce_date(value) for value in (start_raw, due_raw, end_raw)):
+        return None, None
+    return entry_period_bounds(frequency, start_raw, due_raw, end_raw)
+
+
+def undated_entries_overlapping(
+    start: datetime.date, end: datetime.date, today: Optional[datetime.date] = None
+) -> List[int]:
+    """Ids of undated entries whose current cycle overlaps ``[start, end]``."""
+
+    today = today or datetime.date.today()
+    undated = BudgetEntry.select(BudgetEntry.id, BudgetEntry.frequency).where(
+        BudgetEntry.period_start.is_null()
+    )
+    matches = []
+    for entry_id, frequency in undated.tuples():
+        period_start, period_end = compute_period_bounds(today, frequency, None, None)
+        if period_start <= end and period_end >= start:
+            matches.append(entry_id)
+    return matches
+
+
+def backfill_period_bounds() -> int:
+    """Store the period bounds of every budget entry; returns the row count."""
+
+    rows = BudgetEntry.select(
+        BudgetEntry.id,
+        BudgetEntry.frequency,
+        BudgetEntry.start_date,
+        BudgetEntry.due_date,
+        BudgetEntry.end_date,
+    ).tuples()
+    updates = []
+    for entry_id, frequency, start_raw, due_raw, end_raw in rows:
+        start, end = stored_period_bounds(frequency, start_raw, due_raw, end_raw)
+        updates.append((start and start.isoformat(), end and end.isoformat(), entry_id))
+
+    with db.atomic():
+        db.cursor().executemany(
+            f'UPDATE "{BudgetEntry._meta.table_name}" '
+            "SET period_start = ?, period_end = ? WHERE id = ?",
+            updates,
+        )
+    return len(updates)
@@ -0,0 +1,234 @@
+"""Chunked insertion of transactions with side effects applied once.
+
+``AppController.add_transaction`` saves the account, goal, debt and budget
+entry that a transaction touches and resolves its tags one by one, so loading
+a statement row by row costs several statements per row.
+``TransactionBulkWriter`` instead buffers normalized rows and writes them with
+one multi-row ``INSERT`` per chunk, resolving their tags per chunk.
+``BalanceLedger`` accumulates the net delta of every touched row, and each
+row is updated once when the batch finishes. Batch mutations (mixed
+creates, updates and deletes) use the same ledger.
+
+The ``INSERT`` is built here rather than with ``Model.insert_many``. For
+100k rows, peewee's per-value SQL generation costs about three times the
+insert itself. A multi-row statement also makes the full-text index triggers
+flush once per chunk instead of once per row.
+
+SQLite does not promise which rowids a multi-row ``INSERT`` assigns, nor the
+order of a ``RETURNING`` clause, so each chunk carries explicit ids taken
+above the current maximum inside the write transaction. Splits, tags and
+ledger rows are then attached to ids known in advance; a concurrent insert
+would make the statement fail on the primary key instead of mislinking rows.
+"""
+
+import datetime
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.database.tags import insert_tag_links, resolve_tag_ids
+from app.model.account import Account
+from app.model.base_model import db
+from app.model.budget_entry import BudgetEntry
+from app.model.debt import Debt
+from app.model.goal import Goal
+from app.model.transaction import Transaction
+from app.model.transaction_split import TransactionSplit
+
+# Rows per INSERT: 12 columns x 500 rows stays well below SQLite's
+# bound-parameter limit.
+CHUNK_SIZE = 500
+
+INCOME_TYPE = "Ingreso"
+
+_TRANSACTION_COLUMNS = (
+    "id",
+    "account_id",
+    "date",
+    "description",
+    "amount",
+    "type",
+    "category",
+    "goal_id",
+    "debt_id",
+    "budget_entry_id",
+    "is_transfer",
+    "transfer_account_id",
+)
+_LEDGER_FIELDS = (
+    "account_id",
+    "amount",
+    "type",
+    "goal_id",
+    "debt_id",
+    "budget_entry_id",
+    "is_transfer",
+    "transfer_account_id",
+)
+
+
+def ledger_fields(transaction: Transaction) -> Dict[str, Any]:
+    """The fields of a stored transaction that ``BalanceLedger.add`` reads."""
+
+    return {field: getattr(transaction, field) for field in _LEDGER_FIELDS}
+
+
+def _insert_rows(table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+    """Insert ``rows`` with one statement."""
+
+    placeholders = "(" + ", ".join("?" for _ in columns) + ")"
+    db.execute_sql(
+        f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES '
+        + ", ".join(placeholders for _ in rows),
+        [value for row in rows for value in row],
+    )
+
+
+class BalanceLedger:
+    """Net deltas per account, goal, debt and budget entry id.
+
+    The deltas follow the incremental helpers of the controller. An
+    ``Ingreso`` adds to its account and any other type subtracts. A transfer
+    moves the amount between its two accounts. Goals and budget entries
+    accumulate the amount, and debts are paid down by it. Goals, debts and
+    budget entries are floored at zero once, on the net delta.
+    """
+
+    def __init__(self) -> None:
+        self.accounts: Dict[int, float] = defaultdict(float)
+        self.goals: Dict[int, float] = defaultdict(float)
+        self.debts: Dict[int, float] = defaultdict(float)
+        self.budget_entries: Dict[int, float] = defaultdict(float)
+
+    def add(self, data: Dict[str, Any], sign: int = 1, accounts: bool = True) -> None:
+        """Record a transaction's effect (``sign=-1`` to revert it).
+
+        With ``accounts=False`` only goals, debts and budget entries change,
+        as when a transaction is deleted without adjusting balances.
+        """
+
+        amount = float(data["amount"] or 0) * (1 if sign >= 0 else -1)
+        if data.get("is_transfer"):
+            if accounts:
+                self.accounts[int(data["account_id"])] -= amount
+                if data.get("transfer_account_id"):
+                    self.accounts[int(data["transfer_account_id"])] += amount
+            return
+
+        if accounts:
+            account_delta = amount if data.get("type") == INCOME_TYPE else -amount
+            self.accounts[int(data["account_id"])] += account_delta
+        if data.get("goal_id"):
+            self.goals[int(data["goal_id"])] += amount
+        if data.get("debt_id"):
+            self.debts[int(data["debt_id"])] += amount
+        if data.get("budget_entry_id"):
+            self.budget_entries[int(data["budget_entry_id"])] += amount
+
+    def merge(self, other: "BalanceLedger") -> None:
+        """Fold the deltas of ``other`` into this ledger."""
+
+        for mine, theirs in (
+            (self.accounts, other.accounts),
+            (self.goals, other.goals),
+            (self.debts, other.debts),
+            (self.budget_entries, other.budget_entries),
+        ):
+            for row_id, delta in theirs.items():
+                mine[row_id] += delta
+
+    def apply(self) -> None:
+        """Write every accumulated delta, one prepared statement per table."""
+
+        updates = (
+            (Account, "current_balance = COALESCE(current_balance, 0) + ?", self.accounts),
+            (Goal, "current_amount = MAX(0, COALESCE(current_amount, 0) + ?)", self.goals),
+            (Debt, "current_balance = MAX(0, COALESCE(current_balance, 0) - ?)", self.debts),
+            (
+                BudgetEntry,
+                "actual_amount = MAX(0, COALESCE(actual_amount, 0) + ?)",
+                self.budget_entries,
+            ),
+        )
+        for model, assignment, deltas in updates:
+            params = [(delta, row_id) for row_id, delta in deltas.items() if delta]
+            if params:
+                db.cursor().executemany(
+                    f'UPDATE "{model._meta.table_name}" SET {assignment} WHERE id = ?',
+                    params,
+                )
+            deltas.clear()
+
+
+class TransactionBulkWriter:
+    """Buffers new transactions and inserts them a chunk at a time.
+
+    ``add`` takes a payload already normalized like ``add_transaction`` does,
+    with its splits and tags. ``finish`` flushes the last chunk, applies the
+    ledger and returns the new ids in insertion order. Derived tables
+    (rollup, daily balances, snapshots) are left to the caller.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE) -> None:
+        self.chunk_size = chunk_size
+        self.ledger = BalanceLedger()
+        self.ids: List[int] = []
+        self._pending: List[Tuple[Dict[str, Any], List[Dict[str, Any]], List[str]]] = []
+        self._tag_ids: Dict[str, int] = {}
+
+    def add(
+        self,
+        data: Dict[str, Any],
+        splits: Sequence[Dict[str, Any]] = (),
+        tags: Sequence[str] = (),
+    ) -> None:
+        self._pending.append((data, list(splits), list(tags)))
+        self.ledger.add(data)
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+
+        table = Transaction._meta.table_name
+        with db.atomic():
+            last_id = db.execute_sql(f'SELECT COALESCE(MAX(id), 0) FROM "{table}"').fetchone()[0]
+            ids = list(range(last_id + 1, last_id + 1 + len(pending)))
+            rows = []
+            for transaction_id, (data, _, _) in zip(ids, pending):
+                row = [transaction_id] + [data.get(column) for column in _TRANSACTION_COLUMNS[1:]]
+                if isinstance(row[2], datetime.date):
+                    row[2] = row[2].isoformat()
+                row[10] = bool(row[10])
+                rows.append(row)
+            _insert_rows(table, _TRANSACTION_COLUMNS, rows)
+        self.ids.extend(ids)
+
+        split_rows = [
+            (transaction_id, split["category"], split["amount"])
+            for transaction_id, (_, splits, _) in zip(ids, pending)
+            for split in splits
+        ]
+        for start in range(0, len(split_rows), self.chunk_size):
+            _insert_rows(
+                TransactionSplit._meta.table_name,
+                ("transaction_id", "category", "amount"),
+                split_rows[start:start + self.chunk_size],
+            )
+
+        missing = [
+            name for _, _, tags in pending for name in tags if name not in self._tag_ids
+        ]
+        if missing:
+            self._tag_ids.update(resolve_tag_ids(missing))
+        insert_tag_links(
+            (transaction_id, self._tag_ids[name])
+            for transaction_id, (_, _, tags) in zip(ids, pending)
+            for name in tags
+        )
+
+    def finish(self) -> List[int]:
+        self.flush()
+        self.ledger.apply()
+        return self.ids
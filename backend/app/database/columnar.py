@@ -0,0 +1,276 @@
+"""Optional NumPy columnar engine for transaction analytics.
+
+Transactions are held as compact column arrays (day numbers, month numbers,
+amounts, interned type/category codes, account ids and transfer flags) plus a
+split-expanded allocation view, so range reductions run as vectorised
+``bincount`` calls instead of Python loops over model instances.
+
+The columns are cached per ``data_version``. When the only writes since the
+last load were appends, just the rows with a higher id are loaded and
+concatenated; any rewrite (update, delete, rename) triggers a full reload.
+
+NumPy is optional. Without it (or with ``NEBULA_ANALYTICS_ENGINE=sql``)
+``columnar_engine.enabled`` is false and callers keep using SQL.
+"""
+
+import datetime
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from app.database.data_version import data_version
+from app.model.base_model import db
+from app.model.transaction import Transaction
+from app.model.transaction_split import TransactionSplit
+
+NUMPY_AVAILABLE = np is not None
+
+_EPOCH = datetime.date(1970, 1, 1)
+_FETCH_SIZE = 50_000
+
+
+def _day_number(value: datetime.date) -> int:
+    return (value - _EPOCH).days
+
+
+def _month_label(month_number: int) -> str:
+    return f"{1970 + month_number // 12:04d}-{month_number % 12 + 1:02d}"
+
+
+class _Interner:
+    """Maps repeated strings to dense integer codes."""
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            key = value or ""
+            code = self._codes.get(key)
+            if code is None:
+                code = len(self.values)
+                self.values.append(key)
+                self._codes[key] = code
+            self._codes[value] = code
+        return code
+
+    def encode(self, values) -> "np.ndarray":
+        for value in set(values).difference(self._codes):
+            self.code(value)
+        return np.fromiter(map(self._codes.__getitem__, values), dtype=np.int32, count=len(values))
+
+
+class TransactionColumns(NamedTuple):
+    ids: "np.ndarray"
+    days: "np.ndarray"
+    months: "np.ndarray"
+    amounts: "np.ndarray"
+    type_codes: "np.ndarray"
+    category_codes: "np.ndarray"
+    account_ids: "np.ndarray"
+    is_transfer: "np.ndarray"
+    # Allocation view: one entry per split, or per transaction without splits.
+    alloc_rows: "np.ndarray"
+    alloc_amounts: "np.ndarray"
+    alloc_category_codes: "np.ndarray"
+
+    @property
+    def max_id(self) -> int:
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self)
+
+
+class ColumnarEngine:
+    """Version-cached columnar copy of the transaction table."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._columns: Optional[TransactionColumns] = None
+        self._version: Optional[Tuple[int, int]] = None
+        self.types = _Interner()
+        self.categories = _Interner()
+
+    @property
+    def enabled(self) -> bool:
+        return NUMPY_AVAILABLE and os.environ.get("NEBULA_ANALYTICS_ENGINE", "numpy") != "sql"
+
+    def columns(self) -> TransactionColumns:
+        """Return columns current for the committed data, loading as needed."""
+
+        return self._current()[0]
+
+    def _current(self) -> Tuple[TransactionColumns, _Interner, _Interner]:
+        # The version is read before loading: a write committing mid-load is
+        # picked up (appended or reloaded) on the next call.
+        version = data_version.snapshot()
+        with self._lock:
+            if self._columns is None or self._version != version:
+                if self._columns is not None and self._version[1] == version[1]:
+                    self._columns = self._concat(self._columns, self._load(self._columns.max_id))
+                else:
+                    self.types, self.categories = _Interner(), _Interner()
+                    self._columns = self._load(0)
+                self._version = version
+            return self._columns, self.types, self.categories
+
+    def _load(self, after_id: int) -> TransactionColumns:
+        cursor = db.execute_sql(
+            "SELECT id, CAST(julianday(date) - 2440587.5 AS INTEGER), amount, type, category, "
+            "account_id, COALESCE(is_transfer, 0) "
+            f'FROM "{Transaction._meta.table_name}" WHERE id > ? ORDER BY id',
+            (after_id,),
+        )
+        blocks = []
+        while True:
+            rows = cursor.fetchmany(_FETCH_SIZE)
+            if not rows:
+                break
+            ids, days, amounts, types, categories, accounts, transfers = zip(*rows)
+            blocks.append(
+                (
+                    np.array(ids, dtype=np.int64),
+                    np.array(days, dtype=np.int32),
+                    np.array(amounts, dtype=np.float64),
+                    self.types.encode(types),
+                    self.categories.encode(categories),
+                    np.array(accounts, dtype=np.int64),
+                    np.array(transfers, dtype=bool),
+                )
+            )
+
+        if blocks:
+            ids, days, amounts, type_codes, category_codes, account_ids, is_transfer = (
+                np.concatenate(parts) for parts in zip(*blocks)
+            )
+        else:
+            ids = account_ids = np.empty(0, dtype=np.int64)
+            days = type_codes = category_codes = np.empty(0, dtype=np.int32)
+            amounts = np.empty(0, dtype=np.float64)
+            is_transfer = np.empty(0, dtype=bool)
+
+        split_rows = db.execute_sql(
+            "SELECT transaction_id, category, amount "
+            f'FROM "{TransactionSplit._meta.table_name}" WHERE transaction_id > ? '
+            "ORDER BY transaction_id, id",
+            (after_id,),
+        ).fetchall()
+        split_ids = np.array([row[0] for row in split_rows], dtype=np.int64)
+        positions = np.searchsorted(ids, split_ids)
+        known = positions < len(ids)
+        known[known] = ids[positions[known]] == split_ids[known]
+        positions = positions[known]
+
+        has_split = np.zeros(len(ids), dtype=bool)
+        has_split[positions] = True
+        unsplit = np.flatnonzero(~has_split)
+        split_amounts = np.array([row[2] for row in split_rows], dtype=np.float64)[known]
+        split_categories = self.categories.encode([row[1] for row in split_rows])[known]
+
+        return TransactionColumns(
+            ids=ids,
+            days=days,
+            months=days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int32),
+            amounts=amounts,
+            type_codes=type_codes,
+            category_codes=category_codes,
+            account_ids=account_ids,
+            is_transfer=is_transfer,
+            alloc_rows=np.concatenate([unsplit, positions]).astype(np.int64),
+            alloc_amounts=np.concatenate([amounts[unsplit], split_amounts]),
+            alloc_category_codes=np.concatenate([category_codes[unsplit], split_categories]),
+        )
+
+    @staticmethod
+    def _concat(base: TransactionColumns, tail: TransactionColumns) -> TransactionColumns:
+        if not len(tail.ids):
+            return base
+        offset = len(base.ids)
+        merged = {
+            field: np.concatenate([getattr(base, field), getattr(tail, field)])
+            for field in TransactionColumns._fields
+            if field != "alloc_rows"
+        }
+        merged["alloc_rows"] = np.concatenate([base.alloc_rows, tail.alloc_rows + offset])
+        return TransactionColumns(**merged)
+
+    def monthly_breakdown(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> List[Tuple[str, str, str, float]]:
+        """Split-aware (month, type, category, total) rows, transfers excluded."""
+
+        columns, types, categories = self._current()
+        rows = columns.alloc_rows
+        days = columns.days[rows]
+        selected = (
+            (days >= _day_number(start_date))
+            & (days <= _day_number(end_date))
+            & ~columns.is_transfer[rows]
+        )
+        if not selected.any():
+            return []
+
+        rows = rows[selected]
+        months = columns.months[rows].astype(np.int64)
+        first_month = int(months.min())
+        type_count = len(types.values)
+        category_count = len(categories.values)
+        keys = (
+            (months - first_month) * type_count + columns.type_codes[rows]
+        ) * category_count + columns.alloc_category_codes[selected]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=columns.alloc_amounts[selected])
+
+        return [
+            (
+                _month_label(first_month + int(key) // (type_count * category_count)),
+                types.values[int(key) // category_count % type_count],
+                categories.values[int(key) % category_count],
+                float(total),
+            )
+            for key, total in zip(unique_keys, totals)
+        ]
+
+    def totals_by_type(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> List[Tuple[str, float]]:
+        """Total amount per transaction type, transfers excluded."""
+
+        columns, types, _ = self._current()
+        selected = (
+            (columns.days >= _day_number(start_date))
+            & (columns.days <= _day_number(end_date))
+            & ~columns.is_transfer
+        )
+        totals = np.bincount(
+            columns.type_codes[selected],
+            weights=columns.amounts[selected],
+            minlength=len(types.values),
+        )
+        present = np.bincount(columns.type_codes[selected], minlength=len(types.values))
+        return [
+            (types.values[code], float(totals[code]))
+            for code in np.flatnonzero(present)
+        ]
+
+    def stats(self) -> Dict[str, object]:
+        columns = self._columns
+        return {
+            "enabled": self.enabled,
+            "version": self._version,
+            "rows": len(columns.ids) if columns is not None else 0,
+            "allocations": len(columns.alloc_rows) if columns is not None else 0,
+            "bytes": columns.nbytes if columns is not None else 0,
+        }
+
+
+columnar_engine = ColumnarEngine()
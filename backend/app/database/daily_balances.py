@@ -0,0 +1,148 @@
+"""Per-day prefix-sum index of account and debt balances.
+
+``daily_balance`` keeps one row per entity and day with movement: the day's
+signed delta and the running sum through that day. The balance at any date
+is therefore one primary-key seek ("last row on or before the date"), so a
+history of ``P`` points costs ``P`` seeks per entity regardless of how many
+transactions happened in between.
+
+Writes keep the index exact. The deltas of a batch of transactions are summed
+per entity and day first. Each of those days gets its row (created from the
+previous running sum), and the running sums are then shifted one span at a
+time: the rows between two consecutive touched days all move by the same
+prefix of deltas. Every existing row is updated at most once per batch, so
+importing ``k`` days costs ``O(k log n + n)`` rather than one range
+``UPDATE`` per day.
+"""
+
+import datetime
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from app.database.balance_snapshots import ACCOUNT, DEBT, EntityKey, movement_sql
+from app.model.account import Account
+from app.model.base_model import db
+from app.model.daily_balance import DailyBalance
+from app.model.debt import Debt
+
+# Points per lookup statement, well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK = 2000
+# Transaction ids per movement query; ``movement_sql`` binds them three times.
+_ID_CHUNK = 300
+# Days whose delta cancels out to less than this are dropped on removal.
+_EPSILON = 1e-9
+
+
+def rebuild_daily_balances() -> None:
+    """Recompute the whole index from the transaction table."""
+
+    table = DailyBalance._meta.table_name
+    with db.atomic():
+        db.execute_sql(f'DELETE FROM "{table}"')
+        db.execute_sql(
+            f"WITH movement(day, entity_type, entity_id, amount) AS ({movement_sql('date', '1')}) "
+            f'INSERT INTO "{table}" (entity_type, entity_id, day, amount, cumulative_amount) '
+            "SELECT entity_type, entity_id, day, SUM(amount), "
+            "SUM(SUM(amount)) OVER (PARTITION BY entity_type, entity_id ORDER BY day) "
+            "FROM movement WHERE entity_id IS NOT NULL GROUP BY entity_type, entity_id, day"
+        )
+
+
+def apply_daily_balances(transaction_ids: Iterable[int], sign: int = 1) -> None:
+    """Add (``sign=1``) or remove (``sign=-1``) transactions from the index.
+
+    Same contract as ``apply_transaction_rollup``: call with ``-1`` before a
+    transaction changes and with ``1`` after, in the same database
+    transaction.
+    """
+
+    ids = [int(transaction_id) for transaction_id in transaction_ids]
+    if not ids:
+        return
+
+    deltas: Dict[Tuple[str, int], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    factor = 1 if sign >= 0 else -1
+    for start in range(0, len(ids), _ID_CHUNK):
+        chunk = ids[start:start + _ID_CHUNK]
+        placeholders = ", ".join("?" for _ in chunk)
+        for day, entity_type, entity_id, amount in db.execute_sql(
+            movement_sql("date", f"id IN ({placeholders})"), chunk * 3
+        ):
+            if entity_id is not None:
+                deltas[(entity_type, entity_id)][day] += float(amount or 0) * factor
+
+    created, moved, shifted, emptied = [], [], [], []
+    for key, by_day in deltas.items():
+        days = sorted(by_day)
+        running = 0.0
+        for index, day in enumerate(days):
+            running += by_day[day]
+            created.append((*key, day, *key, day))
+            moved.append((by_day[day], *key, day))
+            following = days[index + 1] if index + 1 < len(days) else "9999-12-31"
+            shifted.append((running, *key, day, following))
+            emptied.append((*key, day, _EPSILON))
+
+    table = DailyBalance._meta.table_name
+    entity = "entity_type = ? AND entity_id = ?"
+    cursor = db.cursor()
+    # Missing days start from the previous running sum; none of the rows
+    # has been shifted yet, so that sum is still the old one.
+    cursor.executemany(
+        f'INSERT INTO "{table}" (entity_type, entity_id, day, amount, cumulative_amount) '
+        "VALUES (?, ?, ?, 0, COALESCE((SELECT cumulative_amount "
+        f'FROM "{table}" WHERE {entity} AND day < ? ORDER BY day DESC LIMIT 1), 0)) '
+        "ON CONFLICT DO NOTHING",
+        created,
+    )
+    cursor.executemany(
+        f'UPDATE "{table}" SET amount = amount + ? WHERE {entity} AND day = ?',
+        moved,
+    )
+    cursor.executemany(
+        f'UPDATE "{table}" SET cumulative_amount = cumulative_amount + ? '
+        f"WHERE {entity} AND day >= ? AND day < ?",
+        shifted,
+    )
+    if sign < 0:
+        cursor.executemany(
+            f'DELETE FROM "{table}" WHERE {entity} AND day = ? AND ABS(amount) < ?',
+            emptied,
+        )
+
+
+def delete_entity_daily_balances(entity_type: str, entity_id: int) -> None:
+    DailyBalance.delete().where(
+        (DailyBalance.entity_type == entity_type) & (DailyBalance.entity_id == entity_id)
+    ).execute()
+
+
+def cumulative_amounts_on(days: Sequence[datetime.date]) -> List[Dict[EntityKey, float]]:
+    """Cumulative movement per existing account and debt on each given day."""
+
+    table = DailyBalance._meta.table_name
+    entities = (
+        f"SELECT '{ACCOUNT}' AS entity_type, id AS entity_id FROM \"{Account._meta.table_name}\" "
+        f"UNION ALL SELECT '{DEBT}', id FROM \"{Debt._meta.table_name}\""
+    )
+    results: List[Dict[EntityKey, float]] = [{} for _ in days]
+    for start in range(0, len(days), _LOOKUP_CHUNK):
+        chunk = days[start:start + _LOOKUP_CHUNK]
+        values = ", ".join("(?, ?)" for _ in chunk)
+        params: List[object] = []
+        for offset, day in enumerate(chunk):
+            params.extend((start + offset, day.isoformat()))
+        rows = db.execute_sql(
+            f"WITH points(idx, day) AS (VALUES {values}), entities AS ({entities}) "
+            "SELECT points.idx, entities.entity_type, entities.entity_id, "
+            f'(SELECT cumulative_amount FROM "{table}" AS balance '
+            "WHERE balance.entity_type = entities.entity_type "
+            "AND balance.entity_id = entities.entity_id AND balance.day <= points.day "
+            "ORDER BY balance.day DESC LIMIT 1) "
+            "FROM points CROSS JOIN entities",
+            params,
+        )
+        for index, entity_type, entity_id, amount in rows:
+            if amount is not None:
+                results[index][(entity_type, entity_id)] = float(amount)
+    return results
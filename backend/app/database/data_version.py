@@ -0,0 +1,61 @@
+"""Process-wide counter that changes whenever committed data changes."""
+
+import threading
+from typing import Optional, Tuple
+
+
+class DataVersion:
+    """Monotonic version number bumped after each committed write.
+
+    Writes that modify or delete existing transactions (rather than only
+    appending new ones) call ``mark_rewrite`` inside their transaction; the
+    next ``bump`` then also advances ``rewrite_epoch``, so append-only caches
+    know when they must reload instead of extending.
+
+    The writer brackets each transaction with ``begin_write`` and
+    ``end_write``. ``stable_value`` is None in between, because a reader may
+    already see the new rows while ``value`` still names the old state.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0
+        self._rewrite_epoch = 0
+        self._pending_rewrite = False
+        self._writing = 0
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> Tuple[int, int]:
+        with self._lock:
+            return self._value, self._rewrite_epoch
+
+    def stable_value(self) -> Optional[int]:
+        with self._lock:
+            return None if self._writing else self._value
+
+    def begin_write(self) -> None:
+        with self._lock:
+            self._writing += 1
+
+    def end_write(self) -> int:
+        with self._lock:
+            self._writing -= 1
+        return self.bump()
+
+    def mark_rewrite(self) -> None:
+        with self._lock:
+            self._pending_rewrite = True
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            if self._pending_rewrite:
+                self._rewrite_epoch += 1
+                self._pending_rewrite = False
+            return self._value
+
+
+data_version = DataVersion()
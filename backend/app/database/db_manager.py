@@ -1,15 +1,25 @@
 """Helpers for initializing and seeding the application database."""
 
 import json
+import logging
 
 from peewee import OperationalError
 
+from app.database.migrations import Migration, apply_migrations
+from app.database.balance_snapshots import rebuild_balance_snapshots
+from app.database.budget_periods import backfill_period_bounds
+from app.database.daily_balances import rebuild_daily_balances
+from app.database.rollup import rebuild_monthly_rollup
+from app.database.search import search_index
 from app.model.account import Account
+from app.model.balance_snapshot import BalanceSnapshot
 from app.model.base_model import db
 from app.model.budget_entry import BudgetEntry
 from app.model.budget_rule import BudgetRule
+from app.model.daily_balance import DailyBalance
 from app.model.debt import Debt
 from app.model.goal import Goal
+from app.model.monthly_rollup import MonthlyRollup
 from app.model.parameter import Parameter
 from app.model.portfolio_asset import PortfolioAsset
 from app.model.recurring_transaction import RecurringTransaction
@@ -17,8 +27,11 @@ from app.model.tag import Tag
 from app.model.trade import Trade
 from app.model.transaction import Transaction
 from app.model.transaction_split import TransactionSplit
+from app.model.transaction_search import TransactionSearch
 from app.model.transaction_tag import TransactionTag
 
+logger = logging.getLogger(__name__)
+
 # Every model that requires a table created on startup.
 MODELS = [
     Transaction,
@@ -34,6 +47,9 @@ MODELS = [
     Account,
     Parameter,
     BudgetRule,
+    MonthlyRollup,
+    BalanceSnapshot,
+    DailyBalance,
 ]
 
 
@@ -177,6 +193,17 @@ def ensure_savings_category_inheritance() -> None:
             parameter.save()
 
 
+def ensure_secondary_indexes() -> None:
+    """Create the indexes declared in each model's ``Meta.indexes``.
+
+    Runs after the column helpers so that databases created before a column
+    existed get the column first and the index afterwards.
+    """
+
+    for model in MODELS:
+        model._schema.create_indexes(safe=True)
+
+
 def ensure_transaction_budget_link() -> None:
     """Guarantee transactions can reference a budget entry when required."""
 
@@ -189,6 +216,175 @@ def ensure_transaction_budget_link() -> None:
         )
 
 
+def _search_categories_sql(category_ref: str, transaction_ref: str) -> str:
+    """SQL expression with a transaction's category plus its split categories."""
+
+    return (
+        f"trim(coalesce({category_ref}, '') || ' ' || coalesce("
+        "(SELECT group_concat(category, ' ') FROM \"transactionsplit\""
+        f" WHERE transaction_id = {transaction_ref}), ''))"
+    )
+
+
+def _search_tags_sql(transaction_ref: str) -> str:
+    """SQL expression with the space separated tag names of a transaction."""
+
+    return (
+        "coalesce((SELECT group_concat(t.name, ' ') FROM \"transactiontag\" AS tt"
+        ' JOIN "tag" AS t ON t.id = tt.tag_id'
+        f" WHERE tt.transaction_id = {transaction_ref}), '')"
+    )
+
+
+def _split_parent_categories_sql(row_ref: str) -> str:
+    """Category expression for the parent transaction of a split trigger row."""
+
+    return _search_categories_sql(
+        f'(SELECT category FROM "transaction" WHERE id = {row_ref}.transaction_id)',
+        f"{row_ref}.transaction_id",
+    )
+
+
+TRANSACTION_SEARCH_TRIGGERS = {
+    "transaction_search_ai": f"""
+        AFTER INSERT ON "transaction" BEGIN
+            INSERT INTO transaction_search (rowid, description, category, tags)
+            VALUES (new.id, new.description, {_search_categories_sql("new.category", "new.id")},
+                    {_search_tags_sql("new.id")});
+        END""",
+    "transaction_search_au": f"""
+        AFTER UPDATE OF description, category ON "transaction" BEGIN
+            UPDATE transaction_search
+            SET description = new.description,
+                category = {_search_categories_sql("new.category", "new.id")}
+            WHERE rowid = new.id;
+        END""",
+    "transaction_search_ad": """
+        AFTER DELETE ON "transaction" BEGIN
+            DELETE FROM transaction_search WHERE rowid = old.id;
+        END""",
+    "transaction_search_split_ai": f"""
+        AFTER INSERT ON "transactionsplit" BEGIN
+            UPDATE transaction_search
+            SET category = {_split_parent_categories_sql("new")}
+            WHERE rowid = new.transaction_id;
+        END""",
+    "transaction_search_split_ad": f"""
+        AFTER DELETE ON "transactionsplit" BEGIN
+            UPDATE transaction_search
+            SET category = {_split_parent_categories_sql("old")}
+            WHERE rowid = old.transaction_id;
+        END""",
+    "transaction_search_tag_ai": f"""
+        AFTER INSERT ON "transactiontag" BEGIN
+            UPDATE transaction_search
+            SET tags = {_search_tags_sql("new.transaction_id")}
+            WHERE rowid = new.transaction_id;
+        END""",
+    "transaction_search_tag_ad": f"""
+        AFTER DELETE ON "transactiontag" BEGIN
+            UPDATE transaction_search
+            SET tags = {_search_tags_sql("old.transaction_id")}
+            WHERE rowid = old.transaction_id;
+        END""",
+    "transaction_search_tag_au": f"""
+        AFTER UPDATE OF name ON "tag" BEGIN
+            UPDATE transaction_search
+            SET tags = {_search_tags_sql("transaction_search.rowid")}
+            WHERE rowid IN (
+                SELECT transaction_id FROM "transactiontag" WHERE tag_id = new.id
+            );
+        END""",
+}
+
+
+def ensure_transaction_search_index() -> None:
+    """Create the FTS5 search index and its sync triggers, backfilling once.
+
+    Everything runs in one savepoint, so a failure leaves neither a table
+    without triggers nor a half-filled index. The migration still counts as
+    applied, but ``initialize_database`` calls this again on every start
+    while ``search_index.available`` is false, so the index is retried.
+    """
+
+    try:
+        with db.atomic():
+            if not TransactionSearch.table_exists():
+                TransactionSearch.create_table()
+                db.execute_sql(
+                    "INSERT INTO transaction_search (rowid, description, category, tags) "
+                    f'SELECT tx.id, tx.description, {_search_categories_sql("tx.category", "tx.id")}, '
+                    f'{_search_tags_sql("tx.id")} FROM "transaction" AS tx'
+                )
+
+            for name, body in TRANSACTION_SEARCH_TRIGGERS.items():
+                db.execute_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    except OperationalError as exc:
+        # SQLite builds without FTS5 keep working: the transaction search
+        # falls back to ``search_prefix_match`` while the index is missing.
+        search_index.available = False
+        logger.warning("Full-text search index unavailable: %s", exc)
+    else:
+        search_index.available = True
+
+
+def ensure_monthly_rollup() -> None:
+    """Create the monthly aggregate table and fill it from existing rows."""
+
+    MonthlyRollup._schema.create_table(safe=True)
+    rebuild_monthly_rollup()
+
+
+def ensure_balance_snapshots() -> None:
+    """Create the month-end balance snapshot table and backfill it."""
+
+    BalanceSnapshot._schema.create_table(safe=True)
+    rebuild_balance_snapshots()
+
+
+def ensure_daily_balances() -> None:
+    """Create the per-day balance index and backfill it."""
+
+    DailyBalance._schema.create_table(safe=True)
+    rebuild_daily_balances()
+
+
+def ensure_budget_entry_periods() -> None:
+    """Add the persisted budget period columns, index them and backfill them."""
+
+    table_name = BudgetEntry._meta.table_name
+    existing_columns = _existing_columns(table_name)
+
+    if "period_start" not in existing_columns:
+        db.execute_sql(f'ALTER TABLE "{table_name}" ADD COLUMN period_start DATE')
+
+    if "period_end" not in existing_columns:
+        db.execute_sql(f'ALTER TABLE "{table_name}" ADD COLUMN period_end DATE')
+
+    db.execute_sql(
+        f'CREATE INDEX IF NOT EXISTS "{table_name}_period_end_period_start" '
+        f'ON "{table_name}" (period_end, period_start)'
+    )
+    backfill_period_bounds()
+
+
+def ensure_budget_entry_series() -> None:
+    """Add the rollover series key and the index used to find expired recurring entries."""
+
+    table_name = BudgetEntry._meta.table_name
+    if "series_id" not in _existing_columns(table_name):
+        db.execute_sql(f'ALTER TABLE "{table_name}" ADD COLUMN series_id INTEGER')
+
+    db.execute_sql(
+        f'CREATE UNIQUE INDEX IF NOT EXISTS "{table_name}_series_id_period_start" '
+        f'ON "{table_name}" (series_id, period_start)'
+    )
+    db.execute_sql(
+        f'CREATE INDEX IF NOT EXISTS "{table_name}_is_recurring_period_end" '
+        f'ON "{table_name}" (is_recurring, period_end)'
+    )
+
+
 def seed_initial_budget_rules() -> None:
     """Create the default budget rules if the table is empty."""
 
@@ -295,27 +491,61 @@ def ensure_transfer_transaction_type() -> None:
         )
 
 
+def create_base_tables() -> None:
+    """Create every model table; indexes come later in ensure_secondary_indexes."""
+
+    for model in MODELS:
+        model._schema.create_table(safe=True)
+
+
+def ensure_legacy_columns() -> None:
+    """Add the columns introduced before schema versioning existed."""
+
+    ensure_transaction_enhancements()
+    ensure_budget_entry_links()
+    ensure_budget_entry_enhancements()
+    ensure_account_interest_columns()
+    ensure_portfolio_asset_enhancements()
+    ensure_transaction_budget_link()
+
+
+def seed_default_data() -> None:
+    """Seed default rules and parameters on empty databases."""
+
+    ensure_savings_category_inheritance()
+    seed_initial_budget_rules()
+    seed_initial_parameters()
+    ensure_transfer_transaction_type()
+
+
+# Ordered schema steps. Append new steps with the next version number; never
+# renumber or edit a step that has already shipped.
+MIGRATIONS = [
+    Migration(1, "create base tables", create_base_tables),
+    Migration(2, "add legacy columns", ensure_legacy_columns),
+    Migration(3, "seed default data", seed_default_data),
+    Migration(4, "secondary indexes", ensure_secondary_indexes),
+    Migration(5, "transaction full-text search", ensure_transaction_search_index),
+    Migration(6, "monthly transaction rollup", ensure_monthly_rollup),
+    Migration(7, "month-end balance snapshots", ensure_balance_snapshots),
+    Migration(8, "daily balance index", ensure_daily_balances),
+    Migration(9, "budget entry period bounds", ensure_budget_entry_periods),
+    Migration(10, "budget entry rollover series", ensure_budget_entry_series),
+]
+
+
 def initialize_database() -> None:
-    """Connect to the database, create tables, and seed initial data."""
+    """Connect to the database and apply any pending schema migrations."""
 
     try:
         with db.connection_context():
-            print("Database connection opened.")
-
-            db.create_tables(MODELS, safe=True)
-            print("Tables created successfully (if they didn't exist).")
-
-            ensure_transaction_enhancements()
-            ensure_budget_entry_links()
-            ensure_budget_entry_enhancements()
-            ensure_account_interest_columns()
-            ensure_portfolio_asset_enhancements()
-            ensure_transaction_budget_link()
-            ensure_savings_category_inheritance()
-            seed_initial_budget_rules()
-            seed_initial_parameters()
-            ensure_transfer_transaction_type()
-
+            search_index.available = False
+            applied = apply_migrations(MIGRATIONS)
+            if applied:
+                print(f"Database migrated to version {applied[-1].version}.")
+            if not search_index.available:
+                # Also retries an index a previous start could not build.
+                ensure_transaction_search_index()
             print("Database initialization complete.")
     except OperationalError as exc:
         print(f"Database operational error during initialization: {exc}")
@@ -324,8 +554,9 @@ def initialize_database() -> None:
 
 
 def close_db() -> None:
-    """Close the database connection when the server stops."""
+    """Close every pooled database connection when the server stops."""
 
     if not db.is_closed():
         db.close()
-        print("Database connection closed.")
+    db.close_all()
+    print("Database connections closed.")
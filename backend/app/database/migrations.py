@@ -0,0 +1,65 @@
+"""Versioned schema migration runner backed by a ``schema_version`` table."""
+
+from typing import Callable, List, NamedTuple
+
+from peewee import OperationalError
+
+from app.model.base_model import db
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+
+class Migration(NamedTuple):
+    """A single ordered schema step; ``apply`` must be idempotent."""
+
+    version: int
+    name: str
+    apply: Callable[[], None]
+
+
+def get_schema_version() -> int:
+    """Return the applied schema version, or 0 for an unversioned database."""
+
+    try:
+        row = db.execute_sql(
+            f'SELECT version FROM "{SCHEMA_VERSION_TABLE}" LIMIT 1'
+        ).fetchone()
+    except OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def _set_schema_version(version: int) -> None:
+    db.execute_sql(
+        f'CREATE TABLE IF NOT EXISTS "{SCHEMA_VERSION_TABLE}" '
+        "(version INTEGER NOT NULL)"
+    )
+    db.execute_sql(f'DELETE FROM "{SCHEMA_VERSION_TABLE}"')
+    db.execute_sql(
+        f'INSERT INTO "{SCHEMA_VERSION_TABLE}" (version) VALUES (?)', (version,)
+    )
+
+
+def apply_migrations(migrations: List[Migration]) -> List[Migration]:
+    """Apply every migration newer than the stored version, in order.
+
+    A fully migrated database costs a single version read. Each pending step
+    runs in its own transaction together with the version bump, so a failure
+    leaves the database at the last completed version.
+    """
+
+    ordered = sorted(migrations, key=lambda migration: migration.version)
+    current = get_schema_version()
+    if not ordered or current >= ordered[-1].version:
+        return []
+
+    applied: List[Migration] = []
+    for migration in ordered:
+        if migration.version <= current:
+            continue
+        with db.atomic():
+            migration.apply()
+            _set_schema_version(migration.version)
+        print(f"Applied migration {migration.version:03d}: {migration.name}")
+        applied.append(migration)
+    return applied
@@ -0,0 +1,70 @@
+"""Maintenance of the ``monthly_rollup`` aggregate table.
+
+Each transaction contributes one allocation per split (or one for the whole
+amount when it has no splits), mirroring
+``AppController._iter_transaction_allocations``. Reports read these sums so
+their cost grows with the number of months and categories, not rows.
+"""
+
+from typing import Iterable
+
+from app.model.base_model import db
+from app.model.monthly_rollup import MonthlyRollup
+from app.model.transaction import Transaction
+from app.model.transaction_split import TransactionSplit
+
+_ROLLUP_KEY = "month, account_id, type, category, is_transfer"
+# Transaction ids per statement, well below SQLite's bound-parameter limit.
+_ID_CHUNK = 500
+
+
+def _allocations_sql(where: str, sign: str = "1") -> str:
+    return (
+        "SELECT strftime('%Y-%m', tx.date), tx.account_id, tx.type, "
+        "COALESCE(split.category, tx.category), COALESCE(tx.is_transfer, 0), "
+        f"{sign} * SUM(COALESCE(split.amount, tx.amount)), {sign} * COUNT(*) "
+        f'FROM "{Transaction._meta.table_name}" AS tx '
+        f'LEFT JOIN "{TransactionSplit._meta.table_name}" AS split '
+        "ON split.transaction_id = tx.id "
+        f"WHERE {where} "
+        "GROUP BY 1, 2, 3, 4, 5"
+    )
+
+
+def rebuild_monthly_rollup() -> None:
+    """Recompute the whole rollup table from transactions and splits."""
+
+    table = MonthlyRollup._meta.table_name
+    with db.atomic():
+        db.execute_sql(f'DELETE FROM "{table}"')
+        db.execute_sql(
+            f'INSERT INTO "{table}" ({_ROLLUP_KEY}, total_amount, entry_count) '
+            + _allocations_sql("1")
+        )
+
+
+def apply_transaction_rollup(transaction_ids: Iterable[int], sign: int = 1) -> None:
+    """Add (``sign=1``) or remove (``sign=-1``) transactions from the rollup.
+
+    Call with ``-1`` before a transaction or its splits change and with ``1``
+    once the new state is written, inside the same database transaction.
+    """
+
+    ids = [int(transaction_id) for transaction_id in transaction_ids]
+    if not ids:
+        return
+
+    table = MonthlyRollup._meta.table_name
+    for start in range(0, len(ids), _ID_CHUNK):
+        chunk = ids[start:start + _ID_CHUNK]
+        placeholders = ", ".join("?" for _ in chunk)
+        db.execute_sql(
+            f'INSERT INTO "{table}" ({_ROLLUP_KEY}, total_amount, entry_count) '
+            + _allocations_sql(f"tx.id IN ({placeholders})", "1" if sign >= 0 else "-1")
+            + f" ON CONFLICT ({_ROLLUP_KEY}) DO UPDATE SET "
+            "total_amount = total_amount + excluded.total_amount, "
+            "entry_count = entry_count + excluded.entry_count",
+            chunk,
+        )
+    if sign < 0:
+        db.execute_sql(f'DELETE FROM "{table}" WHERE entry_count <= 0')
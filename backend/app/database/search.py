@@ -0,0 +1,61 @@
+"""Transaction text search shared by the FTS5 index and its fallback filter.
+
+Both paths match the same way: every word of the query must be the prefix of
+a word in the description, the categories (including splits) or the tags,
+ignoring case and accents. "mercado" therefore does not find "Supermercado",
+while "super" or "cafe" find "Supermercado" and "Café".
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+from app.model.base_model import db
+
+_WORD = re.compile(r"\w+")
+
+
+def search_tokens(text: Optional[str]) -> List[str]:
+    """Lower-case, accent-free words of ``text``, as unicode61 splits them."""
+
+    if not text:
+        return []
+    normalized = (
+        unicodedata.normalize("NFD", str(text))
+        .encode("ascii", "ignore")
+        .decode("ascii")
+        .lower()
+    )
+    return _WORD.findall(normalized)
+
+
+def fts_expression(tokens: List[str]) -> str:
+    """FTS5 MATCH expression requiring every token as a word prefix."""
+
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _prefix_match(query: Optional[str], *texts: Optional[str]) -> bool:
+    words = [word for text in texts for word in search_tokens(text)]
+    return all(
+        any(word.startswith(token) for word in words)
+        for token in (query or "").split()
+    )
+
+
+# Registered on every pooled connection for the fallback filter.
+db.register_function(_prefix_match, "search_prefix_match", -1)
+
+
+class SearchIndexStatus:
+    """Whether the FTS5 index is complete, checked once at startup.
+
+    ``ensure_transaction_search_index`` sets it; listings read it instead of
+    querying ``sqlite_master`` on every request.
+    """
+
+    def __init__(self) -> None:
+        self.available = False
+
+
+search_index = SearchIndexStatus()
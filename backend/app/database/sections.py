@@ -0,0 +1,199 @@
+"""Concurrent computation of independent report sections.
+
+A report such as the dashboard is made of sections that only read the
+database. ``SectionRunner`` evaluates them on a small shared thread pool; each
+worker checks out its own ``query_only`` connection and wraps the section in a
+read transaction, so every section sees one consistent WAL snapshot.
+
+Each section also records the ``data_version`` its snapshot shows: the value
+read just before and just after the snapshot is opened, or None if a write
+was in progress or landed meanwhile. A batch is only returned when every
+section shows the same version; otherwise it is recomputed, and after
+``MAX_ATTEMPTS`` batches the sections run one after another inside a single
+read transaction, which cannot mix two states of the data.
+
+Per-section wall times are recorded so the critical path of a report can be
+inspected (``snapshot``) or sent back as a ``Server-Timing`` header.
+``iter_async`` yields sections in completion order for streamed responses;
+each streamed section is snapshot-consistent on its own, but since earlier
+ones are already sent the batch is not recomputed when a write lands.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from app.database.data_version import data_version
+from app.database.session import connection_scope
+from app.model.base_model import DB_POOL_SIZE, db
+
+# Workers share the connection pool with request threads, so keep them below
+# its size to leave room for the request that is waiting on the sections.
+SECTION_WORKERS = int(
+    os.environ.get("NEBULA_SECTION_WORKERS", str(max(1, min(4, DB_POOL_SIZE // 2))))
+)
+
+# Parallel batches tried before the sections are read in one transaction.
+MAX_ATTEMPTS = 3
+
+SectionTasks = Dict[str, Callable[[], Any]]
+SectionTimings = Dict[str, float]
+SectionOutcome = Tuple[Any, float, Optional[int]]
+
+
+class SectionRunner:
+    """Runs named read-only callables concurrently on a bounded pool."""
+
+    def __init__(self, max_workers: int = SECTION_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="nebula-section"
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._retries = 0
+
+    def _timed(self, name: str, func: Callable[[], Any]) -> SectionOutcome:
+        self._local.worker = True
+        started = time.perf_counter()
+        with connection_scope(read_only=True):
+            with db.atomic():
+                version = self._open_snapshot()
+                result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        self._record(name, elapsed)
+        return result, elapsed, version
+
+    def _timed_together(self, tasks: SectionTasks) -> Dict[str, SectionOutcome]:
+        self._local.worker = True
+        outcomes = {}
+        with connection_scope(read_only=True):
+            with db.atomic():
+                version = self._open_snapshot()
+                for name, func in tasks.items():
+                    started = time.perf_counter()
+                    result = func()
+                    elapsed = (time.perf_counter() - started) * 1000
+                    self._record(name, elapsed)
+                    outcomes[name] = (result, elapsed, version)
+        return outcomes
+
+    @staticmethod
+    def _open_snapshot() -> Optional[int]:
+        # The read transaction takes its snapshot on the first read.
+        before = data_version.stable_value()
+        db.execute_sql("SELECT count(*) FROM sqlite_master")
+        after = data_version.stable_value()
+        return before if before == after else None
+
+    def _record(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                name, {"runs": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+            )
+            stats["runs"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["last_ms"] = elapsed_ms
+
+    def _must_run_inline(self) -> bool:
+        # Sections scheduled from a section worker would wait on the pool they
+        # occupy, and sections of an open transaction must see its changes.
+        return getattr(self._local, "worker", False) or (
+            not db.is_closed() and db.in_transaction()
+        )
+
+    def _submit(self, tasks: SectionTasks) -> Dict[str, "Future[SectionOutcome]"]:
+        return {
+            name: self._executor.submit(self._timed, name, func)
+            for name, func in tasks.items()
+        }
+
+    @staticmethod
+    def _split(outcomes: Dict[str, SectionOutcome]) -> Tuple[Dict[str, Any], SectionTimings]:
+        results = {name: outcome[0] for name, outcome in outcomes.items()}
+        timings = {name: outcome[1] for name, outcome in outcomes.items()}
+        return results, timings
+
+    def _consistent(self, outcomes: Dict[str, SectionOutcome]) -> bool:
+        versions = {outcome[2] for outcome in outcomes.values()}
+        if len(versions) <= 1 and None not in versions:
+            return True
+        with self._lock:
+            self._retries += 1
+        return False
+
+    def run(self, tasks: SectionTasks) -> Tuple[Dict[str, Any], SectionTimings]:
+        """Evaluate ``tasks`` and return ``(results, timings_ms)`` by name."""
+
+        if self._must_run_inline():
+            outcomes = {}
+            for name, func in tasks.items():
+                started = time.perf_counter()
+                result = func()
+                outcomes[name] = (result, (time.perf_counter() - started) * 1000, None)
+                self._record(name, outcomes[name][1])
+            return self._split(outcomes)
+
+        for _ in range(MAX_ATTEMPTS):
+            futures = self._submit(tasks)
+            outcomes = {name: future.result() for name, future in futures.items()}
+            if self._consistent(outcomes):
+                return self._split(outcomes)
+        return self._split(self._executor.submit(self._timed_together, tasks).result())
+
+    async def run_async(self, tasks: SectionTasks) -> Tuple[Dict[str, Any], SectionTimings]:
+        """Like ``run`` but awaits the workers instead of blocking a thread."""
+
+        for _ in range(MAX_ATTEMPTS):
+            futures = self._submit(tasks)
+            outcomes = {
+                name: await asyncio.wrap_future(future) for name, future in futures.items()
+            }
+            if self._consistent(outcomes):
+                return self._split(outcomes)
+        future = self._executor.submit(self._timed_together, tasks)
+        return self._split(await asyncio.wrap_future(future))
+
+    async def iter_async(self, tasks: SectionTasks) -> AsyncIterator[Tuple[str, Any, float]]:
+        """Yield ``(name, result, elapsed_ms)`` for each task as soon as it finishes."""
+
+        pending = {
+            asyncio.wrap_future(future): name for name, future in self._submit(tasks).items()
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    result, elapsed, _ = future.result()
+                    yield name, result, elapsed
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            sections = {
+                name: {
+                    "runs": stats["runs"],
+                    "avg_ms": stats["total_ms"] / stats["runs"],
+                    "max_ms": stats["max_ms"],
+                    "last_ms": stats["last_ms"],
+                }
+                for name, stats in self._stats.items()
+            }
+            return {"workers": self.max_workers, "retries": self._retries, "sections": sections}
+
+
+section_runner = SectionRunner()
+
+
+def server_timing_header(timings: SectionTimings) -> str:
+    """Format section timings as a ``Server-Timing`` header value."""
+
+    return ", ".join(f"{name};dur={elapsed:.1f}" for name, elapsed in timings.items())
@@ -0,0 +1,85 @@
+"""Request-scoped database sessions on top of the pooled SQLite database."""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from app.model.base_model import db
+
+
+class PoolMetrics:
+    """Thread-safe counters describing how long callers wait for a connection."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._acquisitions = 0
+            self._total_wait = 0.0
+            self._max_wait = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._acquisitions += 1
+            self._total_wait += seconds
+            if seconds > self._max_wait:
+                self._max_wait = seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            acquisitions = self._acquisitions
+            total_wait = self._total_wait
+            max_wait = self._max_wait
+
+        return {
+            "pool_size": db._max_connections,
+            "in_use": len(db._in_use),
+            "idle": len(db._connections),
+            "acquisitions": acquisitions,
+            "total_wait_ms": total_wait * 1000,
+            "avg_wait_ms": (total_wait / acquisitions * 1000) if acquisitions else 0.0,
+            "max_wait_ms": max_wait * 1000,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+@contextmanager
+def connection_scope(read_only: bool = False):
+    """Hold a pooled connection for the current thread during the block.
+
+    Peewee keeps connection state per thread, so this must run in the thread
+    that executes the queries. Nested scopes reuse the outer connection.
+    ``read_only`` flips the checked-out connection to ``query_only`` so reads
+    can never take the write lock away from the writer thread.
+    """
+
+    if not db.is_closed():
+        yield
+        return
+
+    started = time.perf_counter()
+    db.connect()
+    pool_metrics.record_wait(time.perf_counter() - started)
+    try:
+        db.execute_sql(f"PRAGMA query_only = {1 if read_only else 0}")
+        yield
+    finally:
+        if not db.is_closed():
+            db.close()
+
+
+def bind_connection(func: Callable, read_only: bool = False) -> Callable:
+    """Wrap a synchronous callable so it runs inside ``connection_scope``."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with connection_scope(read_only=read_only):
+            return func(*args, **kwargs)
+
+    return wrapper
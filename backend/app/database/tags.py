@@ -0,0 +1,150 @@
+"""Set-based resolution of tag names and transaction tag links.
+
+Tags are resolved for a whole batch of transactions at once: the missing
+names are created with one ``INSERT OR IGNORE`` per chunk and every id is read
+back with one ``IN`` query per chunk, instead of a ``get_or_create`` per tag
+and transaction.
+
+Names already known are answered by ``tag_dictionary``, an in-process copy of
+the tag table. Tags are never renamed or deleted, so a committed name keeps
+its id for good. The only risk is an id from an insert that was later rolled
+back, since SQLite reuses such ids. The dictionary therefore only loads
+committed rows: it reloads once ``data_version`` has moved past the last tag
+insert, and never from inside a transaction that may have inserted tags.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from peewee import chunked
+
+from app.database.data_version import data_version
+from app.model.base_model import db
+from app.model.tag import Tag
+from app.model.transaction_tag import TransactionTag
+
+# Rows per statement, well below SQLite's bound-parameter limit.
+_CHUNK = 500
+
+
+class TagDictionary:
+    """Version-invalidated ``name -> id`` map of the tag table."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._loaded_version: Optional[int] = None
+        # Data version current when tags were last inserted; a load taken at
+        # or before it may lack them (or, in the writer, hold uncommitted ones).
+        self._inserted_at = -1
+
+    def reset(self) -> None:
+        """Forget every loaded name, e.g. after switching database files."""
+
+        with self._lock:
+            self._ids = {}
+            self._loaded_version = None
+            self._inserted_at = -1
+
+    def note_insert(self) -> None:
+        """Record that new tags were inserted in the current write."""
+
+        with self._lock:
+            self._inserted_at = data_version.value
+
+    def _current(self) -> Dict[str, int]:
+        version = data_version.value
+        with self._lock:
+            stale = self._loaded_version is None or self._loaded_version <= self._inserted_at
+            if stale and (not db.in_transaction() or self._inserted_at < version):
+                # Replaced, never mutated: readers may hold the previous dict.
+                self._ids = dict(Tag.select(Tag.name, Tag.id).tuples())
+                self._loaded_version = version
+            return self._ids
+
+    def lookup(self, names: Iterable[str]) -> Dict[str, int]:
+        """Ids of the ``names`` known to the dictionary; unknown ones are left out."""
+
+        ids = self._current()
+        return {name: ids[name] for name in names if name in ids}
+
+    def items(self) -> List[Tuple[str, int]]:
+        """Every ``(name, id)`` pair, sorted by name."""
+
+        return sorted(self._current().items())
+
+
+tag_dictionary = TagDictionary()
+
+
+def resolve_tag_ids(names: Iterable[str]) -> Dict[str, int]:
+    """Map each name to its tag id, creating the tags that do not exist."""
+
+    unique = list(dict.fromkeys(names))
+    ids = tag_dictionary.lookup(unique)
+    missing = [name for name in unique if name not in ids]
+    table = Tag._meta.table_name
+    for chunk in chunked(missing, _CHUNK):
+        cursor = db.execute_sql(
+            f'INSERT OR IGNORE INTO "{table}" (name) VALUES '
+            + ", ".join("(?)" for _ in chunk),
+            chunk,
+        )
+        if cursor.rowcount:
+            tag_dictionary.note_insert()
+        ids.update(
+            Tag.select(Tag.name, Tag.id).where(Tag.name.in_(chunk)).tuples()
+        )
+    return ids
+
+
+def insert_tag_links(links: Iterable[Tuple[int, int]]) -> None:
+    """Insert ``(transaction_id, tag_id)`` links, skipping existing ones."""
+
+    table = TransactionTag._meta.table_name
+    for chunk in chunked(links, _CHUNK):
+        params: List[int] = [value for link in chunk for value in link]
+        db.execute_sql(
+            f'INSERT OR IGNORE INTO "{table}" (transaction_id, tag_id) VALUES '
+            + ", ".join("(?, ?)" for _ in chunk),
+            params,
+        )
+
+
+def replace_tag_links(tag_ids: Mapping[int, Sequence[int]]) -> None:
+    """Make each transaction's links match its tag ids, writing only the changes.
+
+    Tags are listed in link id order, which must follow the submitted order.
+    The longest leading run of links already in that order is kept; the links
+    after it are deleted and the remaining tags inserted in order. Appending
+    a tag therefore inserts one link, and the search index triggers only fire
+    for the links rewritten.
+    """
+
+    current: Dict[int, List[Tuple[int, int]]] = {transaction_id: [] for transaction_id in tag_ids}
+    for chunk in chunked(list(tag_ids), _CHUNK):
+        query = (
+            TransactionTag.select(
+                TransactionTag.id, TransactionTag.transaction_id, TransactionTag.tag_id
+            )
+            .where(TransactionTag.transaction_id.in_(chunk))
+            .order_by(TransactionTag.id)
+        )
+        for link_id, transaction_id, tag_id in query.tuples():
+            current[transaction_id].append((link_id, tag_id))
+
+    removed: List[int] = []
+    added: List[Tuple[int, int]] = []
+    for transaction_id, wanted in tag_ids.items():
+        wanted = list(dict.fromkeys(wanted))
+        links = current[transaction_id]
+        kept = 0
+        while kept < min(len(links), len(wanted)) and links[kept][1] == wanted[kept]:
+            kept += 1
+        removed.extend(link_id for link_id, _ in links[kept:])
+        added.extend((transaction_id, tag_id) for tag_id in wanted[kept:])
+
+    for chunk in chunked(removed, _CHUNK):
+        TransactionTag.delete().where(TransactionTag.id.in_(chunk)).execute()
+    # New rowids are above every existing one, so they follow the kept links.
+    insert_tag_links(added)
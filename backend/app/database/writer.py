@@ -0,0 +1,166 @@
+"""Single-writer dispatch with group commit for SQLite mutations.
+
+SQLite allows one writer at a time. Instead of letting every request thread
+fight for the write lock (and wait on ``busy_timeout``), mutations are queued
+to one dedicated thread that owns a writable connection. Whatever is queued
+when the writer wakes up is applied inside a single ``BEGIN IMMEDIATE``
+transaction, each mutation in its own savepoint, so a failing request only
+rolls back its own changes while the rest share one commit (and one fsync).
+The shared ``data_version`` is bumped once the commit has landed, so cached
+responses computed before it are never served afterwards; while a batch is
+open it reports no stable value (see ``SectionRunner``).
+"""
+
+import functools
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.database.data_version import data_version
+from app.database.session import connection_scope
+from app.model.base_model import db
+
+_STOP = object()
+
+
+class WriteDispatcher:
+    """Serialises mutations through one writer thread."""
+
+    def __init__(self, max_batch: int = 64) -> None:
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._writes = 0
+        self._largest_batch = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="nebula-db-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Queue ``func`` for the writer thread and return its future."""
+
+        future: Future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run ``func`` as a write and wait for its committed result.
+
+        Calls made from the writer thread itself, or while the dispatcher is
+        stopped (scripts, the desktop app), execute inline in a transaction.
+        """
+
+        if not self.running or threading.current_thread() is self._thread:
+            with connection_scope():
+                data_version.begin_write()
+                try:
+                    with db.atomic("IMMEDIATE" if db.transaction_depth() == 0 else None):
+                        return func(*args, **kwargs)
+                finally:
+                    data_version.end_write()
+        return self.submit(func, *args, **kwargs).result()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "writes": self._writes,
+                "avg_batch": (self._writes / self._batches) if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+            }
+
+    def _run(self) -> None:
+        with connection_scope():
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    return
+                batch = [item]
+                stop_after = False
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop_after = True
+                        break
+                    batch.append(item)
+                self._commit(batch)
+                if stop_after:
+                    return
+
+    def _commit(self, batch: List[Tuple[Future, Callable, tuple, dict]]) -> None:
+        outcomes: List[Tuple[Future, Any, Optional[BaseException]]] = []
+        data_version.begin_write()
+        try:
+            with db.atomic("IMMEDIATE"):
+                for future, func, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with db.atomic():
+                            result = func(*args, **kwargs)
+                    except Exception as exc:  # pylint: disable=broad-except
+                        outcomes.append((future, None, exc))
+                    else:
+                        outcomes.append((future, result, None))
+        except Exception as exc:  # pylint: disable=broad-except
+            data_version.end_write()
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        data_version.end_write()
+        with self._lock:
+            self._batches += 1
+            self._writes += len(outcomes)
+            self._largest_batch = max(self._largest_batch, len(outcomes))
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+write_dispatcher = WriteDispatcher()
+
+
+def mutates_database(func: Callable) -> Callable:
+    """Mark a read-style endpoint whose handler also writes to the database."""
+
+    func.mutates_database = True
+    return func
+
+
+def dispatch_write(func: Callable) -> Callable:
+    """Wrap a synchronous callable so it runs on the writer thread."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return write_dispatcher.run(func, *args, **kwargs)
+
+    return wrapper
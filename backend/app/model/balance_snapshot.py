@@ -0,0 +1,22 @@
+from peewee import CharField, CompositeKey, FloatField, IntegerField
+
+from .base_model import BaseModel
+
+
+class BalanceSnapshot(BaseModel):
+    """Movimiento acumulado de una cuenta o deuda al cierre de cada mes.
+
+    Para cuentas guarda el flujo neto acumulado desde su saldo inicial; para
+    deudas, los pagos acumulados. Así el saldo de cierre se obtiene sin
+    recorrer el historial y editar saldos base no invalida las filas. Ver
+    ``app.database.balance_snapshots``.
+    """
+
+    month = CharField()
+    entity_type = CharField()
+    entity_id = IntegerField()
+    cumulative_amount = FloatField(default=0.0)
+
+    class Meta:
+        table_name = "balance_snapshot"
+        primary_key = CompositeKey("month", "entity_type", "entity_id")
@@ -1,5 +1,6 @@
 import os
-from peewee import Model, SqliteDatabase
+from peewee import Model
+from playhouse.pool import PooledSqliteDatabase
 
 # --- DEFINICIÓN CENTRAL DE LA BASE DE DATOS ---
 # Construimos una ruta explícita al archivo de la base de datos
@@ -10,21 +11,34 @@ BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'
 # Y esto crea la ruta completa al archivo de la base de datos
 DB_PATH = os.path.join(BACKEND_DIR, 'finanzas.db')
 
+# Tamaño del pool de conexiones y segundos máximos que una petición espera por
+# una conexión libre. Se pueden ajustar con variables de entorno.
+DB_POOL_SIZE = int(os.environ.get("NEBULA_DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = int(os.environ.get("NEBULA_DB_POOL_TIMEOUT", "15"))
+
 # Usamos la ruta explícita y configuramos la base de datos con parámetros que
 # reduzcan los bloqueos de escritura típicos de SQLite cuando se maneja desde
 # múltiples hilos (como FastAPI ejecutándose con varios workers).  El modo WAL
-# permite lecturas concurrentes mientras se realizan escrituras y el timeout
-# extendido da margen a que una operación termine antes de disparar un error
-# `database is locked`.
-db = SqliteDatabase(
+# permite lecturas concurrentes mientras se realizan escrituras y el
+# `busy_timeout` extendido da margen a que una operación termine antes de
+# disparar un error `database is locked`.  Las conexiones se reutilizan desde
+# un pool; peewee guarda la conexión activa por hilo, así que cada hilo que
+# atiende una petición toma su propia conexión del pool y la devuelve al
+# terminar (ver `app.database.session`).  Las escrituras del API pasan por un
+# único hilo escritor que agrupa varios cambios en un mismo commit (ver
+# `app.database.writer`), por eso podemos usar `synchronous=NORMAL`, que en
+# modo WAL no pierde consistencia ante un corte de energía.
+db = PooledSqliteDatabase(
     DB_PATH,
     pragmas={
         "journal_mode": "wal",
         "foreign_keys": 1,
         "cache_size": -64_000,
-        "synchronous": 0,
+        "synchronous": "normal",
+        "busy_timeout": 15_000,
     },
-    timeout=15,
+    max_connections=DB_POOL_SIZE,
+    timeout=DB_POOL_TIMEOUT,
     check_same_thread=False,
 )
 
@@ -1,6 +1,6 @@
 import datetime
 
-from peewee import BooleanField, CharField, DateField, FloatField, ForeignKeyField
+from peewee import BooleanField, CharField, DateField, FloatField, ForeignKeyField, IntegerField
 
 from .base_model import BaseModel
 from .debt import Debt
@@ -23,3 +23,19 @@ class BudgetEntry(BaseModel):
     actual_amount = FloatField(default=0.0)
     goal = ForeignKeyField(Goal, backref="budget_entries", null=True)
     debt = ForeignKeyField(Debt, backref="budget_entries", null=True)
+    # Periodo activo normalizado, calculado al guardar (ver app.database.budget_periods).
+    # Su índice lo crea la migración 9: en bases antiguas las columnas no
+    # existen todavía cuando corre la migración de índices secundarios.
+    period_start = DateField(null=True)
+    period_end = DateField(null=True)
+    # Entrada original de la que se generó este ciclo al renovar un presupuesto
+    # recurrente; (series_id, period_start) es único (migración 10).
+    series_id = IntegerField(null=True)
+
+    class Meta:
+        indexes = (
+            (("start_date",), False),
+            (("due_date",), False),
+            (("type",), False),
+            (("category",), False),
+        )
@@ -0,0 +1,24 @@
+from peewee import CharField, CompositeKey, DateField, FloatField, IntegerField
+
+from .base_model import BaseModel
+
+
+class DailyBalance(BaseModel):
+    """Índice diario de movimientos acumulados por cuenta o deuda.
+
+    Sólo hay fila para los días con movimiento: ``amount`` es el neto del día
+    y ``cumulative_amount`` la suma prefija hasta ese día inclusive, con la
+    misma convención de signos que ``BalanceSnapshot``. El saldo en cualquier
+    fecha es la última fila con ``day`` menor o igual. Ver
+    ``app.database.daily_balances``.
+    """
+
+    entity_type = CharField()
+    entity_id = IntegerField()
+    day = DateField()
+    amount = FloatField(default=0.0)
+    cumulative_amount = FloatField(default=0.0)
+
+    class Meta:
+        table_name = "daily_balance"
+        primary_key = CompositeKey("entity_type", "entity_id", "day")
@@ -0,0 +1,25 @@
+from peewee import BooleanField, CharField, CompositeKey, FloatField, ForeignKeyField, IntegerField
+
+from .account import Account
+from .base_model import BaseModel
+
+
+class MonthlyRollup(BaseModel):
+    """Totales mensuales de transacciones ya repartidos por split.
+
+    Una fila por (mes, cuenta, tipo, categoría, transferencia). Se mantiene
+    de forma incremental desde el controlador y puede reconstruirse con
+    ``app.database.rollup.rebuild_monthly_rollup``.
+    """
+
+    month = CharField()
+    account = ForeignKeyField(Account, backref="monthly_rollups", on_delete="CASCADE")
+    type = CharField()
+    category = CharField()
+    is_transfer = BooleanField(default=False)
+    total_amount = FloatField(default=0.0)
+    entry_count = IntegerField(default=0)
+
+    class Meta:
+        table_name = "monthly_rollup"
+        primary_key = CompositeKey("month", "account", "type", "category", "is_transfer")
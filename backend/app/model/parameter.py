@@ -16,3 +16,6 @@ class Parameter(BaseModel):
     )
     parent = ForeignKeyField("self", backref="children", null=True, on_delete="CASCADE")
     extra_data = TextField(null=True)
+
+    class Meta:
+        indexes = ((("group", "value"), False),)
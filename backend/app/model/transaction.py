@@ -39,3 +39,11 @@ class Transaction(BaseModel):
         null=True,
         column_name="transfer_account_id",
     )
+
+    class Meta:
+        indexes = (
+            (("date", "is_transfer", "type"), False),
+            (("category", "date"), False),
+            (("type", "date"), False),
+            (("amount",), False),
+        )
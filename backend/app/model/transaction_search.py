@@ -0,0 +1,21 @@
+from playhouse.sqlite_ext import FTS5Model, SearchField
+
+from .base_model import db
+
+
+class TransactionSearch(FTS5Model):
+    """Índice de texto completo (FTS5) sobre las transacciones.
+
+    El ``rowid`` coincide con el id de la transacción. Las columnas se
+    mantienen sincronizadas mediante triggers creados en
+    ``ensure_transaction_search_index`` y el tokenizador elimina acentos.
+    """
+
+    description = SearchField()
+    category = SearchField()
+    tags = SearchField()
+
+    class Meta:
+        database = db
+        table_name = "transaction_search"
+        options = {"tokenize": "unicode61 remove_diacritics 2"}
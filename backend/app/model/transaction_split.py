@@ -14,3 +14,6 @@ class TransactionSplit(BaseModel):
     )
     category = CharField()
     amount = FloatField()
+
+    class Meta:
+        indexes = ((("category", "transaction"), False),)
@@ -1,10 +1,17 @@
+import io
 import os
 import sys
 import uvicorn
+import inspect
+import json
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, ConfigDict, field_validator, constr
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator, constr
 import datetime
 from typing import Optional, List, Dict, Any, Literal
 
@@ -28,38 +35,73 @@ def enforce_digit_limit(value: Optional[float], field_name: str) -> Optional[flo
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # --- IMPORTACIONES ---
-from app.controller.app_controller import AppController
+from app.controller.app_controller import DASHBOARD_SECTIONS, AppController
+from app.controller.statement_import import (
+    STATEMENT_FORMATS,
+    detect_statement_format,
+    iter_statement_records,
+)
+from app.controller.response_cache import (
+    cached_json_response,
+    cached_json_response_async,
+    response_cache,
+)
+from app.database.balance_snapshots import refresh_balance_snapshots
+from app.database.columnar import columnar_engine
 from app.database.db_manager import initialize_database, close_db
-from app.model.base_model import db
+from app.database.sections import section_runner, server_timing_header
+from app.database.session import bind_connection, connection_scope, pool_metrics
+from app.database.writer import dispatch_write, mutates_database, write_dispatcher
 
 # --- MANEJO DE LA VIDA DEL SERVIDOR (LIFESPAN) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("INFO:     Server startup: Initializing database...")
     initialize_database()
-    with db.connection_context():
+    with connection_scope():
         controller.process_recurring_transactions()
+        controller.rollover_recurring_budgets()
+        refresh_balance_snapshots()
+        reconciled = controller.reconcile_budget_actuals()
+        if reconciled["updated"]:
+            print(f"INFO:     Reconciled {reconciled['updated']} budget entries with drifted actual amounts.")
+    write_dispatcher.start()
     yield
     print("INFO:     Server shutdown: Closing database connection...")
+    write_dispatcher.stop()
     close_db()
 
+class PooledConnectionRoute(APIRoute):
+    """Ruta que abre y cierra la conexión en el mismo hilo que ejecuta el endpoint.
+
+    Los endpoints síncronos corren en el threadpool de Starlette; peewee guarda
+    la conexión por hilo, así que la sesión debe vivir dentro de ese hilo.
+    Las lecturas usan conexiones `query_only`; los métodos que modifican datos
+    (y los GET marcados con `@mutates_database`) se ejecutan en el hilo
+    escritor, que agrupa las escrituras concurrentes en un solo commit.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            methods = {method.upper() for method in kwargs.get("methods") or ["GET"]}
+            if methods - {"GET", "HEAD"} or getattr(endpoint, "mutates_database", False):
+                endpoint = dispatch_write(endpoint)
+            else:
+                endpoint = bind_connection(endpoint, read_only=True)
+        super().__init__(path, endpoint, **kwargs)
+
+
 # --- Inicialización de la Aplicación ---
 app = FastAPI(lifespan=lifespan)
+app.router.route_class = PooledConnectionRoute
 controller = AppController()
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
 
 
-@app.middleware("http")
-async def peewee_connection_middleware(request, call_next):
-    """Provide an isolated database connection per request."""
-
-    with db.connection_context():
-        response = await call_next(request)
-    return response
-
 # --- MODELOS DE DATOS PARA LA API (PYDANTIC V2) ---
 class AccountModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -146,6 +188,31 @@ class TransactionModel(BaseModel):
         return enforce_digit_limit(value, "amount")
 
 
+class TransactionBatchOperationModel(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    data: Optional[TransactionModel] = None
+    adjust_balance: bool = False
+
+
+class TransactionBatchModel(BaseModel):
+    operations: List[TransactionBatchOperationModel]
+
+
+def validate_import_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Valida una fila importada con las mismas reglas que ``TransactionModel``."""
+
+    try:
+        return TransactionModel.model_validate(record).model_dump()
+    except ValidationError as exc:
+        raise ValueError(
+            "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in exc.errors()
+            )
+        ) from None
+
+
 class BudgetEntryModel(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: int
@@ -448,7 +515,28 @@ class DebtUpdateModel(BaseModel):
 def get_status():
     return {"status": "Backend funcionando correctamente!"}
 
+@app.get("/api/metrics/db-pool")
+def get_db_pool_metrics():
+    return pool_metrics.snapshot()
+
+@app.get("/api/metrics/db-writer")
+def get_db_writer_metrics():
+    return write_dispatcher.snapshot()
+
+@app.get("/api/metrics/response-cache")
+def get_response_cache_metrics():
+    return response_cache.stats()
+
+@app.get("/api/metrics/analytics-engine")
+def get_analytics_engine_metrics():
+    return columnar_engine.stats()
+
+@app.get("/api/metrics/dashboard-sections")
+def get_dashboard_section_metrics():
+    return section_runner.snapshot()
+
 @app.get("/api/accounts", response_model=List[AccountModel])
+@mutates_database
 def get_accounts():
     return controller.get_accounts_data_for_view()
 
@@ -478,7 +566,7 @@ def delete_account(account_id: int):
 
 @app.get("/api/transactions")
 def get_transactions(
-    search: Optional[str] = Query(default=None, description="Texto para buscar en la descripción"),
+    search: Optional[str] = Query(default=None, description="Texto a buscar en descripción, categoría o etiquetas"),
     start_date: Optional[datetime.date] = Query(default=None, description="Fecha inicial del rango"),
     end_date: Optional[datetime.date] = Query(default=None, description="Fecha final del rango"),
     transaction_type: Optional[str] = Query(
@@ -489,7 +577,17 @@ def get_transactions(
         default=None,
         description="Lista de etiquetas separadas por coma para filtrar",
     ),
-    sort_by: Optional[str] = Query(default="date_desc", description="Ordenamiento deseado"),
+    sort_by: Optional[str] = Query(
+        default="date_desc",
+        description="date_desc, date_asc, amount_desc, amount_asc o relevance",
+    ),
+    limit: Optional[int] = Query(
+        default=None, ge=1, le=500, description="Tamaño de página; activa la paginación por cursor"
+    ),
+    cursor: Optional[str] = Query(default=None, description="Cursor opaco devuelto en next_cursor"),
+    include_total: bool = Query(
+        default=False, description="Calcula el total de coincidencias (consulta adicional)"
+    ),
 ):
     filters: Dict[str, Any] = {}
 
@@ -507,8 +605,15 @@ def get_transactions(
         filters["tags"] = [tag.strip() for tag in tags.split(",") if tag.strip()]
     if sort_by:
         filters["sort_by"] = sort_by
+    if limit:
+        filters["limit"] = limit
+        filters["cursor"] = cursor
+        filters["include_total"] = include_total
 
-    return controller.get_transactions_data(filters if filters else None)
+    result = controller.get_transactions_data(filters if filters else None)
+    if isinstance(result, dict) and "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
 
 
 @app.get("/api/recurring-transactions", response_model=List[RecurringTransactionModel])
@@ -521,20 +626,162 @@ def list_tags():
     return controller.get_all_tags()
 
 
+DashboardSection = Literal[tuple(DASHBOARD_SECTIONS)]
+
+
 @app.get("/api/dashboard")
-def get_dashboard(year: int, months: Optional[List[int]] = Query(None)):
+async def get_dashboard(
+    request: Request,
+    year: int,
+    months: Optional[List[int]] = Query(None),
+    net_worth_months: int = Query(12, ge=1, le=600, description="Cierres de mes en la gráfica de patrimonio"),
+    sections: Optional[List[DashboardSection]] = Query(None, description="Secciones a calcular; por defecto todas"),
+):
+    # Las secciones se calculan en paralelo en `section_runner`, cada una con su
+    # propia conexión de lectura; el event loop sólo espera y ensambla.
+    month_values = sorted(set(months)) if months else []
+    section_names = list(dict.fromkeys(sections)) if sections else None
+    key = ("dashboard", year, tuple(month_values), net_worth_months, tuple(section_names or ()))
+    timings = {}
+
+    async def produce():
+        results, section_timings = await section_runner.run_async(
+            controller.dashboard_sections(year, month_values, net_worth_months, section_names)
+        )
+        timings.update(section_timings)
+        return controller.assemble_dashboard(year, month_values, results, section_names)
+
+    response = await cached_json_response_async(request, key, produce)
+    if timings:
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+
+@app.get("/api/dashboard/stream")
+async def stream_dashboard(
+    year: int,
+    months: Optional[List[int]] = Query(None),
+    net_worth_months: int = Query(12, ge=1, le=600),
+    sections: Optional[List[DashboardSection]] = Query(None),
+):
+    """Emite cada sección como una línea NDJSON en cuanto sus lecturas terminan.
+
+    Cada línea es ``{"section": nombre, "data": ..., "elapsed_ms": ...}``, donde
+    ``elapsed_ms`` es el tiempo desde el inicio de la petición.
+    """
+
     month_values = list(months) if months else []
-    return controller.get_dashboard_data(year, month_values)
+    pending = list(dict.fromkeys(sections)) if sections else list(DASHBOARD_SECTIONS)
+    tasks = controller.dashboard_sections(year, month_values, net_worth_months, pending)
+
+    async def lines():
+        started = time.perf_counter()
+        results = {}
+        async for name, result, _ in section_runner.iter_async(tasks):
+            results[name] = result
+            ready = [
+                section for section in pending
+                if all(task in results for task in DASHBOARD_SECTIONS[section])
+            ]
+            for section in ready:
+                pending.remove(section)
+                payload = {
+                    "section": section,
+                    "data": controller.build_dashboard_section(section, year, month_values, results),
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                }
+                yield json.dumps(jsonable_encoder(payload), ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        lines(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache"}
+    )
 
 
 @app.get("/api/analysis")
 def get_analysis(
+    request: Request,
     year: Optional[int] = Query(default=None),
     months: Optional[List[int]] = Query(default=None),
     projection_months: int = Query(default=12, alias="projectionMonths"),
 ):
     month_values = list(months) if months else []
-    return controller.get_analysis_overview(year, month_values, projection_months)
+    key = ("analysis", year, tuple(sorted(set(month_values))), projection_months)
+    return cached_json_response(
+        request, key, lambda: controller.get_analysis_overview(year, month_values, projection_months)
+    )
+
+
+@app.get("/api/analysis/multi-year")
+def get_multi_year_analysis(
+    request: Request,
+    start_year: Optional[int] = Query(default=None, alias="startYear"),
+    end_year: Optional[int] = Query(default=None, alias="endYear"),
+    flow: Literal["expense", "income"] = Query(default="expense"),
+    top: int = Query(default=12, ge=1, le=50),
+):
+    key = ("analysis_multi_year", start_year, end_year, flow, top)
+
+    def produce():
+        result = controller.get_multi_year_analysis(start_year, end_year, flow, top)
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+        return result
+
+    return cached_json_response(request, key, produce)
+
+
+@app.get("/api/net-worth")
+def get_net_worth(
+    request: Request,
+    start: Optional[datetime.date] = Query(None),
+    end: Optional[datetime.date] = Query(None),
+    granularity: Literal["day", "week", "month"] = Query("month"),
+):
+    key = ("net_worth", start, end, granularity)
+
+    def produce():
+        result = controller.get_net_worth_history(start, end, granularity)
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+        return result
+
+    return cached_json_response(request, key, produce)
+
+
+@app.get("/api/projection")
+def get_projection(
+    request: Request,
+    horizon_months: int = Query(120, ge=1, le=360),
+    simulations: int = Query(1000, ge=0, le=10_000),
+    percentiles: Optional[List[int]] = Query(None),
+    seed: int = Query(0, description="Semilla para que la proyección sea reproducible"),
+    income_change: float = Query(0.0, description="Supuesto: % de cambio en ingresos"),
+    expense_change: float = Query(0.0, description="Supuesto: % de cambio en gastos"),
+    extra_debt_payment: float = Query(0.0, ge=0, description="Supuesto: abono extra mensual a deudas"),
+    rate_shift: float = Query(0.0, description="Supuesto: puntos de cambio en tasas"),
+):
+    what_if = {
+        "name": "supuesto",
+        "income_change": income_change,
+        "expense_change": expense_change,
+        "extra_debt_payment": extra_debt_payment,
+        "rate_shift": rate_shift,
+    }
+    scenarios = [what_if] if any(what_if[field] for field in list(what_if)[1:]) else []
+    key = (
+        "projection", horizon_months, simulations, tuple(sorted(set(percentiles or []))), seed,
+        income_change, expense_change, extra_debt_payment, rate_shift,
+    )
+
+    def produce():
+        result = controller.get_cash_flow_projection(
+            horizon_months, simulations, scenarios, percentiles, seed
+        )
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+        return result
+
+    return cached_json_response(request, key, produce)
 
 
 @app.post("/api/transactions", status_code=201)
@@ -543,6 +790,55 @@ def create_transaction(transaction: TransactionModel):
     if "error" in result: raise HTTPException(status_code=400, detail=result["error"])
     return result
 
+@app.post("/api/transactions/import")
+def import_transactions(
+    file: UploadFile = File(...),
+    account_id: Optional[int] = Query(default=None, alias="accountId"),
+    statement_format: Optional[Literal[STATEMENT_FORMATS]] = Query(default=None, alias="format"),
+    encoding: str = Query(default="utf-8-sig"),
+    dry_run: bool = Query(default=False),
+):
+    """Importa un extracto CSV, OFX o QIF leyéndolo en streaming.
+
+    Las filas sin cuenta propia se asignan a ``accountId``. La respuesta
+    indica cuántas se importaron y qué filas se rechazaron y por qué.
+    """
+    statement_format = statement_format or detect_statement_format(file.filename)
+    if statement_format is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No se reconoce el formato del archivo; indica uno de: {', '.join(STATEMENT_FORMATS)}.",
+        )
+    try:
+        stream = io.TextIOWrapper(file.file, encoding=encoding, newline="")
+    except LookupError:
+        raise HTTPException(status_code=400, detail=f"Codificación desconocida: {encoding}.")
+    try:
+        result = controller.import_transactions(
+            iter_statement_records(stream, statement_format, account_id),
+            validate_import_record,
+            dry_run,
+        )
+    finally:
+        stream.detach()
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@app.post("/api/transactions/batch")
+def apply_transaction_batch(batch: TransactionBatchModel):
+    """Aplica un lote de altas, ediciones y borrados de transacciones.
+
+    Cada operación tiene su propio resultado: las que fallan se revierten
+    sin afectar al resto del lote.
+    """
+    result = controller.apply_transaction_batch(
+        [operation.model_dump() for operation in batch.operations]
+    )
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
 @app.put("/api/transactions/{transaction_id}")
 def update_transaction(transaction_id: int, transaction: TransactionModel):
     result = controller.update_transaction(transaction_id, transaction.dict())
@@ -634,6 +930,16 @@ def create_budget_entry(entry: BudgetEntryCreateModel):
     return result
 
 
+@app.post("/api/budget/rollover")
+def rollover_recurring_budgets():
+    return controller.rollover_recurring_budgets()
+
+
+@app.post("/api/budget/reconcile")
+def reconcile_budget_actuals(dry_run: bool = Query(default=False)):
+    return controller.reconcile_budget_actuals(dry_run)
+
+
 @app.put("/api/budget/{entry_id}", response_model=BudgetEntryModel)
 def update_budget_entry(entry_id: int, entry: BudgetEntryUpdateModel):
     result = controller.update_budget_entry(entry_id, entry.model_dump(exclude_none=True))
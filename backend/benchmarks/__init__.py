@@ -0,0 +1 @@
+"""Scripts de medición de rendimiento del backend (no forman parte del servidor)."""
@@ -0,0 +1,115 @@
+"""Mide el API con varios clientes concurrentes sobre una base temporal.
+
+Siembra transacciones, arranca la aplicación con su ciclo de vida completo
+(pool de conexiones e hilo escritor) y reparte peticiones de listado,
+dashboard, cuentas y presupuesto entre varios hilos cliente. Informa el
+rendimiento, el máximo de conexiones en uso y si alguna quedó sin devolver.
+
+    python -m benchmarks.concurrency
+    python -m benchmarks.concurrency --clients 1 8 32 --requests 1200 --no-cache
+"""
+
+import argparse
+import datetime
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+import backend
+from app.controller.response_cache import response_cache
+from app.database.db_manager import close_db, initialize_database
+from app.database.session import connection_scope
+from app.database.writer import write_dispatcher
+from app.model.base_model import db
+
+REQUESTS = [
+    ("/api/transactions", {"limit": 50}),
+    ("/api/dashboard", {"year": 2024}),
+    ("/api/accounts", {}),
+    ("/api/budget", {}),
+]
+
+
+def _seed(transactions: int) -> None:
+    initialize_database()
+    with connection_scope():
+        account = backend.controller.add_account(
+            {"name": "Cuenta", "account_type": "Cuenta Corriente", "initial_balance": 1_000_000}
+        )
+        records = (
+            (
+                index + 1,
+                {
+                    "description": f"Movimiento {index}",
+                    "amount": 10.0 + index % 90,
+                    "date": datetime.date(2024, 1, 1) + datetime.timedelta(days=index % 365),
+                    "type": "Ingreso" if index % 10 == 0 else "Gasto Variable",
+                    "category": "Sueldo" if index % 10 == 0 else "Comida",
+                    "account_id": account["id"],
+                },
+            )
+            for index in range(transactions)
+        )
+        backend.controller.import_transactions(records)
+
+
+def _run(client: TestClient, clients: int, total: int):
+    peak = [0]
+    statuses = []
+    lock = threading.Lock()
+    plan = itertools.islice(itertools.cycle(REQUESTS), total)
+
+    def send(request):
+        path, params = request
+        status = client.get(path, params=params).status_code
+        with lock:
+            statuses.append(status)
+            peak[0] = max(peak[0], len(db._in_use))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(send, plan))
+    elapsed = time.perf_counter() - started
+    return total / elapsed, peak[0], sum(status != 200 for status in statuses)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mide el API con clientes concurrentes.")
+    parser.add_argument("--transactions", type=int, default=2000, help="Transacciones sembradas.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32], help="Hilos cliente.")
+    parser.add_argument("--requests", type=int, default=1200, help="Peticiones por medición.")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Desactiva la caché de respuestas."
+    )
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        response_cache.max_entries = 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        db.init(os.path.join(directory, "finanzas.db"))
+        try:
+            _seed(args.transactions)
+            with TestClient(backend.app) as client:
+                for clients in args.clients:
+                    rate, peak, errors = _run(client, clients, args.requests)
+                    print(
+                        f"{clients:>3} clientes: {rate:7.1f} pet/s, "
+                        f"máx. {peak} conexiones en uso, {errors} errores"
+                    )
+                # El hilo escritor conserva su conexión mientras vive.
+                leaked = len(db._in_use) - int(write_dispatcher.running)
+            print(f"Conexiones sin devolver al terminar: {leaked}")
+        finally:
+            close_db()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
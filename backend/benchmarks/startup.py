@@ -0,0 +1,86 @@
+"""Mide el arranque de la base de datos ya migrada.
+
+Crea una base temporal, la migra y luego ejecuta ``initialize_database``
+varias veces, contando las sentencias SQL y el tiempo de cada arranque. Con
+``--replay`` vuelve a aplicar todos los pasos de ``MIGRATIONS`` en cada
+arranque, como hacía el arranque anterior al registro de versiones, para
+comparar ambos casos sobre los mismos datos.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --replay --runs 20
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from app.database.db_manager import MIGRATIONS, close_db, initialize_database
+from app.database.session import connection_scope
+from app.model.base_model import db
+
+
+class _StatementCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+def _replay_all() -> None:
+    with connection_scope():
+        for migration in MIGRATIONS:
+            with db.atomic():
+                migration.apply()
+
+
+def _measure(boot, runs: int):
+    logger = logging.getLogger("peewee")
+    counter = _StatementCounter()
+    logger.addHandler(counter)
+    logger.setLevel(logging.DEBUG)
+    timings, statements = [], []
+    try:
+        for _ in range(runs):
+            counter.count = 0
+            started = time.perf_counter()
+            boot()
+            timings.append((time.perf_counter() - started) * 1000)
+            statements.append(counter.count)
+    finally:
+        logger.removeHandler(counter)
+    return statistics.median(timings), statistics.median(statements)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mide el arranque de una base ya migrada.")
+    parser.add_argument("--runs", type=int, default=50, help="Arranques medidos.")
+    parser.add_argument(
+        "--replay", action="store_true", help="Aplica todos los pasos en cada arranque."
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db.init(os.path.join(directory, "finanzas.db"))
+        try:
+            initialize_database()
+            boot = _replay_all if args.replay else initialize_database
+            median_ms, median_statements = _measure(boot, args.runs)
+        finally:
+            close_db()
+
+    mode = "todos los pasos" if args.replay else "sólo pendientes"
+    print(
+        f"Arranque ({mode}), mediana de {args.runs}: "
+        f"{median_ms:.1f} ms, {median_statements:.0f} sentencias"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
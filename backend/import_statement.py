@@ -0,0 +1,54 @@
+"""Importa un extracto bancario (CSV, OFX o QIF) desde la línea de comandos.
+
+Usa el mismo flujo que ``POST /api/transactions/import``: lectura en
+streaming, validación con ``TransactionModel`` e inserción por lotes.
+
+    python import_statement.py extracto.csv --account-id 1
+    python import_statement.py movimientos.qif --account-id 2 --dry-run
+"""
+
+import argparse
+import json
+import sys
+
+from backend import controller, validate_import_record
+from app.controller.statement_import import (
+    STATEMENT_FORMATS,
+    detect_statement_format,
+    iter_statement_records,
+)
+from app.database.db_manager import close_db, initialize_database
+from app.database.writer import write_dispatcher
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importa transacciones desde un extracto bancario.")
+    parser.add_argument("path", help="Archivo CSV, OFX o QIF.")
+    parser.add_argument("--account-id", type=int, help="Cuenta para las filas que no indican una.")
+    parser.add_argument("--format", choices=STATEMENT_FORMATS, help="Formato; por defecto según la extensión.")
+    parser.add_argument("--encoding", default="utf-8-sig", help="Codificación del archivo.")
+    parser.add_argument("--dry-run", action="store_true", help="Valida sin guardar nada.")
+    args = parser.parse_args(argv)
+
+    statement_format = args.format or detect_statement_format(args.path)
+    if statement_format is None:
+        parser.error(f"no se reconoce el formato de {args.path}; usa --format.")
+
+    initialize_database()
+    try:
+        with open(args.path, encoding=args.encoding, newline="") as stream:
+            result = write_dispatcher.run(
+                controller.import_transactions,
+                iter_statement_records(stream, statement_format, args.account_id),
+                validate_import_record,
+                args.dry_run,
+            )
+    finally:
+        close_db()
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 1 if "error" in result else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
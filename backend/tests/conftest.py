@@ -0,0 +1,180 @@
+"""Shared fixtures: every test runs against its own temporary database."""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from app.controller.app_controller import AppController  # noqa: E402
+from app.database.balance_snapshots import rebuild_balance_snapshots  # noqa: E402
+from app.database.daily_balances import rebuild_daily_balances  # noqa: E402
+from app.database.data_version import data_version  # noqa: E402
+from app.database.db_manager import initialize_database  # noqa: E402
+from app.database.rollup import rebuild_monthly_rollup  # noqa: E402
+from app.database.session import connection_scope  # noqa: E402
+from app.database.tags import tag_dictionary  # noqa: E402
+from app.model.account import Account  # noqa: E402
+from app.model.base_model import db  # noqa: E402
+from app.model.debt import Debt  # noqa: E402
+from app.model.transaction import Transaction  # noqa: E402
+
+DERIVED_TABLES = ("monthly_rollup", "daily_balance", "balance_snapshot")
+
+
+def _switch_database(path: str) -> None:
+    if not db.is_closed():
+        db.close()
+    db.close_all()
+    db.init(path)
+    # Process-wide caches belong to the previous file.
+    tag_dictionary.reset()
+    data_version.mark_rewrite()
+    data_version.bump()
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A migrated, empty database bound to the current thread."""
+
+    _switch_database(str(tmp_path / "finanzas.db"))
+    initialize_database()
+    with connection_scope():
+        yield db
+    _switch_database(str(tmp_path / "closed.db"))
+
+
+@pytest.fixture
+def controller(database):
+    return AppController()
+
+
+@pytest.fixture
+def account(controller):
+    return controller.add_account(
+        {"name": "Cuenta", "account_type": "Cuenta Corriente", "initial_balance": 100000}
+    )
+
+
+def _derived_rows():
+    return {
+        table: sorted(
+            tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+            for row in db.execute_sql(f'SELECT * FROM "{table}"')
+        )
+        for table in DERIVED_TABLES
+    }
+
+
+@pytest.fixture
+def assert_derived_tables_match_rebuild(database):
+    """Check that the incrementally kept tables equal a full rebuild."""
+
+    def check():
+        incremental = _derived_rows()
+        rebuild_monthly_rollup()
+        rebuild_daily_balances()
+        rebuild_balance_snapshots()
+        assert incremental == _derived_rows()
+        return incremental
+
+    return check
+
+
+@pytest.fixture
+def ledger_history(controller, account):
+    """Replay adds, edits and deletes, calling ``check`` after each step.
+
+    Covers income and expenses over several months, splits, a transfer and
+    a debt payment, edits that move a row to another month, type and account,
+    and deletions that adjust the balances.
+    """
+
+    def replay(check):
+        cash = controller.add_account(
+            {"name": "Efectivo", "account_type": "Efectivo", "initial_balance": 500}
+        )
+        debt = controller.add_debt({"name": "Préstamo", "total_amount": 3000})
+
+        def payload(date, amount, kind="Gasto Variable", **extra):
+            return dict(
+                {
+                    "account_id": account["id"],
+                    "date": date,
+                    "description": kind,
+                    "amount": amount,
+                    "type": kind,
+                    "category": "Sueldo" if kind == "Ingreso" else "Comida",
+                },
+                **extra,
+            )
+
+        def add(data):
+            result = controller.add_transaction(dict(data))
+            assert "error" not in result, result
+            check()
+            return result["id"]
+
+        def update(transaction_id, data):
+            result = controller.update_transaction(transaction_id, dict(data))
+            assert "error" not in result, result
+            check()
+
+        def delete(transaction_id):
+            assert "error" not in controller.delete_transaction(transaction_id, adjust_balance=True)
+            check()
+
+        add(payload("2024-01-05", 2500.0, "Ingreso"))
+        rent = add(payload("2024-01-31", 900.0, "Gasto Fijo", category="Hogar"))
+        market = add(
+            payload(
+                "2024-02-10", 120.0,
+                splits=[{"category": "Comida", "amount": 80.0}, {"category": "Hogar", "amount": 40.0}],
+            )
+        )
+        transfer = payload(
+            "2024-02-15", 300.0, "Transferencia",
+            category="Transferencia", is_transfer=True, transfer_account_id=cash["id"],
+        )
+        transfer_id = add(transfer)
+        add(payload("2024-03-01", 250.0, "Pago Deuda", category="Deuda", debt_id=debt["id"]))
+        late = add(payload("2024-06-30", 45.0))
+
+        update(market, payload("2024-05-02", 150.0, "Gasto Fijo", account_id=cash["id"]))
+        update(rent, payload("2024-02-01", 950.0, "Gasto Fijo", category="Hogar"))
+        update(transfer_id, dict(transfer, amount=200.0, date="2024-04-20"))
+        delete(late)
+        delete(transfer_id)
+        return cash, debt
+
+    return replay
+
+
+@pytest.fixture
+def direct_net_worth(database):
+    """Net worth on a day, valued straight from the transactions."""
+
+    def value(day):
+        assets = {account.id: float(account.initial_balance) for account in Account.select()}
+        debts = {debt.id: float(debt.current_balance) for debt in Debt.select()}
+        for transaction in Transaction.select():
+            amount = float(transaction.amount)
+            if transaction.debt_id:
+                # Debts are valued back from their current balance.
+                if transaction.date > day:
+                    debts[transaction.debt_id] += amount
+            if transaction.date > day:
+                continue
+            if transaction.is_transfer:
+                assets[transaction.account_id] -= amount
+                assets[transaction.transfer_account_id] += amount
+            elif transaction.type == "Ingreso":
+                assets[transaction.account_id] += amount
+            else:
+                assets[transaction.account_id] -= amount
+        return sum(assets.values()) - sum(max(0.0, balance) for balance in debts.values())
+
+    return value
@@ -0,0 +1,103 @@
+"""SQL aggregates equal totals summed row by row from the transactions."""
+
+import datetime
+import random
+from collections import defaultdict
+
+import pytest
+
+from app.database.aggregations import iter_monthly_breakdown, totals_by_type
+from app.model.transaction import Transaction
+from app.model.transaction_split import TransactionSplit
+
+RANGES = [
+    (datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)),
+    (datetime.date(2024, 3, 1), datetime.date(2024, 4, 30)),
+    (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29)),
+    (datetime.date(2024, 1, 15), datetime.date(2024, 3, 10)),
+    (datetime.date(2024, 6, 30), datetime.date(2024, 6, 30)),
+]
+
+
+def _seed(controller, account):
+    cash = controller.add_account({"name": "Efectivo", "account_type": "Efectivo", "initial_balance": 0})
+    rng = random.Random(11)
+    for _ in range(80):
+        kind = rng.choice(["Ingreso", "Gasto Variable", "Gasto Fijo", "Transferencia"])
+        amount = round(rng.uniform(5, 400), 2)
+        record = {
+            "account_id": account["id"],
+            "date": datetime.date(2024, 1, 1) + datetime.timedelta(days=rng.randrange(200)),
+            "description": kind,
+            "amount": amount,
+            "type": kind,
+            "category": rng.choice(["Comida", "Hogar", "Sueldo", ""]),
+        }
+        if kind == "Transferencia":
+            record.update(is_transfer=True, transfer_account_id=cash["id"])
+        elif kind != "Ingreso" and rng.random() < 0.3:
+            part = round(amount / 3, 2)
+            record["splits"] = [
+                {"category": "Ocio", "amount": part},
+                {"category": "Comida", "amount": round(amount - part, 2)},
+            ]
+        assert "error" not in controller.add_transaction(record)
+
+
+def _expected_breakdown(start, end):
+    splits = defaultdict(list)
+    for split in TransactionSplit.select():
+        splits[split.transaction_id].append((split.category, split.amount))
+    totals = defaultdict(float)
+    for transaction in Transaction.select():
+        if transaction.is_transfer or not start <= transaction.date <= end:
+            continue
+        month = transaction.date.strftime("%Y-%m")
+        for category, amount in splits[transaction.id] or [(transaction.category, transaction.amount)]:
+            totals[(month, transaction.type, category)] += amount
+    return totals
+
+
+def _rounded(rows):
+    return sorted((*key, round(total, 6)) for *key, total in rows)
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_breakdown_and_type_totals_match_the_rows(controller, account, monkeypatch, start, end):
+    # Whole months read the rollup; the rest the SQL fallback.
+    monkeypatch.setenv("NEBULA_ANALYTICS_ENGINE", "sql")
+    _seed(controller, account)
+
+    expected = _expected_breakdown(start, end)
+    by_type = defaultdict(float)
+    for (_, kind, _), total in expected.items():
+        by_type[kind] += total
+
+    breakdown = list(iter_monthly_breakdown(start, end))
+    assert [row[0] for row in breakdown] == sorted(row[0] for row in breakdown)
+    assert _rounded(breakdown) == _rounded((*key, total) for key, total in expected.items())
+    assert _rounded(totals_by_type(start, end)) == _rounded(by_type.items())
+
+
+def test_dashboard_kpis_compare_with_the_previous_period(controller, account):
+    _seed(controller, account)
+
+    kpis = controller._get_dashboard_kpis(2024, [3])
+
+    def net_parts(start, end):
+        income = expense = 0.0
+        for (_, kind, _), total in _expected_breakdown(start, end).items():
+            if kind == "Ingreso":
+                income += total
+            else:
+                expense += abs(total)
+        return income, expense
+
+    income, expense = net_parts(datetime.date(2024, 3, 1), datetime.date(2024, 3, 31))
+    previous_income, _ = net_parts(datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))
+    assert kpis["income"]["amount"] == pytest.approx(income)
+    assert kpis["expense"]["amount"] == pytest.approx(expense)
+    assert kpis["net"]["amount"] == pytest.approx(income - expense)
+    assert kpis["income"]["comparison"] == pytest.approx(
+        (income - previous_income) / previous_income * 100
+    )
@@ -0,0 +1,27 @@
+"""The net-worth chart read from month-end snapshots equals a direct valuation."""
+
+import datetime
+
+from app.model.account import Account
+from app.model.debt import Debt
+
+
+def test_net_worth_chart_matches_the_ledger(
+    controller, ledger_history, direct_net_worth, assert_derived_tables_match_rebuild
+):
+    today = datetime.date.today()
+    months = (today.year - 2023) * 12 + today.month
+
+    def check():
+        assert assert_derived_tables_match_rebuild()["balance_snapshot"]
+        chart = controller._get_net_worth_data_for_chart(months)
+        for date, value in zip(chart["dates"], chart["values"]):
+            day = datetime.date.fromisoformat(date)
+            assert round(value, 6) == round(direct_net_worth(day), 6), date
+        # Today's point is what the accounts and debts hold now.
+        current = sum(account.current_balance for account in Account.select()) - sum(
+            debt.current_balance for debt in Debt.select()
+        )
+        assert round(chart["values"][-1], 6) == round(current, 6)
+
+    ledger_history(check)
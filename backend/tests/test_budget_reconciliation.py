@@ -0,0 +1,83 @@
+"""Budget actuals drift is reported, and fixed only outside a dry run."""
+
+import datetime
+
+import pytest
+
+from app.model.budget_entry import BudgetEntry
+
+
+@pytest.fixture
+def entries(controller, account):
+    food = controller.add_budget_entry(
+        {"category": "Comida", "description": "Comida", "budgeted_amount": 500, "type": "Gasto Variable"}
+    )
+    rent = controller.add_budget_entry(
+        {"category": "Hogar", "description": "Alquiler", "budgeted_amount": 900, "type": "Gasto Fijo"}
+    )
+    for entry, amount in ((food, 40.0), (food, 25.5), (rent, 900.0)):
+        result = controller.add_transaction(
+            {
+                "account_id": account["id"],
+                "date": datetime.date.today(),
+                "description": entry["description"],
+                "amount": amount,
+                "type": "Gasto Variable",
+                "category": entry["category"],
+                "budget_entry_id": entry["id"],
+            }
+        )
+        assert "error" not in result, result
+    return food, rent
+
+
+def _actual(entry):
+    return float(BudgetEntry.get_by_id(entry["id"]).actual_amount)
+
+
+def test_incremental_actuals_have_no_drift(controller, entries):
+    report = controller.reconcile_budget_actuals(dry_run=True)
+
+    assert report["checked"] == 2
+    assert report["drifted"] == [] and report["updated"] == 0
+
+
+def test_dry_run_reports_drift_without_fixing_it(controller, entries):
+    food, rent = entries
+    BudgetEntry.update(actual_amount=10.0).where(BudgetEntry.id == food["id"]).execute()
+
+    report = controller.reconcile_budget_actuals(dry_run=True)
+
+    assert report["dry_run"] and report["updated"] == 0
+    assert report["drifted"] == [
+        {
+            "id": food["id"],
+            "description": "Comida",
+            "stored": pytest.approx(10.0),
+            "expected": pytest.approx(65.5),
+            "difference": pytest.approx(-55.5),
+        }
+    ]
+    assert _actual(food) == pytest.approx(10.0)
+
+
+def test_reconcile_fixes_only_drifted_entries(controller, entries):
+    food, rent = entries
+    BudgetEntry.update(actual_amount=10.0).where(BudgetEntry.id == food["id"]).execute()
+    BudgetEntry.update(actual_amount=0).where(BudgetEntry.id == rent["id"]).execute()
+
+    report = controller.reconcile_budget_actuals()
+
+    assert report["updated"] == 2
+    assert [item["id"] for item in report["drifted"]] == [food["id"], rent["id"]]
+    assert _actual(food) == pytest.approx(65.5)
+    assert _actual(rent) == pytest.approx(900.0)
+    assert controller.reconcile_budget_actuals()["drifted"] == []
+
+
+def test_rounding_noise_is_not_drift(controller, entries):
+    food, _ = entries
+    BudgetEntry.update(actual_amount=65.501).where(BudgetEntry.id == food["id"]).execute()
+
+    assert controller.reconcile_budget_actuals()["drifted"] == []
+    assert _actual(food) == pytest.approx(65.501)
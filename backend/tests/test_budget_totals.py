@@ -0,0 +1,223 @@
+"""Budget totals count each cycle's spending in the window it happened in."""
+
+import datetime
+
+from app.database.budget_occurrences import budget_totals_by_type, iter_occurrences
+from app.database.budget_periods import backfill_period_bounds
+from app.model.budget_entry import BudgetEntry
+from app.model.transaction import Transaction
+
+
+def _monthly_budget(controller, amount=300.0, start="2025-01-01"):
+    entry = controller.add_budget_entry(
+        {
+            "category": "Comida",
+            "type": "Gasto",
+            "frequency": "Mensual",
+            "budgeted_amount": amount,
+            "use_custom_schedule": True,
+            "start_date": start,
+            "is_recurring": True,
+        }
+    )
+    assert "error" not in entry
+    return entry["id"]
+
+
+def _spend(controller, account, budget_entry_id, date, amount):
+    result = controller.add_transaction(
+        {
+            "account_id": account["id"],
+            "date": date,
+            "description": "Supermercado",
+            "amount": amount,
+            "type": "Gasto",
+            "category": "Comida",
+            "budget_entry_id": budget_entry_id,
+        }
+    )
+    assert "error" not in result
+
+
+def test_future_window_has_no_actuals(controller, account):
+    entry_id = _monthly_budget(controller)
+    _spend(controller, account, entry_id, "2025-01-10", 120.0)
+    _spend(controller, account, entry_id, "2025-02-10", 80.0)
+
+    totals = budget_totals_by_type(datetime.date(2025, 6, 1), datetime.date(2025, 6, 30))
+
+    assert totals["Gasto"] == (300.0, 0.0)
+
+
+def test_multi_occurrence_window_sums_only_its_transactions(controller, account):
+    entry_id = _monthly_budget(controller)
+    _spend(controller, account, entry_id, "2025-01-10", 120.0)
+    _spend(controller, account, entry_id, "2025-02-10", 80.0)
+    _spend(controller, account, entry_id, "2025-03-05", 50.0)
+    _spend(controller, account, entry_id, "2025-04-05", 40.0)
+
+    first_quarter = budget_totals_by_type(datetime.date(2025, 1, 1), datetime.date(2025, 3, 31))
+    february = budget_totals_by_type(datetime.date(2025, 2, 1), datetime.date(2025, 2, 28))
+
+    assert first_quarter["Gasto"] == (900.0, 250.0)
+    assert february["Gasto"] == (300.0, 80.0)
+
+
+def _reports(controller):
+    reports = {}
+    for year in (2025, 2026, 2027):
+        windows = [[]] + [[month] for month in range(1, 13)]
+        for months in windows:
+            key = (year, tuple(months))
+            reports[key] = (
+                controller._get_budget_vs_actual_summary(year, months),
+                controller._build_budget_analysis(year, months),
+            )
+    return reports
+
+
+def test_rollover_keeps_every_month_and_year_total(controller, account):
+    # Month-end anchor: cycles must stay on Jan 31 -> Feb 28 -> Mar 31.
+    monthly_id = _monthly_budget(controller, amount=300.0, start="2025-01-31")
+    annual = controller.add_budget_entry(
+        {
+            "category": "Seguro",
+            "type": "Gasto",
+            "frequency": "Anual",
+            "budgeted_amount": 1200.0,
+            "use_custom_schedule": True,
+            "start_date": "2025-03-01",
+            "is_recurring": True,
+        }
+    )
+    income = controller.add_budget_entry(
+        {
+            "category": "Sueldo",
+            "type": "Ingreso",
+            "frequency": "Mensual",
+            "budgeted_amount": 5000.0,
+            "use_custom_schedule": True,
+            "start_date": "2025-02-01",
+            "is_recurring": True,
+        }
+    )
+    for date, amount in (
+        ("2025-02-05", 120.0), ("2025-02-28", 30.0), ("2025-07-14", 90.0),
+        ("2026-01-02", 60.0), ("2026-03-20", 45.0), ("2026-05-01", 25.0),
+    ):
+        _spend(controller, account, monthly_id, date, amount)
+    _spend(controller, account, annual["id"], "2025-03-10", 1100.0)
+    _spend(controller, account, annual["id"], "2026-03-12", 1150.0)
+    controller.add_transaction(
+        {
+            "account_id": account["id"],
+            "date": "2025-09-01",
+            "description": "Nómina",
+            "amount": 5000.0,
+            "type": "Ingreso",
+            "category": "Sueldo",
+            "budget_entry_id": income["id"],
+        }
+    )
+
+    before = _reports(controller)
+    result = controller.rollover_recurring_budgets(today=datetime.date(2026, 3, 15))
+    after = _reports(controller)
+
+    assert result["created"] > 0
+    for key in before:
+        assert after[key] == before[key], key
+    # A second run has nothing left to roll over and changes nothing.
+    controller.rollover_recurring_budgets(today=datetime.date(2026, 3, 15))
+    assert _reports(controller) == before
+    # Past spending now sits on the cycle holding its date, and every
+    # cycle's stored actual matches its transactions.
+    linked = Transaction.select().where(
+        Transaction.budget_entry.is_null(False) & (Transaction.date <= datetime.date(2026, 3, 15))
+    )
+    for transaction in linked:
+        entry = BudgetEntry.get_by_id(transaction.budget_entry_id)
+        assert entry.period_start <= transaction.date <= entry.period_end
+    assert controller.reconcile_budget_actuals(dry_run=True)["drifted"] == []
+
+
+def test_rollover_keeps_a_custom_due_date_in_each_cycle(controller):
+    custom = controller.add_budget_entry(
+        {
+            "category": "Luz",
+            "type": "Gasto",
+            "frequency": "Mensual",
+            "budgeted_amount": 80.0,
+            "use_custom_schedule": True,
+            "start_date": "2025-01-01",
+            "due_date": "2025-01-20",
+            "is_recurring": True,
+        }
+    )
+    month_end = _monthly_budget(controller, start="2025-01-31")
+
+    controller.rollover_recurring_budgets(today=datetime.date(2025, 4, 10))
+
+    def due_dates(series_id):
+        cycles = BudgetEntry.select().where(BudgetEntry.series_id == series_id)
+        return sorted(
+            (entry.period_start.isoformat(), str(entry.due_date)) for entry in cycles
+        )
+
+    assert due_dates(custom["id"]) == [
+        ("2025-01-01", "2025-01-20"),
+        ("2025-02-01", "2025-02-20"),
+        ("2025-03-01", "2025-03-20"),
+        ("2025-04-01", "2025-04-20"),
+    ]
+    assert due_dates(month_end) == [
+        ("2025-01-31", "2025-02-27"),
+        ("2025-02-28", "2025-03-30"),
+        ("2025-03-31", "2025-04-29"),
+    ]
+
+
+def test_deleting_the_first_cycle_of_a_series_is_rejected(controller, account):
+    first = _monthly_budget(controller, start="2025-01-01")
+    _spend(controller, account, first, "2025-01-10", 40.0)
+    controller.rollover_recurring_budgets(today=datetime.date(2025, 3, 10))
+    later = [
+        entry.id
+        for entry in BudgetEntry.select()
+        .where((BudgetEntry.series_id == first) & (BudgetEntry.id != first))
+        .order_by(BudgetEntry.period_start.desc())
+    ]
+    assert len(later) == 2
+
+    assert "error" in controller.delete_budget_entry(first)
+    assert BudgetEntry.get_or_none(BudgetEntry.id == first) is not None
+
+    # Once the later cycles are gone the series can be removed.
+    for entry_id in later:
+        assert controller.delete_budget_entry(entry_id) == {"success": True}
+    assert controller.delete_budget_entry(first) == {"success": True}
+    assert not Transaction.select().where(Transaction.budget_entry.is_null(False)).exists()
+
+
+def test_undated_entries_keep_null_bounds_and_cover_the_current_cycle(controller):
+    # Legacy rows may have no usable start, due or end date at all.
+    BudgetEntry.insert(
+        description="Imprevistos", category="Varios", type="Gasto",
+        frequency="Mensual", budgeted_amount=150.0, actual_amount=0.0,
+        start_date="", due_date="", end_date=None,
+    ).execute()
+    backfill_period_bounds()
+
+    (entry,) = BudgetEntry.select()
+    assert entry.period_start is None and entry.period_end is None
+
+    today = datetime.date.today()
+    assert budget_totals_by_type(today, today) == {"Gasto": (150.0, 0.0)}
+    assert [occurrence.start for occurrence in iter_occurrences(today, today)] == [today]
+    virtual = controller._build_virtual_budget_account(today)
+    assert virtual["current_balance"] == 150.0
+
+    past = datetime.date(2000, 1, 1), datetime.date(2000, 12, 31)
+    assert budget_totals_by_type(*past) == {}
+    assert list(iter_occurrences(*past)) == []
+    assert controller._build_virtual_budget_account(past[0])["current_balance"] == 0.0
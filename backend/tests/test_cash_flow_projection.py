@@ -0,0 +1,83 @@
+"""The analysis projection is deterministic; simulations live in /api/projection."""
+
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend
+from app.controller import app_controller
+from app.controller.response_cache import response_cache
+from app.model.account import Account
+
+
+def _seed(controller, account):
+    for month, income, expense in ((1, 3000.0, 1800.0), (2, 3000.0, 2600.0), (3, 3200.0, 900.0)):
+        for amount, kind, category in ((income, "Ingreso", "Sueldo"), (expense, "Gasto Fijo", "Hogar")):
+            controller.add_transaction(
+                {
+                    "account_id": account["id"],
+                    "date": datetime.date(2024, month, 5),
+                    "description": category,
+                    "amount": amount,
+                    "type": kind,
+                    "category": category,
+                }
+            )
+    controller.add_debt(
+        {"name": "Préstamo", "total_amount": 5000, "interest_rate": 12, "minimum_payment": 200}
+    )
+
+
+def _no_simulation(*args, **kwargs):
+    raise AssertionError("the analysis projection must not simulate")
+
+
+@pytest.mark.parametrize("numpy_available", [True, False], ids=["numpy", "no-numpy"])
+def test_analysis_projection_is_linear_with_or_without_numpy(
+    controller, account, monkeypatch, numpy_available
+):
+    _seed(controller, account)
+    monkeypatch.setattr(app_controller, "NUMPY_AVAILABLE", numpy_available)
+    monkeypatch.setattr(app_controller, "simulate", _no_simulation)
+
+    projection = controller.get_analysis_overview(2024, [1, 2, 3], 6)["cash_flow_projection"]
+
+    balance = Account.get_by_id(account["id"]).current_balance
+    average = ((3000 - 1800) + (3000 - 2600) + (3200 - 900)) / 3
+    assert projection["starting_balance"] == pytest.approx(balance)
+    assert projection["average_monthly_flow"] == pytest.approx(average)
+    assert [point["label"] for point in projection["points"]] == [
+        f"{app_controller.MONTH_LABELS[month]} 2024" for month in range(4, 10)
+    ]
+    assert [point["balance"] for point in projection["points"]] == pytest.approx(
+        [balance + average * step for step in range(1, 7)]
+    )
+
+
+def test_projection_endpoint_simulates_reproducibly(database, controller, account):
+    pytest.importorskip("numpy")
+    _seed(controller, account)
+    params = {"horizon_months": 24, "simulations": 200, "seed": 7, "percentiles": [10, 90]}
+
+    with TestClient(backend.app) as client:
+        response_cache.clear()
+        first = client.get("/api/projection", params=params).json()
+        response_cache.clear()
+        second = client.get("/api/projection", params=params).json()
+
+    assert first == second
+    (base,) = first["scenarios"]
+    assert len(base["points"]) == 24
+    assert all(point["p10"] <= point["p90"] for point in base["points"])
+
+
+def test_projection_endpoint_requires_numpy(database, monkeypatch):
+    monkeypatch.setattr(app_controller, "NUMPY_AVAILABLE", False)
+
+    with TestClient(backend.app) as client:
+        response_cache.clear()
+        response = client.get("/api/projection")
+
+    assert response.status_code == 400
+    assert "NumPy" in response.json()["detail"]
@@ -0,0 +1,94 @@
+"""The columnar engine answers arbitrary ranges exactly like the SQL fallback."""
+
+import datetime
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.database.aggregations import iter_monthly_breakdown, totals_by_type  # noqa: E402
+from app.database.columnar import columnar_engine  # noqa: E402
+from app.database.writer import write_dispatcher  # noqa: E402
+
+RANGES = [
+    (datetime.date(2024, 1, 10), datetime.date(2024, 1, 20)),
+    (datetime.date(2024, 2, 15), datetime.date(2024, 5, 3)),
+    (datetime.date(2023, 12, 31), datetime.date(2024, 12, 30)),
+    (datetime.date(2024, 6, 1), datetime.date(2024, 6, 1)),
+]
+
+
+def _add(controller, account, day, amount, kind="Gasto Variable", splits=None):
+    # Through the writer, which bumps the data version the engine caches on.
+    result = write_dispatcher.run(
+        controller.add_transaction,
+        {
+            "account_id": account["id"],
+            "date": day.isoformat(),
+            "description": "Movimiento",
+            "amount": amount,
+            "type": kind,
+            "category": "Ingresos" if kind == "Ingreso" else "Comida",
+            "splits": splits or [],
+        }
+    )
+    assert "error" not in result
+    return result
+
+
+def _results(monkeypatch, engine):
+    monkeypatch.setenv("NEBULA_ANALYTICS_ENGINE", "numpy" if engine else "sql")
+    assert columnar_engine.enabled is engine
+    return [
+        (
+            sorted((month, kind, category, round(total, 6))
+                   for month, kind, category, total in iter_monthly_breakdown(start, end)),
+            sorted((kind, round(total, 6)) for kind, total in totals_by_type(start, end)),
+        )
+        for start, end in RANGES
+    ]
+
+
+def _assert_engine_matches_sql(monkeypatch):
+    engine = _results(monkeypatch, True)
+    assert engine == _results(monkeypatch, False)
+    assert any(breakdown for breakdown, _ in engine)
+
+
+def test_engine_matches_sql_after_appends_and_rewrites(controller, account, monkeypatch):
+    rng = random.Random(13)
+    start = datetime.date(2023, 12, 1)
+    created = []
+    for _ in range(60):
+        day = start + datetime.timedelta(days=rng.randrange(400))
+        kind = rng.choice(["Ingreso", "Gasto Variable", "Gasto Fijo"])
+        amount = round(rng.uniform(1, 500), 2)
+        splits = None
+        if kind != "Ingreso" and rng.random() < 0.3:
+            splits = [
+                {"category": "Comida", "amount": round(amount * 0.4, 2)},
+                {"category": "Hogar", "amount": round(amount - round(amount * 0.4, 2), 2)},
+            ]
+        created.append(_add(controller, account, day, amount, kind, splits))
+    _assert_engine_matches_sql(monkeypatch)
+
+    # Appends extend the loaded columns instead of reloading them.
+    for offset in range(5):
+        _add(controller, account, datetime.date(2024, 2, 20) + datetime.timedelta(days=offset), 10.0)
+    _assert_engine_matches_sql(monkeypatch)
+
+    # Updates and deletes force a full reload.
+    edited = {
+        "account_id": account["id"],
+        "date": "2024-01-15",
+        "description": "Editada",
+        "amount": 999.0,
+        "type": "Gasto Fijo",
+        "category": "Hogar",
+    }
+    assert "error" not in write_dispatcher.run(
+        controller.update_transaction, created[0]["id"], edited
+    )
+    write_dispatcher.run(controller.delete_transaction, created[1]["id"], adjust_balance=True)
+    _assert_engine_matches_sql(monkeypatch)
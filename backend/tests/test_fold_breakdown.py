@@ -0,0 +1,103 @@
+"""One pass over the breakdown feeds every report section."""
+
+import datetime
+import logging
+
+from app.database.aggregations import (
+    CategoryMonthSeries,
+    CategoryTotals,
+    MonthlyIncomeExpense,
+    MonthlyNet,
+    TypeTotals,
+    fold_breakdown,
+)
+
+ROWS = [
+    ("2024-01-05", "Ingreso", "Sueldo", 2000.0, None),
+    ("2024-01-20", "Gasto Fijo", "Hogar", 800.0, None),
+    ("2024-02-03", "Gasto Variable", "", 50.0, None),
+    ("2024-02-10", "Gasto Variable", "Comida", 90.0, [("Comida", 60.0), ("Ocio", 30.0)]),
+    ("2024-03-01", "Ingreso", "Sueldo", 2100.0, None),
+]
+
+
+def _seed(controller, account):
+    for date, kind, category, amount, splits in ROWS:
+        result = controller.add_transaction(
+            {
+                "account_id": account["id"],
+                "date": date,
+                "description": kind,
+                "amount": amount,
+                "type": kind,
+                "category": category,
+                "splits": [{"category": name, "amount": value} for name, value in splits or []],
+            }
+        )
+        assert "error" not in result
+
+
+def _reducers():
+    return {
+        "types": TypeTotals(),
+        "flows": MonthlyIncomeExpense("Ingreso"),
+        "categories": CategoryTotals("Ingreso", "Sin categoría"),
+        "february": CategoryTotals("Ingreso", "Sin categoría", months=[2], per_month=True),
+        "series": CategoryMonthSeries("Ingreso", "Sin categoría"),
+        "net": MonthlyNet("Ingreso"),
+    }
+
+
+def test_every_reducer_gets_the_same_rows(controller, account):
+    _seed(controller, account)
+
+    result = fold_breakdown(datetime.date(2024, 1, 1), datetime.date(2024, 3, 31), _reducers())
+
+    assert sorted(result["types"]) == [
+        ("Gasto Fijo", 800.0), ("Gasto Variable", 140.0), ("Ingreso", 4100.0)
+    ]
+    assert result["flows"] == [
+        ("2024-01", 2000.0, 800.0), ("2024-02", 0.0, 140.0), ("2024-03", 2100.0, 0.0)
+    ]
+    assert result["categories"] == {
+        "income": {"Sueldo": 4100.0},
+        "expense": {"Hogar": 800.0, "Sin categoría": 50.0, "Comida": 60.0, "Ocio": 30.0},
+    }
+    assert result["february"] == {
+        "income": {},
+        "expense": {"Sin categoría": {2: 50.0}, "Comida": {2: 60.0}, "Ocio": {2: 30.0}},
+    }
+    assert result["series"]["income"] == {"Sueldo": {"2024-01": 2000.0, "2024-03": 2100.0}}
+    assert result["net"] == {1: 1200.0, 2: -140.0, 3: 2100.0}
+
+
+def test_partial_ranges_fold_the_same_way(controller, account, monkeypatch):
+    monkeypatch.setenv("NEBULA_ANALYTICS_ENGINE", "sql")
+    _seed(controller, account)
+
+    result = fold_breakdown(datetime.date(2024, 1, 10), datetime.date(2024, 2, 5), _reducers())
+
+    assert result["flows"] == [("2024-01", 0.0, 800.0), ("2024-02", 0.0, 50.0)]
+    assert result["net"] == {1: -800.0, 2: -50.0}
+
+
+def test_fold_runs_a_single_query(controller, account):
+    _seed(controller, account)
+    statements = []
+
+    class Recorder(logging.Handler):
+        def emit(self, record):
+            statements.append(record.getMessage())
+
+    logger = logging.getLogger("peewee")
+    handler = Recorder(logging.DEBUG)
+    previous_level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    try:
+        fold_breakdown(datetime.date(2024, 1, 1), datetime.date(2024, 12, 31), _reducers())
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(previous_level)
+
+    assert len(statements) == 1
@@ -0,0 +1,55 @@
+"""The migration runner only applies steps newer than the stored version."""
+
+import logging
+
+from app.database.db_manager import MIGRATIONS
+from app.database.migrations import Migration, apply_migrations, get_schema_version
+
+
+def _recording(migrations, calls):
+    def wrap(migration):
+        def apply():
+            calls.append(migration.version)
+            migration.apply()
+
+        return Migration(migration.version, migration.name, apply)
+
+    return [wrap(migration) for migration in migrations]
+
+
+def test_up_to_date_database_skips_every_step(database):
+    calls = []
+    statements = []
+
+    class Recorder(logging.Handler):
+        def emit(self, record):
+            statements.append(record.getMessage())
+
+    logger = logging.getLogger("peewee")
+    handler = Recorder(logging.DEBUG)
+    previous_level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    try:
+        applied = apply_migrations(_recording(MIGRATIONS, calls))
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(previous_level)
+
+    assert applied == []
+    assert calls == []
+    assert get_schema_version() == MIGRATIONS[-1].version
+    # A single read of schema_version.
+    assert len(statements) == 1, statements
+
+
+def test_only_pending_steps_run(database):
+    latest = MIGRATIONS[-1].version
+    database.execute_sql("UPDATE schema_version SET version = ?", (latest - 2,))
+    calls = []
+
+    applied = apply_migrations(_recording(MIGRATIONS, calls))
+
+    assert calls == [latest - 1, latest]
+    assert [migration.version for migration in applied] == [latest - 1, latest]
+    assert get_schema_version() == latest
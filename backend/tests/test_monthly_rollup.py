@@ -0,0 +1,33 @@
+"""The monthly rollup follows every add, edit and delete."""
+
+import datetime
+
+from peewee import fn
+
+from app.database.aggregations import totals_by_type
+from app.model.transaction import Transaction
+
+
+def _direct_totals(start, end):
+    query = (
+        Transaction.select(Transaction.type, fn.SUM(Transaction.amount))
+        .where(Transaction.date.between(start, end) & (Transaction.is_transfer == False))
+        .group_by(Transaction.type)
+        .tuples()
+    )
+    return sorted((kind, round(total, 6)) for kind, total in query)
+
+
+def test_rollup_matches_a_rebuild_and_the_transactions(
+    ledger_history, assert_derived_tables_match_rebuild
+):
+    months = [(datetime.date(2024, month, 1), datetime.date(2024, month + 1, 1)) for month in range(1, 7)]
+
+    def check():
+        assert assert_derived_tables_match_rebuild()["monthly_rollup"]
+        for start, following in months:
+            end = following - datetime.timedelta(days=1)
+            rolled = sorted((kind, round(total, 6)) for kind, total in totals_by_type(start, end))
+            assert rolled == _direct_totals(start, end), start
+
+    ledger_history(check)
@@ -0,0 +1,114 @@
+"""The multi-year analysis: year totals, YoY deltas and the "Otros" bucket."""
+
+import datetime
+
+import pytest
+
+# (year, month, category, amount) expenses; 2022 is the base year.
+EXPENSES = [
+    (2022, 3, "Hogar", 100.0),
+    (2022, 7, "Comida", 50.0),
+    (2023, 1, "Hogar", 150.0),
+    (2023, 6, "Comida", 80.0),
+    (2023, 6, "Ocio", 30.0),
+    (2023, 9, "Viajes", 20.0),
+    (2024, 2, "Hogar", 120.0),
+    (2024, 5, "Comida", 100.0),
+    (2024, 11, "Ocio", 10.0),
+    (2024, 12, "Viajes", 45.0),
+]
+
+
+@pytest.fixture
+def history(controller, account):
+    for year, month, category, amount in EXPENSES:
+        result = controller.add_transaction(
+            {
+                "account_id": account["id"],
+                "date": datetime.date(year, month, 10),
+                "description": category,
+                "amount": amount,
+                "type": "Gasto Variable",
+                "category": category,
+            }
+        )
+        assert "error" not in result, result
+    controller.add_transaction(
+        {
+            "account_id": account["id"],
+            "date": datetime.date(2024, 1, 31),
+            "description": "Sueldo",
+            "amount": 999.0,
+            "type": "Ingreso",
+            "category": "Sueldo",
+        }
+    )
+
+
+def _year_total(year, categories=None):
+    return sum(
+        amount
+        for row_year, _, category, amount in EXPENSES
+        if row_year == year and (categories is None or category in categories)
+    )
+
+
+def test_top_categories_and_others_bucket(controller, history):
+    analysis = controller.get_multi_year_analysis(2023, 2024, "expense", top=2)
+
+    assert analysis["years"] == [2023, 2024]
+    by_name = {row["category"]: row for row in analysis["categories"]}
+    # Hogar (270) and Comida (180) lead; Viajes (65) and Ocio (40) are grouped.
+    assert list(by_name) == ["Hogar", "Comida", "Otros"]
+    assert analysis["grouped_categories"] == 2
+
+    others = by_name["Otros"]
+    assert others["year_totals"] == pytest.approx(
+        [_year_total(year, {"Ocio", "Viajes"}) for year in (2023, 2024)]
+    )
+    assert others["values"][0][5] == pytest.approx(30.0)
+    assert others["values"][1][10] == pytest.approx(10.0)
+    assert others["values"][1][11] == pytest.approx(45.0)
+
+    # Income never leaks into the expense view.
+    assert analysis["totals"]["year_totals"] == pytest.approx(
+        [_year_total(2023), _year_total(2024)]
+    )
+    assert sum(row["year_totals"][1] for row in analysis["categories"]) == pytest.approx(
+        _year_total(2024)
+    )
+
+
+def test_yoy_deltas_start_from_the_year_before_the_range(controller, history):
+    analysis = controller.get_multi_year_analysis(2023, 2024, "expense", top=10)
+    by_name = {row["category"]: row for row in analysis["categories"]}
+
+    hogar = by_name["Hogar"]
+    assert [item["delta"] for item in hogar["yoy"]] == pytest.approx([50.0, -30.0])
+    assert [item["pct"] for item in hogar["yoy"]] == pytest.approx([50.0, -20.0])
+
+    # No spending in the base year: the delta is the whole amount, no percentage.
+    ocio = by_name["Ocio"]
+    assert ocio["yoy"][0] == {"delta": pytest.approx(30.0), "pct": None}
+    assert ocio["yoy"][1]["pct"] == pytest.approx((10 - 30) / 30 * 100)
+
+    totals = analysis["totals"]
+    expected = [_year_total(year) - _year_total(year - 1) for year in (2023, 2024)]
+    assert [item["delta"] for item in totals["yoy"]] == pytest.approx(expected)
+    # Month by month: June 2023 against June 2022.
+    assert totals["yoy_monthly"][0][5] == pytest.approx(110.0)
+    # The rolling sum closes each year at that year's total.
+    assert [year[-1] for year in totals["rolling_12m"]] == pytest.approx(
+        [_year_total(2023), _year_total(2024)]
+    )
+
+
+def test_income_flow_and_range_validation(controller, history):
+    income = controller.get_multi_year_analysis(2024, 2024, "income")
+    assert [row["category"] for row in income["categories"]] == ["Sueldo"]
+    assert income["totals"]["year_totals"] == pytest.approx([999.0])
+    assert income["totals"]["yoy"][0]["pct"] is None
+
+    assert "error" in controller.get_multi_year_analysis(2025, 2024)
+    assert "error" in controller.get_multi_year_analysis(2000, 2024)
+    assert "error" in controller.get_multi_year_analysis(2023, 2024, "transfer")
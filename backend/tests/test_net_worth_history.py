@@ -0,0 +1,42 @@
+"""Net-worth history at any granularity values each point from the daily index."""
+
+import datetime
+
+import pytest
+
+START, END = datetime.date(2023, 12, 20), datetime.date(2024, 7, 10)
+
+
+def test_history_matches_the_ledger_at_every_granularity(
+    controller, ledger_history, direct_net_worth, assert_derived_tables_match_rebuild
+):
+    def check():
+        assert assert_derived_tables_match_rebuild()["daily_balance"]
+        by_granularity = {}
+        for granularity in ("day", "week", "month"):
+            history = controller.get_net_worth_history(START, END, granularity)
+            assert "error" not in history, history
+            assert history["dates"][-1] == END.isoformat()
+            by_granularity[granularity] = dict(zip(history["dates"], history["values"]))
+
+        daily = by_granularity["day"]
+        assert len(daily) == (END - START).days + 1
+        for date, value in daily.items():
+            assert round(value, 6) == round(direct_net_worth(datetime.date.fromisoformat(date)), 6), date
+        # Week and month points are the daily values on their closing days.
+        for granularity in ("week", "month"):
+            for date, value in by_granularity[granularity].items():
+                assert value == pytest.approx(daily[date]), (granularity, date)
+
+    ledger_history(check)
+
+
+def test_week_and_month_points_close_their_period(controller, account):
+    weeks = controller.get_net_worth_history(START, END, "week")["dates"]
+    months = controller.get_net_worth_history(START, END, "month")["dates"]
+
+    assert all(datetime.date.fromisoformat(date).weekday() == 6 for date in weeks[:-1])
+    assert months[:3] == ["2023-12-31", "2024-01-31", "2024-02-29"]
+    assert months[-1] == END.isoformat()
+    assert "error" in controller.get_net_worth_history(END, START)
+    assert "error" in controller.get_net_worth_history(START, END, "hour")
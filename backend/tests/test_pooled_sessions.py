@@ -0,0 +1,46 @@
+"""Concurrent API reads each hold their own pooled, thread-bound connection."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+import backend
+from app.database.session import pool_metrics
+from app.model.base_model import db
+
+CONCURRENT_REQUESTS = 4
+
+
+def test_concurrent_requests_use_their_own_connection(database, monkeypatch):
+    barrier = threading.Barrier(CONCURRENT_REQUESTS, timeout=10)
+    seen = []
+    lock = threading.Lock()
+
+    def list_tags():
+        connection = db.connection()
+        # Every request is in flight at once before any of them returns.
+        barrier.wait()
+        query_only = connection.execute("PRAGMA query_only").fetchone()[0]
+        with lock:
+            seen.append((threading.get_ident(), id(connection), query_only))
+        return []
+
+    monkeypatch.setattr(backend.controller, "get_all_tags", list_tags)
+
+    with TestClient(backend.app) as client:
+        in_use_before = len(db._in_use)
+        acquisitions_before = pool_metrics.snapshot()["acquisitions"]
+
+        with ThreadPoolExecutor(CONCURRENT_REQUESTS) as executor:
+            responses = list(
+                executor.map(lambda _: client.get("/api/tags"), range(CONCURRENT_REQUESTS))
+            )
+
+        assert [response.status_code for response in responses] == [200] * CONCURRENT_REQUESTS
+        assert len({thread for thread, _, _ in seen}) == CONCURRENT_REQUESTS
+        assert len({connection for _, connection, _ in seen}) == CONCURRENT_REQUESTS
+        assert {query_only for _, _, query_only in seen} == {1}
+        # Every connection went back to the pool.
+        assert len(db._in_use) == in_use_before
+        assert pool_metrics.snapshot()["acquisitions"] - acquisitions_before == CONCURRENT_REQUESTS
@@ -0,0 +1,67 @@
+"""Hot lookups must search an index instead of scanning their table."""
+
+import datetime
+import re
+
+import pytest
+
+from app.model.budget_entry import BudgetEntry
+from app.model.parameter import Parameter
+from app.model.tag import Tag
+from app.model.transaction import Transaction
+from app.model.transaction_tag import TransactionTag
+
+START = datetime.date(2025, 1, 1)
+END = datetime.date(2025, 3, 31)
+
+# A bare "SCAN t1" reads the whole table; "SCAN t1 USING INDEX ..." walks an
+# index in order (keyset pages) and is fine.
+_FULL_SCAN = re.compile(r"^SCAN \w+$")
+
+
+def _filtered(controller, filters):
+    return controller._apply_transaction_filters(Transaction.select(), filters)[0]
+
+
+HOT_QUERIES = {
+    "transactions by date range": lambda c: _filtered(c, {"start_date": START, "end_date": END}),
+    "transactions by type": lambda c: _filtered(c, {"type": "Ingreso"}),
+    "transactions by category": lambda c: _filtered(c, {"category": "Comida"}),
+    "transactions by tag": lambda c: _filtered(c, {"tags": ["casa"]}),
+    "transactions by budget entry": lambda c: Transaction.select().where(
+        Transaction.budget_entry == 1
+    ),
+    "page by date": lambda c: Transaction.select()
+    .order_by(Transaction.date.desc(), Transaction.id.desc())
+    .limit(50),
+    "page by amount": lambda c: Transaction.select()
+    .order_by(Transaction.amount.desc(), Transaction.id.desc())
+    .limit(50),
+    "tag by name": lambda c: Tag.select().where(Tag.name.in_(["casa", "viaje"])),
+    "tag links of transactions": lambda c: TransactionTag.select().where(
+        TransactionTag.transaction_id.in_([1, 2, 3])
+    ),
+    "budget entries overlapping a range": lambda c: BudgetEntry.select().where(
+        c._budget_entries_overlapping(START, END)
+    ),
+    "expired recurring budget entries": lambda c: BudgetEntry.select().where(
+        (BudgetEntry.is_recurring == True) & (BudgetEntry.period_end < START)  # noqa: E712
+    ),
+    "budget entries by type": lambda c: BudgetEntry.select().where(BudgetEntry.type == "Gasto Fijo"),
+    "budget entries by category": lambda c: BudgetEntry.select().where(
+        BudgetEntry.category == "Comida"
+    ),
+    "budget entries started by": lambda c: BudgetEntry.select().where(BudgetEntry.start_date <= START),
+    "budget entries due before": lambda c: BudgetEntry.select().where(BudgetEntry.due_date < START),
+    "parameter by group and value": lambda c: Parameter.select().where(
+        (Parameter.group == "Display") & (Parameter.value == "AbbreviateNumbers")
+    ),
+}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_an_index(database, controller, name):
+    sql, params = HOT_QUERIES[name](controller).sql()
+    plan = [row[3] for row in database.execute_sql("EXPLAIN QUERY PLAN " + sql, params)]
+
+    assert not [step for step in plan if _FULL_SCAN.match(step)], plan
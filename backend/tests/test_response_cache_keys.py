@@ -0,0 +1,20 @@
+"""Equivalent dashboard queries share one cached response."""
+
+from fastapi.testclient import TestClient
+
+import backend
+from app.controller.response_cache import response_cache
+
+
+def test_dashboard_month_order_does_not_split_the_cache(database):
+    with TestClient(backend.app) as client:
+        response_cache.clear()
+        first = client.get("/api/dashboard", params=[("year", 2025), ("months", 3), ("months", 1)])
+        misses = response_cache.misses
+        second = client.get(
+            "/api/dashboard", params=[("year", 2025), ("months", 1), ("months", 3), ("months", 1)]
+        )
+
+    assert first.status_code == second.status_code == 200
+    assert response_cache.misses == misses
+    assert first.headers["ETag"] == second.headers["ETag"]
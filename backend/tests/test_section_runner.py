@@ -0,0 +1,95 @@
+"""Sections of one report never mix two states of the data."""
+
+import datetime
+import threading
+
+import pytest
+
+from app.database import sections
+from app.database.sections import SectionRunner
+from app.database.writer import write_dispatcher
+from app.model.transaction import Transaction
+
+
+@pytest.fixture
+def writer(database):
+    write_dispatcher.start()
+    yield write_dispatcher
+    write_dispatcher.stop()
+
+
+def _tasks(controller, account, writes):
+    """Two sections; the first commits a write on its first ``writes`` runs."""
+
+    lock = threading.Lock()
+    runs = []
+
+    def writing_section():
+        with lock:
+            runs.append(1)
+            write_now = len(runs) <= writes
+        if write_now:
+            result = write_dispatcher.run(
+                controller.add_transaction,
+                {
+                    "account_id": account["id"],
+                    "date": datetime.date(2025, 1, 1),
+                    "description": "Concurrente",
+                    "amount": 10.0,
+                    "type": "Gasto Variable",
+                    "category": "Comida",
+                },
+            )
+            assert "error" not in result
+        return Transaction.select().count()
+
+    def counting_section():
+        return Transaction.select().count()
+
+    return {"writing": writing_section, "counting": counting_section}
+
+
+@pytest.mark.parametrize("writes", [0, 1, 2, sections.MAX_ATTEMPTS])
+def test_a_concurrent_write_never_splits_a_batch(controller, account, writer, writes):
+    # One worker runs the sections in order, so the counting section always
+    # opens its snapshot after the write committed.
+    runner = SectionRunner(max_workers=1)
+
+    results, timings = runner.run(_tasks(controller, account, writes))
+
+    assert results["writing"] == results["counting"]
+    assert set(timings) == {"writing", "counting"}
+    assert runner.snapshot()["retries"] == writes
+
+
+def test_sections_wait_out_an_open_write(controller, account, writer):
+    runner = SectionRunner(max_workers=2)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_write():
+        started.set()
+        release.wait(5)
+        controller.add_transaction(
+            {
+                "account_id": account["id"],
+                "date": datetime.date(2025, 1, 2),
+                "description": "Lenta",
+                "amount": 5.0,
+                "type": "Gasto Variable",
+                "category": "Comida",
+            }
+        )
+
+    pending = write_dispatcher.submit(slow_write)
+    assert started.wait(5)
+    tasks = {
+        "first": lambda: Transaction.select().count(),
+        "second": lambda: (release.set(), Transaction.select().count())[1],
+    }
+
+    results, _ = runner.run(tasks)
+    pending.result(5)
+
+    # The write was open when the first batch started, so it was not trusted.
+    assert results["first"] == results["second"]
+    assert runner.snapshot()["retries"] >= 1
@@ -0,0 +1,247 @@
+"""Statement parsing, and imports that keep derived tables equal to a rebuild."""
+
+import io
+
+import pytest
+
+import backend
+from app.controller import app_controller
+from app.controller import statement_import
+from app.controller.statement_import import (
+    StatementFormatError,
+    detect_statement_format,
+    iter_statement_records,
+)
+
+STATEMENT = """fecha;concepto;importe;etiquetas
+03/01/2024;Nómina enero;2500,00;sueldo
+03/01/2024;Alquiler;-900,00;casa|fijo
+20/02/2024;Supermercado;-85,40;comida
+15/06/2024;Farmacia;-12,00;
+01/07/2024;Cine;-18,50;ocio;
+"""
+
+
+def _import(controller, account, text=STATEMENT):
+    return controller.import_transactions(
+        iter_statement_records(io.StringIO(text), "csv", account["id"]),
+        backend.validate_import_record,
+    )
+
+
+def _seed_history(controller, account):
+    savings = controller.add_account(
+        {"name": "Ahorro", "account_type": "Cuenta de Ahorro", "initial_balance": 0}
+    )
+    for date, amount, kind in (
+        ("2024-01-03", 50.0, "Gasto Variable"),
+        ("2024-03-10", 700.0, "Ingreso"),
+        ("2024-08-01", 30.0, "Gasto Variable"),
+    ):
+        controller.add_transaction(
+            {
+                "account_id": account["id"],
+                "date": date,
+                "description": "Previa",
+                "amount": amount,
+                "type": kind,
+                "category": "Otros Gastos" if kind != "Ingreso" else "Otros Ingresos",
+            }
+        )
+    controller.add_transaction(
+        {
+            "account_id": account["id"],
+            "date": "2024-05-05",
+            "description": "Traspaso",
+            "amount": 200.0,
+            "type": "Transferencia",
+            "category": "Transferencia",
+            "is_transfer": True,
+            "transfer_account_id": savings["id"],
+        }
+    )
+
+
+@pytest.mark.parametrize("threshold", [app_controller.BULK_REBUILD_THRESHOLD, 0])
+def test_import_keeps_derived_tables_exact(
+    controller, account, assert_derived_tables_match_rebuild, monkeypatch, threshold
+):
+    # Threshold 0 takes the full-rebuild path for any import.
+    monkeypatch.setattr(app_controller, "BULK_REBUILD_THRESHOLD", threshold)
+    _seed_history(controller, account)
+
+    result = _import(controller, account)
+
+    assert result["imported"] == 5 and result["rejected"] == 0
+    tables = assert_derived_tables_match_rebuild()
+    assert tables["daily_balance"] and tables["balance_snapshot"]
+
+
+def test_import_attaches_tags_to_their_own_rows(controller, account):
+    _seed_history(controller, account)
+    # Deleting the newest row frees its id for reuse by the import.
+    newest = max(row["id"] for row in controller.get_transactions_data())
+    controller.delete_transaction(newest, adjust_balance=True)
+
+    _import(controller, account)
+
+    tags = {row["description"]: row["tags"] for row in controller.get_transactions_data()}
+    assert tags["Nómina enero"] == ["sueldo"]
+    assert tags["Alquiler"] == ["casa", "fijo"]
+    assert tags["Supermercado"] == ["comida"]
+    assert tags["Farmacia"] == []
+
+
+def _records(text, statement_format, account_id=7):
+    return list(iter_statement_records(io.StringIO(text), statement_format, account_id))
+
+
+def test_csv_dates_decimal_commas_signs_and_tags():
+    records = dict(_records(STATEMENT, "csv"))
+
+    assert sorted(records) == [2, 3, 4, 5, 6]
+    assert records[2] == {
+        "date": "2024-01-03",
+        "description": "Nómina enero",
+        "amount": 2500.0,
+        "type": "Ingreso",
+        "category": "Otros Ingresos",
+        "tags": ["sueldo"],
+        "account_id": 7,
+    }
+    assert records[3]["amount"] == 900.0 and records[3]["type"] == "Gasto Variable"
+    assert records[3]["category"] == "Otros Gastos"
+    assert records[3]["tags"] == ["casa", "fijo"]
+    assert records[4]["date"] == "2024-02-20" and records[4]["amount"] == 85.4
+    assert "tags" not in records[5]
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("1.234,56", 1234.56),
+        ("1,234.56", 1234.56),
+        ("-12,5", -12.5),
+        ("1,234", 1234.0),
+        ("(45,00)", -45.0),
+        ("$ 10.00", 10.0),
+    ],
+)
+def test_csv_amount_layouts(raw, expected):
+    text = f'date,description,amount,type\n2024-03-01,Fila,"{raw}",Gasto Fijo\n'
+
+    ((_, record),) = _records(text, "csv")
+
+    assert record["amount"] == pytest.approx(abs(expected))
+    # An explicit type wins over the sign.
+    assert record["type"] == "Gasto Fijo"
+
+
+def test_csv_keeps_unreadable_cells_for_the_validator(controller, account):
+    text = "fecha;concepto;importe\n31/02/2024;Fecha imposible;-10,00\n05/03/2024;Sin monto;abc\n"
+
+    records = _records(text, "csv")
+    assert [record["date"] for _, record in records] == ["31/02/2024", "2024-03-05"]
+    assert records[1][1]["amount"] == "abc"
+
+    result = _import(controller, account, text)
+    assert result["imported"] == 0 and result["rejected"] == 2
+
+
+def test_csv_requires_date_and_amount_columns():
+    with pytest.raises(StatementFormatError, match="amount"):
+        _records("fecha;concepto\n01/01/2024;Nada\n", "csv")
+    with pytest.raises(StatementFormatError):
+        _records("", "csv")
+
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240115120000[-5:EST]
+<TRNAMT>-42.10
+<NAME>Gasolinera
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20240131</DTPOSTED>
+<TRNAMT>1500.00</TRNAMT><MEMO>Transferencia recibida</MEMO></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_ofx_sgml_and_xml_transactions():
+    records = _records(OFX, "ofx")
+
+    assert [line for line, _ in records] == [4, 10]
+    (_, fuel), (_, transfer) = records
+    assert fuel == {
+        "description": "Gasolinera",
+        "amount": 42.10,
+        "date": "2024-01-15",
+        "type": "Gasto Variable",
+        "category": "Otros Gastos",
+        "account_id": 7,
+    }
+    assert transfer["description"] == "Transferencia recibida"
+    assert transfer["amount"] == 1500.0 and transfer["type"] == "Ingreso"
+    assert transfer["date"] == "2024-01-31"
+
+
+def test_ofx_elements_split_across_reads(monkeypatch):
+    whole = _records(OFX, "ofx")
+    # Every read ends mid-element.
+    monkeypatch.setattr(statement_import, "_OFX_READ_SIZE", 7)
+
+    assert _records(OFX, "ofx") == whole
+
+
+QIF = """!Account
+NCuenta corriente
+^
+!Type:Bank
+D12/31'23
+T-1,250.00
+PAlquiler
+LHogar
+^
+D1/5'24
+U300.00
+MReembolso
+L[Ahorro]
+^
+!Type:Invst
+D1/6'24
+NBuy
+T100.00
+^
+"""
+
+
+def test_qif_bank_section_only():
+    records = _records(QIF, "qif")
+
+    assert [line for line, _ in records] == [5, 10]
+    (_, rent), (_, refund) = records
+    assert rent == {
+        "date": "2023-12-31",
+        "amount": 1250.0,
+        "description": "Alquiler",
+        "category": "Hogar",
+        "type": "Gasto Variable",
+        "account_id": 7,
+    }
+    # A "[Cuenta]" transfer keeps the default category for its type.
+    assert refund["date"] == "2024-01-05"
+    assert refund["amount"] == 300.0 and refund["type"] == "Ingreso"
+    assert refund["description"] == "Reembolso" and refund["category"] == "Otros Ingresos"
+
+
+def test_format_detection_and_unknown_formats():
+    assert detect_statement_format("extracto.CSV") == "csv"
+    assert detect_statement_format("banco.qfx") == "ofx"
+    assert detect_statement_format("quicken.qif") == "qif"
+    assert detect_statement_format("hoja.xlsx") is None
+    assert detect_statement_format(None) is None
+    with pytest.raises(StatementFormatError, match="Formato no soportado"):
+        _records("", "xlsx")
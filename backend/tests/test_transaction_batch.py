@@ -0,0 +1,119 @@
+"""A failing batch operation is rolled back alone; the rest is applied."""
+
+import pytest
+
+from app.model.account import Account
+from app.model.budget_entry import BudgetEntry
+from app.model.debt import Debt
+from app.model.transaction import Transaction
+
+
+def _payload(account, date, amount, kind="Gasto Variable", **extra):
+    return dict(
+        {
+            "account_id": account["id"],
+            "date": date,
+            "description": kind,
+            "amount": amount,
+            "type": kind,
+            "category": "Sueldo" if kind == "Ingreso" else "Comida",
+        },
+        **extra,
+    )
+
+
+@pytest.fixture
+def seeded(controller, account):
+    entry = controller.add_budget_entry(
+        {"category": "Comida", "budgeted_amount": 500, "type": "Gasto Variable"}
+    )
+    debt = controller.add_debt({"name": "Préstamo", "total_amount": 3000})
+    cash = controller.add_account(
+        {"name": "Efectivo", "account_type": "Efectivo", "initial_balance": 0}
+    )
+    ids = [
+        controller.add_transaction(data)["id"]
+        for data in (
+            _payload(account, "2024-01-05", 1000.0, "Ingreso"),
+            _payload(account, "2024-02-10", 200.0, budget_entry_id=entry["id"]),
+            _payload(account, "2024-02-20", 50.0, "Pago Deuda", category="Deuda", debt_id=debt["id"]),
+        )
+    ]
+    return {"ids": ids, "entry": entry, "debt": debt, "cash": cash}
+
+
+def test_partial_failure_applies_only_the_good_operations(
+    controller, account, seeded, monkeypatch, assert_derived_tables_match_rebuild
+):
+    income, market, payment = seeded["ids"]
+    entry, cash = seeded["entry"], seeded["cash"]
+
+    # Fails after its row was inserted, so only a savepoint can undo it.
+    sync_tags = controller._sync_transaction_tags
+
+    def failing_tags(transaction, tags):
+        if tags and "rompe" in tags:
+            raise ValueError("etiqueta rota")
+        return sync_tags(transaction, tags)
+
+    monkeypatch.setattr(controller, "_sync_transaction_tags", failing_tags)
+
+    result = controller.apply_transaction_batch(
+        [
+            {"op": "create", "data": _payload(account, "2024-03-01", 30.0, budget_entry_id=entry["id"])},
+            {"op": "update", "id": market, "data": _payload(account, "2024-04-01", 250.0, budget_entry_id=entry["id"])},
+            {"op": "update", "id": 99999, "data": _payload(account, "2024-04-02", 10.0)},
+            {
+                "op": "create",
+                "data": _payload(
+                    cash, "2024-04-03", 500.0, "Transferencia",
+                    category="Transferencia", is_transfer=True, transfer_account_id=account["id"],
+                ),
+            },
+            {"op": "create", "data": _payload(account, "2024-04-04", 70.0, tags=["rompe"])},
+            {"op": "delete", "id": payment, "adjust_balance": True},
+            {"op": "merge", "id": income},
+            {"op": "update", "id": income, "data": {}},
+        ]
+    )
+
+    assert result["succeeded"] == 3 and result["failed"] == 5
+    outcome = {item["index"]: item for item in result["results"]}
+    assert [index for index, item in outcome.items() if item["success"]] == [0, 1, 5]
+    assert outcome[2]["error"] == "La transacción no existe."
+    assert "fondos suficientes" in outcome[3]["error"]
+    assert "etiqueta rota" in outcome[4]["error"]
+    assert outcome[6]["error"] == "Operación no soportada."
+    assert outcome[7]["error"] == "Faltan los datos de la transacción."
+
+    created = outcome[0]["id"]
+    assert sorted(row.id for row in Transaction.select()) == sorted([income, market, created])
+    assert not Transaction.select().where(Transaction.amount == 70.0).exists()
+    assert float(Transaction.get_by_id(market).amount) == 250.0
+
+    # Balances reflect the applied operations only.
+    assert Account.get_by_id(account["id"]).current_balance == pytest.approx(100000 + 1000 - 250 - 30)
+    assert Account.get_by_id(cash["id"]).current_balance == pytest.approx(0)
+    assert float(BudgetEntry.get_by_id(entry["id"]).actual_amount) == pytest.approx(280.0)
+    assert float(Debt.get_by_id(seeded["debt"]["id"]).current_balance) == pytest.approx(3000.0)
+    assert controller.reconcile_budget_actuals(dry_run=True)["drifted"] == []
+    assert_derived_tables_match_rebuild()
+
+
+def test_a_batch_of_only_failures_changes_nothing(
+    controller, account, seeded, assert_derived_tables_match_rebuild
+):
+    before = Account.get_by_id(account["id"]).current_balance
+
+    result = controller.apply_transaction_batch(
+        [
+            {"op": "delete", "id": 99999},
+            {"op": "update", "data": _payload(account, "2024-05-01", 10.0)},
+        ]
+    )
+
+    assert result["succeeded"] == 0 and result["failed"] == 2
+    assert result["results"][1]["error"] == "Falta el id de la transacción."
+    assert Transaction.select().count() == 3
+    assert Account.get_by_id(account["id"]).current_balance == pytest.approx(before)
+    assert_derived_tables_match_rebuild()
@@ -0,0 +1,94 @@
+"""The transaction listing runs the same statements whatever its size."""
+
+import datetime
+import logging
+
+import pytest
+
+
+class _StatementLog(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.statements = []
+
+    def emit(self, record):
+        # peewee logs each statement as a (sql, params) tuple.
+        self.statements.append(record.msg[0])
+
+
+def _logged_statements(func):
+    logger = logging.getLogger("peewee")
+    counter = _StatementLog()
+    previous_level = logger.level
+    logger.addHandler(counter)
+    logger.setLevel(logging.DEBUG)
+    try:
+        func()
+    finally:
+        logger.removeHandler(counter)
+        logger.setLevel(previous_level)
+    return counter.statements
+
+
+def _seed(controller, account, size, year):
+    savings = controller.add_account(
+        {"name": f"Ahorro {year}", "account_type": "Efectivo", "initial_balance": 0}
+    )
+    goal = controller.add_goal({"name": f"Meta {year}", "target_amount": 5000})
+    debt = controller.add_debt({"name": f"Deuda {year}", "total_amount": 9000})
+    entry = controller.add_budget_entry(
+        {"category": "Comida", "budgeted_amount": 500, "type": "Gasto Variable"}
+    )
+    records = []
+    for index in range(size):
+        record = {
+            "description": f"Movimiento {index}",
+            "amount": 10.0 + index % 7,
+            "date": datetime.date(year, 1, 1) + datetime.timedelta(days=index % 300),
+            "type": "Gasto Variable",
+            "category": "Comida",
+            "account_id": account["id"],
+            "tags": ["casa", f"grupo{index % 3}"],
+        }
+        kind = index % 5
+        if kind == 0:
+            record.update(type="Ahorro Meta", goal_id=goal["id"])
+        elif kind == 1:
+            record.update(type="Pago Deuda", debt_id=debt["id"])
+        elif kind == 2:
+            record["budget_entry_id"] = entry["id"]
+        elif kind == 3:
+            record.update(is_transfer=True, transfer_account_id=savings["id"])
+        else:
+            record["splits"] = [
+                {"category": "Comida", "amount": 5.0},
+                {"category": "Ocio", "amount": record["amount"] - 5.0},
+            ]
+        records.append((index + 1, record))
+    result = controller.import_transactions(iter(records))
+    assert result["imported"] == size, result
+
+
+SIZES = {2021: 5, 2022: 50, 2023: 500}
+
+
+@pytest.mark.parametrize("paging", [{}, {"limit": 1000}], ids=["full", "paged"])
+def test_statement_count_does_not_grow_with_rows(controller, account, paging):
+    for year, size in SIZES.items():
+        _seed(controller, account, size, year)
+
+    counts = {}
+    for year, size in SIZES.items():
+        filters = dict(paging, start_date=datetime.date(year, 1, 1), end_date=datetime.date(year, 12, 31))
+        result = {}
+        statements = _logged_statements(
+            lambda: result.update(rows=controller.get_transactions_data(dict(filters)))
+        )
+        counts[size] = len(statements)
+        rows = result["rows"]["items"] if paging else result["rows"]
+        assert len(rows) == size
+        assert all(row["tags"] for row in rows)
+        # Splits and tags are read by id, without re-running the filtered query.
+        assert sum('FROM "transaction"' in sql for sql in statements) == 1
+
+    assert counts[5] == counts[50] == counts[500], counts
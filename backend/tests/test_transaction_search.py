@@ -0,0 +1,114 @@
+"""Transaction search with and without the FTS5 index."""
+
+import datetime
+import logging
+
+import pytest
+from peewee import OperationalError
+
+from app.database import db_manager
+from app.database.search import search_index
+from app.model.transaction_search import TransactionSearch
+
+
+def _add(controller, account, description, category="Comida", tags=()):
+    result = controller.add_transaction(
+        {
+            "description": description,
+            "amount": 12.5,
+            "date": datetime.date(2025, 5, 1),
+            "type": "Gasto Variable",
+            "category": category,
+            "account_id": account["id"],
+            "tags": list(tags),
+        }
+    )
+    assert "error" not in result, result
+    return result["id"]
+
+
+def _no_fts5(*args, **kwargs):
+    raise OperationalError("no such module: fts5")
+
+
+@pytest.fixture(params=["fts5", "fallback"])
+def search_path(request, database, monkeypatch):
+    if request.param == "fallback":
+        for name in db_manager.TRANSACTION_SEARCH_TRIGGERS:
+            database.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+        database.execute_sql("DROP TABLE transaction_search")
+        monkeypatch.setattr(TransactionSearch, "create_table", _no_fts5)
+        db_manager.ensure_transaction_search_index()
+        assert not search_index.available
+    else:
+        assert search_index.available
+    return request.param
+
+
+def _found(controller, term):
+    listed = [row["id"] for row in controller.get_transactions_data({"search": term})]
+    page = controller.get_transactions_data({"search": term, "limit": 10, "sort_by": "relevance"})
+    assert sorted(listed) == sorted(row["id"] for row in page["items"])
+    return sorted(listed)
+
+
+def test_both_paths_match_word_prefixes(search_path, controller, account):
+    cafe = _add(controller, account, "Café de la esquina")
+    market = _add(controller, account, "Supermercado central", tags=["compra semanal"])
+    split = _add(controller, account, "Cena", category="Ocio")
+    controller.update_transaction(
+        split,
+        {
+            "description": "Cena",
+            "amount": 12.5,
+            "date": datetime.date(2025, 5, 1),
+            "type": "Gasto Variable",
+            "category": "Ocio",
+            "account_id": account["id"],
+            "splits": [
+                {"category": "Restaurantes", "amount": 10.0},
+                {"category": "Ocio", "amount": 2.5},
+            ],
+        },
+    )
+
+    assert _found(controller, "cafe") == [cafe]
+    assert _found(controller, "CAF esq") == [cafe]
+    assert _found(controller, "super") == [market]
+    # Words are matched by prefix, never inside another word.
+    assert _found(controller, "mercado") == []
+    assert _found(controller, "semanal") == [market]
+    assert _found(controller, "restaur") == [split]
+    assert _found(controller, "cafe super") == []
+
+
+def test_failed_index_rolls_back_and_is_retried_at_startup(
+    database, controller, account, monkeypatch, caplog
+):
+    rent = _add(controller, account, "Alquiler")
+    for name in db_manager.TRANSACTION_SEARCH_TRIGGERS:
+        database.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+    database.execute_sql("DROP TABLE transaction_search")
+
+    # The table is created but a trigger fails: nothing must be left behind.
+    failing = dict(db_manager.TRANSACTION_SEARCH_TRIGGERS)
+    failing["transaction_search_tag_au"] = "AFTER UPDATE ON missing_table BEGIN SELECT 1; END"
+    monkeypatch.setattr(db_manager, "TRANSACTION_SEARCH_TRIGGERS", failing)
+    with caplog.at_level(logging.WARNING, logger=db_manager.__name__):
+        db_manager.ensure_transaction_search_index()
+
+    assert "Full-text search index unavailable" in caplog.text
+    assert not search_index.available
+    assert not TransactionSearch.table_exists()
+    assert not database.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'transaction_search%'"
+    ).fetchall()
+    assert [row["id"] for row in controller.get_transactions_data({"search": "alqui"})] == [rent]
+
+    # The next start builds the index even though migration 5 is recorded.
+    monkeypatch.undo()
+    db_manager.initialize_database()
+
+    assert search_index.available
+    assert TransactionSearch.table_exists()
+    assert [row["id"] for row in controller.get_transactions_data({"search": "alqui"})] == [rent]
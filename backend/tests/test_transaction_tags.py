@@ -0,0 +1,39 @@
+"""Transaction tags are listed in the order they were submitted."""
+
+import pytest
+
+
+def _payload(account, tags):
+    return {
+        "account_id": account["id"],
+        "date": "2025-03-01",
+        "description": "Cena",
+        "amount": 40.0,
+        "type": "Gasto",
+        "category": "Comida",
+        "tags": tags,
+    }
+
+
+def _listed_tags(controller):
+    (row,) = controller.get_transactions_data()
+    return row["tags"]
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (["viaje", "amigos"], ["amigos", "viaje"]),
+        (["viaje", "amigos"], ["viaje", "amigos", "bar"]),
+        (["viaje", "amigos", "bar"], ["bar", "viaje"]),
+        (["viaje", "amigos", "bar"], ["viaje", "nuevo", "bar"]),
+    ],
+)
+def test_update_keeps_submitted_tag_order(controller, account, first, second):
+    created = controller.add_transaction(_payload(account, first))
+    assert _listed_tags(controller) == first
+
+    result = controller.update_transaction(created["id"], _payload(account, second))
+
+    assert "error" not in result
+    assert _listed_tags(controller) == second
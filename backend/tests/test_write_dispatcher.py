@@ -0,0 +1,56 @@
+"""Queued writes share one commit and fail one by one."""
+
+import pytest
+
+from app.database.data_version import data_version
+from app.database.writer import WriteDispatcher
+from app.model.tag import Tag
+
+
+@pytest.fixture
+def dispatcher(database):
+    writer = WriteDispatcher()
+    yield writer
+    writer.stop()
+
+
+def _add_tag(name):
+    return Tag.create(name=name).id
+
+
+def _fail_after_insert(name):
+    Tag.create(name=name)
+    raise ValueError("rechazada")
+
+
+def test_a_failing_write_only_rolls_back_its_own_changes(dispatcher):
+    # Queued before the writer starts, so the three share one batch.
+    first = dispatcher.submit(_add_tag, "antes")
+    failing = dispatcher.submit(_fail_after_insert, "fallida")
+    last = dispatcher.submit(_add_tag, "despues")
+    version = data_version.value
+    dispatcher.start()
+
+    assert first.result(5) and last.result(5)
+    with pytest.raises(ValueError, match="rechazada"):
+        failing.result(5)
+
+    names = {tag.name for tag in Tag.select()}
+    assert {"antes", "despues"} <= names
+    assert "fallida" not in names
+    stats = dispatcher.snapshot()
+    assert stats["batches"] == 1 and stats["writes"] == 3
+    # One bump for the whole committed batch.
+    assert data_version.value == version + 1
+    assert data_version.stable_value() == data_version.value
+
+
+def test_inline_writes_run_in_a_transaction(dispatcher):
+    version = data_version.value
+
+    with pytest.raises(ValueError):
+        dispatcher.run(_fail_after_insert, "inline")
+
+    assert not Tag.select().where(Tag.name == "inline").exists()
+    assert dispatcher.run(_add_tag, "ok")
+    assert data_version.value == version + 2
@@ -372,18 +372,31 @@ export function Transactions() {
     );
 
     try {
-      await Promise.all(
-        selectedTransactionIds.map((id) =>
-          axios.delete(apiPath(`/transactions/${id}`), {
-            params: { adjust_balance: adjustBalance },
-          })
-        )
-      );
+      const { data } = await axios.post<{
+        failed: number;
+        results: { id: number; success: boolean; error?: string }[];
+      }>(apiPath("/transactions/batch"), {
+        operations: selectedTransactionIds.map((id) => ({
+          op: "delete",
+          id,
+          adjust_balance: adjustBalance,
+        })),
+      });
 
-      setSelectedTransactionIds([]);
+      // Las que no se pudieron eliminar siguen seleccionadas para reintentar.
+      const failures = data.results.filter((result) => !result.success);
+      setSelectedTransactionIds(failures.map((result) => result.id));
       await fetchTransactions();
+
+      if (data.failed > 0) {
+        alert(
+          `No se pudieron eliminar ${data.failed} transacciones:\n` +
+            failures.map((result) => `#${result.id}: ${result.error}`).join("\n")
+        );
+      }
     } catch (error) {
       console.error("Error al eliminar las transacciones:", error);
+      alert("Hubo un error al eliminar las transacciones.");
     }
   };
 